@@ -7,7 +7,7 @@ import os
 import threading
 import time
 
-from spotify import ArtistBrowser, Link, ToplistBrowser, SpotifyError
+from spotify import futures, Link, ToplistBrowser, SpotifyError
 from spotify.audiosink import import_audio_sink
 from spotify.manager import (
     SpotifySessionManager, SpotifyPlaylistManager, SpotifyContainerManager)
@@ -366,8 +366,7 @@ class Jukebox(SpotifySessionManager):
 
     def load_track(self, track):
         print u"Loading track..."
-        while not track.is_loaded():
-            time.sleep(0.1)
+        futures.loaded([track]).result()
         if track.is_autolinked():  # if linked, load the target track instead
             print "Autolinked track, loading the linked-to track"
             return self.load_track(track.playable())
@@ -454,15 +453,13 @@ class Jukebox(SpotifySessionManager):
 
     def browse(self, link, callback):
         if link.type() == link.LINK_ALBUM:
-            browser = self.session.browse_album(link.as_album(), callback)
-            while not browser.is_loaded():
-                time.sleep(0.1)
+            browser = futures.browse_album(link.as_album()).result()
+            callback(browser, None)
             for track in browser:
                 print track.name()
         if link.type() == link.LINK_ARTIST:
-            browser = ArtistBrowser(link.as_artist())
-            while not browser.is_loaded():
-                time.sleep(0.1)
+            browser = futures.browse_artist(link.as_artist()).result()
+            callback(browser, None)
             for album in browser:
                 print album.name()
 
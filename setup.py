@@ -63,11 +63,18 @@ spotify_ext = Extension('spotify._spotify',
         'src/albumbrowser.c',
         'src/artist.c',
         'src/artistbrowser.c',
+        'src/audioring.c',
+        'src/cbtable.c',
+        'src/loadbarrier.c',
         'src/search.c',
+        'src/seqiter.c',
+        'src/snapshot.c',
         'src/playlist.c',
         'src/playlistcontainer.c',
         'src/playlistfolder.c',
+        'src/profile.c',
         'src/image.c',
+        'src/intern.c',
         'src/user.c',
         'src/pyspotify.c',
         'src/toplistbrowser.c',
@@ -86,17 +93,24 @@ mockspotify_ext = Extension('spotify._mockspotify',
         'src/albumbrowser.c',
         'src/artist.c',
         'src/artistbrowser.c',
+        'src/audioring.c',
+        'src/cbtable.c',
+        'src/loadbarrier.c',
         'src/search.c',
+        'src/seqiter.c',
+        'src/snapshot.c',
         'src/playlist.c',
         'src/playlistcontainer.c',
         'src/playlistfolder.c',
+        'src/profile.c',
         'src/image.c',
+        'src/intern.c',
         'src/user.c',
         'src/pyspotify.c',
         'src/toplistbrowser.c',
     ],
     include_dirs=['src'],
-    libraries=['mockspotify'],
+    libraries=['mockspotify', 'dl'],
 )
 
 modules = [spotify_ext]
@@ -32,5 +32,11 @@ from spotify._spotify import ArtistBrowser
 from spotify._spotify import Image
 from spotify._spotify import User
 from spotify._spotify import ToplistBrowser
+from spotify._spotify import AudioRing
+from spotify._spotify import LoadBarrier
 
 from spotify._spotify import api_version
+from spotify._spotify import set_callback_profiling
+from spotify._spotify import callback_profile
+from spotify._spotify import reset_callback_profile
+from spotify._spotify import set_interning
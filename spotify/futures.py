@@ -0,0 +1,391 @@
+"""
+Futures for asynchronous Spotify operations.
+
+The helpers in this module start a search, a browse or an image load and
+return a :class:`Future` which is completed from the session callback,
+instead of requiring the caller to poll ``is_loaded()``.
+
+Completion happens on the thread processing session events, so never block
+on :meth:`Future.result` from a session callback, or from the thread running
+:meth:`spotify.manager.SpotifySessionManager.loop`.
+"""
+
+import Queue
+import threading
+import time
+
+import spotify
+
+class CancelledError(spotify.SpotifyError):
+    """
+    The future was cancelled.
+    """
+    pass
+
+class TimeoutError(spotify.SpotifyError):
+    """
+    The future was not done before the timeout expired.
+    """
+    pass
+
+_PENDING = 'pending'
+_CANCELLED = 'cancelled'
+_FINISHED = 'finished'
+
+class Future(object):
+    """
+    The result of an asynchronous operation.
+
+    All methods are thread safe.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._state = _PENDING
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        # Keeps the browser, search or image alive until it completes
+        self._source = None
+
+    def __repr__(self):
+        return '<%s at 0x%x state=%s>' % (
+            self.__class__.__name__, id(self), self._state)
+
+    def cancel(self):
+        """
+        Cancel the future, unless it is already done. The underlying
+        *libspotify* request is not cancelled, its result is just dropped.
+
+        :return: whether the future was cancelled
+        :rtype: :class:`bool`
+        """
+        with self._condition:
+            if self._state != _PENDING:
+                return self._state == _CANCELLED
+            self._state = _CANCELLED
+            self._condition.notify_all()
+        self._complete()
+        return True
+
+    def cancelled(self):
+        """
+        :return: whether the future was cancelled
+        :rtype: :class:`bool`
+        """
+        return self._state == _CANCELLED
+
+    def done(self):
+        """
+        :return: whether the future was cancelled or has a result
+        :rtype: :class:`bool`
+        """
+        return self._state != _PENDING
+
+    def _wait(self, timeout):
+        with self._condition:
+            if self._state == _PENDING:
+                self._condition.wait(timeout)
+            if self._state == _CANCELLED:
+                raise CancelledError()
+            if self._state == _PENDING:
+                raise TimeoutError()
+
+    def result(self, timeout=None):
+        """
+        Wait for the future to be done and return its result.
+
+        :param timeout: seconds to wait, or :class:`None` to wait forever
+        :type timeout: :class:`float`
+        :raises: :exc:`TimeoutError` if the future isn't done in time,
+            :exc:`CancelledError` if it was cancelled, or the exception set
+            with :meth:`set_exception`
+        """
+        self._wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        """
+        Wait for the future to be done and return its exception, or
+        :class:`None` if it completed successfully.
+        """
+        self._wait(timeout)
+        return self._exception
+
+    def add_done_callback(self, fn):
+        """
+        Call ``fn(future)`` when the future is done. If it already is, ``fn``
+        is called immediately from the current thread, otherwise from the
+        thread completing the future.
+        """
+        with self._condition:
+            if self._state == _PENDING:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_result(self, result):
+        """
+        Complete the future with ``result``. Does nothing if the future was
+        cancelled.
+        """
+        with self._condition:
+            if self._state != _PENDING:
+                return
+            self._result = result
+            self._state = _FINISHED
+            self._condition.notify_all()
+        self._complete()
+
+    def set_exception(self, exception):
+        """
+        Complete the future with ``exception``. Does nothing if the future
+        was cancelled.
+        """
+        with self._condition:
+            if self._state != _PENDING:
+                return
+            self._exception = exception
+            self._state = _FINISHED
+            self._condition.notify_all()
+        self._complete()
+
+    def _complete(self):
+        self._source = None
+        callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+
+def _deadline(timeout):
+    if timeout is None:
+        return None
+    return time.time() + timeout
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.time())
+
+def wait_all(futures, timeout=None):
+    """
+    Wait for all ``futures`` to be done.
+
+    :param timeout: seconds to wait for all of them, or :class:`None` to wait
+        forever
+    :return: the results, in the same order as ``futures``
+    :rtype: :class:`list`
+    :raises: :exc:`TimeoutError` if they are not all done in time, or the
+        first exception raised by :meth:`Future.result`
+    """
+    deadline = _deadline(timeout)
+    return [future.result(_remaining(deadline)) for future in futures]
+
+def as_completed(futures, timeout=None):
+    """
+    Iterate over ``futures``, yielding each one as soon as it is done.
+
+    :param timeout: seconds to wait for all of them, or :class:`None` to wait
+        forever
+    :raises: :exc:`TimeoutError` if they are not all done in time
+    """
+    done = Queue.Queue()
+    futures = list(futures)
+    for future in futures:
+        future.add_done_callback(done.put)
+    deadline = _deadline(timeout)
+    for _ in futures:
+        try:
+            future = done.get(timeout=_remaining(deadline))
+        except Queue.Empty:
+            raise TimeoutError()
+        yield future
+
+
+def _complete_with(obj, future):
+    future.set_result(obj)
+
+def _start(factory, *args):
+    future = Future()
+    source = factory(*args + (_complete_with, future))
+    if not future.done():
+        future._source = source
+    return future
+
+def search(session, query, **kwargs):
+    """
+    Search Spotify, see :meth:`spotify.Session.search` for the keyword
+    arguments.
+
+    :return: a future for the :class:`spotify.Results`
+    :rtype: :class:`Future`
+    """
+    future = Future()
+    kwargs['userdata'] = future
+    results = session.search(query, _complete_with, **kwargs)
+    if not future.done():
+        future._source = results
+    return future
+
+# Paging arguments of Session.search for each type of result
+_PAGE_ARGUMENTS = {
+    'tracks': ('track_offset', 'track_count', 'total_tracks'),
+    'albums': ('album_offset', 'album_count', 'total_albums'),
+    'artists': ('artist_offset', 'artist_count', 'total_artists'),
+    'playlists': ('playlist_offset', 'playlist_count', 'total_playlists'),
+}
+
+def _search_page(session, query, type, offset, count, kwargs):
+    kwargs = dict(kwargs, types=(type,))
+    offset_name, count_name, total_name = _PAGE_ARGUMENTS[type]
+    kwargs[offset_name] = offset
+    kwargs[count_name] = count
+    return search(session, query, **kwargs)
+
+def search_pages(session, query, type='tracks', page_size=32, prefetch=1,
+                 timeout=None, **kwargs):
+    """
+    Iterate over the results of a search page by page, yielding a
+    :class:`list` of up to ``page_size`` tracks, albums, artists or
+    playlists, as given by ``type``. The search stops at the total number of
+    results reported by *libspotify*.
+
+    Up to ``prefetch`` following pages are requested while the caller
+    consumes the current one, so only a few pages are held in memory at a
+    time. With a ``prefetch`` of 0, each page is only requested once the
+    previous one is consumed. Other keyword arguments are passed to
+    :meth:`spotify.Session.search`, the other types of results are not
+    fetched.
+
+    Like :meth:`Future.result`, this blocks until each page is loaded, so it
+    must not be used from the thread processing session events.
+
+    :param timeout: seconds to wait for each page, or :class:`None` to wait
+        forever
+    :raises: :exc:`TimeoutError` if a page isn't loaded in time, or
+        :exc:`spotify.SpotifyError` if the search fails
+    """
+    if type not in _PAGE_ARGUMENTS:
+        raise ValueError('Unknown search result type: %r' % (type,))
+    if page_size <= 0:
+        raise ValueError('page_size must be positive')
+    total_name = _PAGE_ARGUMENTS[type][2]
+    pages = [_search_page(session, query, type, 0, page_size, kwargs)]
+    # Offset of the next page to request
+    offset = page_size
+    while pages:
+        results = pages.pop(0).result(timeout)
+        if results.error() != 0:
+            raise spotify.SpotifyError(
+                'Search failed with error %d' % results.error())
+        items = getattr(results, type)()
+        if not items:
+            return
+        total = getattr(results, total_name)()
+        while len(pages) < prefetch and offset < total:
+            pages.append(_search_page(
+                session, query, type, offset, page_size, kwargs))
+            offset += page_size
+        yield items
+        if not pages and offset < total:
+            # Without prefetching, the next page is requested once the
+            # current one is consumed
+            pages.append(_search_page(
+                session, query, type, offset, page_size, kwargs))
+            offset += page_size
+
+def browse_album(album):
+    """
+    Browse ``album``.
+
+    :return: a future for the loaded :class:`spotify.AlbumBrowser`
+    :rtype: :class:`Future`
+    """
+    return _start(spotify.AlbumBrowser, album)
+
+def browse_artist(artist, type='full'):
+    """
+    Browse ``artist``, ``type`` is as for :class:`spotify.ArtistBrowser`.
+
+    :return: a future for the loaded :class:`spotify.ArtistBrowser`
+    :rtype: :class:`Future`
+    """
+    return _start(spotify.ArtistBrowser, artist, type)
+
+def browse_toplist(type, region):
+    """
+    Browse a toplist, see :class:`spotify.ToplistBrowser` for the parameters.
+
+    :return: a future for the loaded :class:`spotify.ToplistBrowser`
+    :rtype: :class:`Future`
+    """
+    return _start(spotify.ToplistBrowser, type, region)
+
+def _complete_barrier(barrier, future):
+    future.set_result(list(barrier.objects()))
+
+def _cancel_barrier(barrier, future):
+    if future.cancelled():
+        barrier.cancel()
+
+def loaded(objects):
+    """
+    Wait for ``objects``, tracks, albums, artists, users, playlists or images,
+    to be loaded, without polling. See :class:`spotify.LoadBarrier`.
+
+    Cancelling the future cancels the barrier, so like the rest of the
+    Spotify API it must then be done from the thread processing session
+    events.
+
+    :return: a future for the list of ``objects``, done when they are all
+        loaded
+    :rtype: :class:`Future`
+    """
+    future = Future()
+    barrier = spotify.LoadBarrier(objects, _complete_barrier, future)
+    if not future.done():
+        future._source = barrier
+        future.add_done_callback(
+            lambda future: _cancel_barrier(barrier, future))
+    return future
+
+def _complete_item(obj, futures):
+    for future in futures.pop(id(obj), ()):
+        future.set_result(obj)
+
+def loaded_each(objects):
+    """
+    Like :func:`loaded`, but with a future for each object.
+
+    :return: futures for each of ``objects``, done when it is loaded
+    :rtype: :class:`list` of :class:`Future`
+    """
+    objects = list(objects)
+    futures = [Future() for obj in objects]
+    waiting = {}
+    for obj, future in zip(objects, futures):
+        waiting.setdefault(id(obj), []).append(future)
+    barrier = spotify.LoadBarrier(
+        objects, userdata=waiting, item_callback=_complete_item)
+    for future in futures:
+        if not future.done():
+            future._source = barrier
+    return futures
+
+def load_image(image):
+    """
+    Load ``image``, a :class:`spotify.Image` such as returned by
+    :meth:`spotify.Session.image_create`.
+
+    :return: a future for the loaded :class:`spotify.Image`
+    :rtype: :class:`Future`
+    """
+    future = Future()
+    if image.is_loaded():
+        future.set_result(image)
+    else:
+        future._source = image
+        image.add_load_callback(_complete_with, future)
+    return future
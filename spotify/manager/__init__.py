@@ -1,3 +1,7 @@
 from .session import SpotifySessionManager
-from .playlist import SpotifyPlaylistManager
+from .asyncsession import AsyncSpotifySessionManager
+from .playlist import SpotifyPlaylistManager, PlaylistDelta
 from .container import SpotifyContainerManager
+from .pool import SessionPool
+from .library import LibraryIndex
+from .librarysnapshot import LibrarySnapshot
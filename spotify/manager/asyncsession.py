@@ -0,0 +1,248 @@
+import logging
+
+try:
+    import asyncio
+except ImportError:
+    try:
+        import trollius as asyncio
+    except ImportError:
+        asyncio = None
+
+import spotify
+from spotify.manager.session import SpotifySessionManager
+
+logger = logging.getLogger('pyspotify.manager.asyncsession')
+
+class AsyncSpotifySessionManager(SpotifySessionManager):
+    """
+    Client for Spotify driven by an :mod:`asyncio` event loop. Inherit from
+    this class to have your callbacks called on the appropriate events, just
+    like with :class:`SpotifySessionManager`.
+
+    Instead of blocking in a loop of its own, the manager schedules
+    :meth:`session.process_events() <spotify.Session.process_events>` on
+    ``event_loop`` (the default event loop if not given). The loop watches
+    :meth:`session.notify_fd() <spotify.Session.notify_fd>`, so *libspotify*
+    wakes it without calling into Python. All session callbacks except
+    :meth:`music_delivery` and :meth:`credentials_blob_updated` are called
+    from the event loop.
+
+    :meth:`search`, :meth:`browse_album`, :meth:`browse_artist`,
+    :meth:`browse_toplist` and :meth:`load_image` return futures that can be
+    awaited from coroutines running on the same loop. They must be called
+    from the event loop, like the rest of the Spotify API.
+
+    On Python 2, the `trollius <https://pypi.python.org/pypi/trollius>`_
+    backport of :mod:`asyncio` is used.
+    """
+
+    def __init__(self, username=None, password=None, remember_me=False,
+                 login_blob='', proxy=None, proxy_username=None,
+                 proxy_password=None, event_loop=None):
+        if asyncio is None:
+            raise ImportError(
+                'AsyncSpotifySessionManager requires asyncio or trollius')
+        if event_loop is None:
+            event_loop = asyncio.get_event_loop()
+        self.event_loop = event_loop
+        self._timer = None
+        self._logged_out = None
+        # Objects waiting for a load callback, kept alive until it fires
+        self._pending = set()
+        SpotifySessionManager.__init__(self, username, password, remember_me,
+            login_blob, proxy, proxy_username, proxy_password)
+
+    def connect(self):
+        """
+        Connect to the Spotify API using the given username and password.
+        If ``username`` is ``None``, reconnection of the last user will
+        be attempted.
+
+        Unlike :meth:`SpotifySessionManager.connect`, this method returns
+        immediately. It must be called from the event loop.
+
+        :return: a future which is done when we disconnect from the Spotify
+            service.
+        :rtype: :class:`asyncio.Future`
+        """
+        self._logged_out = asyncio.Future(loop=self.event_loop)
+        self.event_loop.add_reader(
+            self.session.notify_fd(), self._process_events)
+        if self.username is None:
+            self.session.relogin()
+        else:
+            self.session.login(self.username, self.password,
+                               self.remember_me)
+        self._process_events()
+        return self._logged_out
+
+    def loop(self, session):
+        """
+        Not available: events are processed from :attr:`event_loop`, which
+        :meth:`connect` sets up.
+
+        :raises: :exc:`RuntimeError`
+        """
+        raise RuntimeError(
+            'AsyncSpotifySessionManager processes events from its event_loop, '
+            'run the future returned by connect() on it instead')
+
+    def _process_events(self):
+        self._wakeup_pending = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        timeout = self._timed_process_events(self.session)
+        if self._logged_out is not None and not self._logged_out.done():
+            self._timer = self.event_loop.call_later(
+                timeout, self._process_events)
+
+    def disconnect(self):
+        """
+        Terminate the current Spotify session. Safe to call from any thread.
+        """
+        self.event_loop.call_soon_threadsafe(self.session.logout)
+
+    def run_in_loop(self, function, *args):
+        """
+        Call ``function(*args)`` from the event loop. Safe to call from any
+        thread.
+        """
+        self.event_loop.call_soon_threadsafe(function, *args)
+
+    def _manager_logged_out(self, session):
+        """
+        Callback.
+
+        The user has or has been logged out from Spotify.
+        This is a wrapper method around `logged_out` that
+        also stops processing events and completes the future returned by
+        :meth:`connect`. Don't override this method.
+
+        :param session: the current session.
+        :type session: :class:`spotify.Session`
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self.event_loop.remove_reader(self.session.notify_fd())
+        self.session.close_notify_fd()
+        if self._logged_out is not None and not self._logged_out.done():
+            self._logged_out.set_result(None)
+        self.logged_out(session)
+
+    def notify_main_thread(self, session=None):
+        """
+        Callback.
+
+        Only called while not connected, as the event loop is otherwise woken
+        through :meth:`session.notify_fd() <spotify.Session.notify_fd>`.
+        Wakes the event loop to call
+        :meth:`session.process_events() <spotify.Session.process_events>`,
+        unless a wakeup is already pending. Don't override this method.
+
+        :param session: the current session.
+        :type session: :class:`spotify.Session`
+        """
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self.event_loop.call_soon_threadsafe(self._process_events)
+
+    def music_delivery(self, session, frames, frame_size, num_frames,
+            sample_type, sample_rate, channels):
+        """
+        Callback.
+
+        Called whenever new music data arrives from Spotify. The default
+        implementation hands the data to :meth:`music_delivery_safe` on the
+        event loop, and gives up after :attr:`music_delivery_timeout` seconds
+        like :meth:`SpotifySessionManager.music_delivery`.
+
+        .. warning::
+            This method is called from an internal thread in libspotify. You
+            should make sure *not* to use the Spotify API from within it, as
+            libspotify isn't thread safe.
+
+        See :meth:`SpotifySessionManager.music_delivery` for the parameters.
+        """
+        return SpotifySessionManager.music_delivery(self, session, frames,
+            frame_size, num_frames, sample_type, sample_rate, channels)
+
+    def _wake_for_music_delivery(self):
+        self.event_loop.call_soon_threadsafe(
+            self._serve_music_delivery, self.session)
+
+    def _track(self, obj, future):
+        """
+        Keeps ``obj`` alive until ``future`` is done.
+        """
+        self._pending.add(obj)
+        future.add_done_callback(lambda f: self._pending.discard(obj))
+        return future
+
+    def _resolve(self, obj, future):
+        if not future.done():
+            future.set_result(obj)
+
+    def search(self, query, **kwargs):
+        """
+        Search Spotify, see :meth:`spotify.Session.search` for the keyword
+        arguments. Like :meth:`SpotifySessionManager.search`, this goes
+        through the search cache when :attr:`search_cache_size` is set.
+
+        :return: a future for the :class:`spotify.Results`.
+        :rtype: :class:`asyncio.Future`
+        """
+        future = asyncio.Future(loop=self.event_loop)
+        results = SpotifySessionManager.search(
+            self, query, self._resolve, userdata=future, **kwargs)
+        return self._track(results, future)
+
+    def browse_album(self, album):
+        """
+        Browse ``album``.
+
+        :return: a future for the loaded :class:`spotify.AlbumBrowser`.
+        :rtype: :class:`asyncio.Future`
+        """
+        future = asyncio.Future(loop=self.event_loop)
+        browser = spotify.AlbumBrowser(album, self._resolve, future)
+        return self._track(browser, future)
+
+    def browse_artist(self, artist, type='full'):
+        """
+        Browse ``artist``, ``type`` is as for :class:`spotify.ArtistBrowser`.
+
+        :return: a future for the loaded :class:`spotify.ArtistBrowser`.
+        :rtype: :class:`asyncio.Future`
+        """
+        future = asyncio.Future(loop=self.event_loop)
+        browser = spotify.ArtistBrowser(artist, type, self._resolve, future)
+        return self._track(browser, future)
+
+    def browse_toplist(self, type, region):
+        """
+        Browse a toplist, see :class:`spotify.ToplistBrowser` for the
+        parameters.
+
+        :return: a future for the loaded :class:`spotify.ToplistBrowser`.
+        :rtype: :class:`asyncio.Future`
+        """
+        future = asyncio.Future(loop=self.event_loop)
+        browser = spotify.ToplistBrowser(type, region, self._resolve, future)
+        return self._track(browser, future)
+
+    def load_image(self, image_id):
+        """
+        Load the image with id ``image_id``.
+
+        :return: a future for the loaded :class:`spotify.Image`.
+        :rtype: :class:`asyncio.Future`
+        """
+        future = asyncio.Future(loop=self.event_loop)
+        image = self.session.image_create(image_id)
+        if image.is_loaded():
+            future.set_result(image)
+            return future
+        image.add_load_callback(self._resolve, future)
+        return self._track(image, future)
@@ -24,13 +24,23 @@ class SpotifyContainerManager:
         """
         Stop listenning to events on the container.
         """
-        try:
-            container.remove_callback(self.container_loaded, userdata)
-            container.remove_callback(self.playlist_added, userdata)
-            container.remove_callback(self.playlist_moved, userdata)
-            container.remove_callback(self.playlist_removed, userdata)
-        except:
-            pass
+        for callback in (self.container_loaded, self.playlist_added,
+                         self.playlist_moved, self.playlist_removed):
+            try:
+                container.remove_callback(callback, userdata)
+            except:
+                pass
+
+    def unwatch_all(self, container):
+        """
+        Stop listening to events on the container, whatever the userdata they
+        were watched with.
+
+        Callbacks added to the container by other managers are kept.
+
+        :return: number of callbacks removed
+        """
+        return container.remove_all_callbacks(owner=self)
 
 ### Callbacks
 
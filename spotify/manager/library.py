@@ -0,0 +1,492 @@
+import time
+
+import spotify
+from spotify.manager.container import SpotifyContainerManager
+from spotify.manager.playlist import SpotifyPlaylistManager
+
+
+def _playlist_uri(playlist):
+    try:
+        return str(spotify.Link.from_playlist(playlist))
+    except spotify.SpotifyError:
+        # Folders, and playlists which are not loaded yet, have no link
+        return None
+
+def _track_uri(track):
+    try:
+        return str(spotify.Link.from_track(track, 0))
+    except spotify.SpotifyError:
+        return None
+
+
+class _IndexedPlaylist(object):
+
+    __slots__ = ('playlist', 'name', 'tracks', 'live')
+
+    def __init__(self, playlist, name, tracks, live=True):
+        self.playlist = playlist
+        self.name = name
+        self.tracks = tracks
+        # False for playlists read from a snapshot, until they are loaded
+        self.live = live
+
+
+class _ContainerListener(SpotifyContainerManager):
+
+    def __init__(self, index):
+        self.index = index
+
+    def container_loaded(self, container, userdata):
+        self.index._container_loaded(container)
+
+    def playlist_added(self, container, playlist, position, userdata):
+        self.index._add_playlist(playlist)
+        self.index.save_if_due()
+
+    def playlist_removed(self, container, playlist, position, userdata):
+        self.index._remove_playlist(playlist)
+        self.index.save_if_due()
+
+
+class _PlaylistListener(SpotifyPlaylistManager):
+
+    def __init__(self, index):
+        self.index = index
+        # Playlists being updated, whose changes are saved once they are done
+        self.updating = set()
+
+    def _save(self, playlist):
+        if playlist not in self.updating:
+            self.index.save_if_due()
+
+    def tracks_added(self, playlist, tracks, position, userdata):
+        self.index._tracks_added(playlist, tracks, position)
+        self._save(playlist)
+
+    def tracks_removed(self, playlist, tracks, userdata):
+        self.index._tracks_removed(playlist, tracks)
+        self._save(playlist)
+
+    def tracks_moved(self, playlist, tracks, new_position, userdata):
+        self.index._tracks_moved(playlist, tracks, new_position)
+        self._save(playlist)
+
+    def playlist_renamed(self, playlist, userdata):
+        self.index._playlist_renamed(playlist)
+        self._save(playlist)
+
+    def playlist_state_changed(self, playlist, userdata):
+        self.index._playlist_state_changed(playlist)
+
+    def playlist_update_in_progress(self, playlist, done, userdata):
+        if done:
+            self.updating.discard(playlist)
+            self.index.save_if_due()
+        else:
+            self.updating.add(playlist)
+
+
+class LibraryIndex(object):
+    """
+    An index of the playlists of a :class:`spotify.PlaylistContainer` and of
+    their tracks, kept up to date from the container and playlist callbacks.
+
+    Once :meth:`attach` is called, playlists can be looked up by URI or name,
+    and tracks by URI, without going through every playlist of the container.
+    Playlists are indexed once they are loaded. Playlists read from a snapshot
+    are returned as :class:`spotify.Playlist` objects created from their URI,
+    which needs a session.
+
+    The index is updated from the callbacks, so it should only be used from
+    the thread processing the session events.
+
+    With a *snapshot*, the index starts from the library saved in it, so that
+    it can be queried right away, and saves the changes of the library to it.
+    Playlists read from the snapshot are replaced once they are loaded, and
+    the ones that are no longer in the container are dropped once all of its
+    playlists are loaded.
+
+    Changes are saved at most every *save_interval* seconds, so that a burst
+    of changes to a playlist only rewrites it once. See :meth:`save_if_due`.
+
+    :param snapshot:        where the library is saved
+    :type snapshot:         :class:`LibrarySnapshot`
+    :param save_interval:   minimum number of seconds between two saves
+    :type save_interval:    :class:`float`
+    """
+
+    def __init__(self, snapshot=None, save_interval=5, clock=time.time):
+        self.save_interval = save_interval
+        self._clock = clock
+        self.container = None
+        self.container_manager = _ContainerListener(self)
+        self.playlist_manager = _PlaylistListener(self)
+        self.snapshot = snapshot
+        # Playlist URI -> _IndexedPlaylist
+        self._playlists = {}
+        # Playlist name -> set of playlist URIs
+        self._names = {}
+        # Track URI -> {playlist URI: number of occurrences}
+        self._track_playlists = {}
+        # Playlist -> number of occurrences in the container
+        self._occurrences = {}
+        self._container_is_loaded = False
+        # The (type, uri, name, folder_id) items of the container
+        self._items = []
+        # Number of distinct playlists in the container when it was last
+        # loaded, and of live entries
+        self._num_expected = None
+        self._num_live = 0
+        # Playlist URI -> (name, track URIs), or None, to save
+        self._dirty = {}
+        # Whether the container items need saving
+        self._items_dirty = False
+        self._last_save = None
+        if snapshot is not None:
+            self._load_snapshot()
+
+    def attach(self, container):
+        """
+        Index the playlists of *container*, and keep the index up to date
+        with its changes.
+
+        :param container:   a playlist container
+        :type container:    :class:`spotify.PlaylistContainer`
+        """
+        if self.container is not None:
+            self.detach()
+        self.container = container
+        self.container_manager.watch(container)
+        if container.is_loaded():
+            self._container_loaded(container)
+
+    def detach(self):
+        """
+        Stop following the changes of the container, and clear the index.
+        """
+        if self.container is None:
+            return
+        self.save()
+        self.container_manager.unwatch_all(self.container)
+        for entry in self._playlists.values():
+            if entry.live:
+                self.playlist_manager.unwatch_all(entry.playlist)
+        self.container = None
+        self._container_is_loaded = False
+        self._playlists.clear()
+        self._names.clear()
+        self._track_playlists.clear()
+        self._occurrences.clear()
+        self.playlist_manager.updating.clear()
+        self._items = []
+        self._num_expected = None
+        self._num_live = 0
+
+    def __len__(self):
+        return len(self._playlists)
+
+    def __contains__(self, uri):
+        return uri in self._playlists
+
+    def save(self):
+        """
+        Write the changes of the library to the snapshot, if there is one.
+
+        This is done by :meth:`detach`, and as the library changes, see
+        :meth:`save_if_due`.
+        """
+        if self.snapshot is not None:
+            if self._items_dirty:
+                self.snapshot.save_container(self._items)
+            if self._dirty:
+                self.snapshot.save_playlists(self._dirty)
+        self._items_dirty = False
+        self._dirty = {}
+        self._last_save = self._clock()
+
+    def save_if_due(self):
+        """
+        Write the changes of the library to the snapshot, unless the last
+        save was less than *save_interval* seconds ago.
+
+        This is done after each change of the container or of a playlist, or
+        once a playlist is done updating if it is updated in several steps.
+        The changes made during the interval are saved with the first change
+        after it, so call this regularly, e.g. from a timer, for them to be
+        saved without waiting for another change.
+        """
+        if not self._dirty and not self._items_dirty:
+            return
+        if (self._last_save is None or
+                self._clock() - self._last_save >= self.save_interval):
+            self.save()
+
+    def container_items(self):
+        """
+        :rtype:     list of ``(type, uri, name, folder_id)`` tuples
+        :returns:   the playlists and folders of the container, as last seen
+                    with all of its playlists loaded, where ``type`` is
+                    ``'playlist'``, ``'folder_start'`` or ``'folder_end'``
+        """
+        return list(self._items)
+
+    def playlists(self):
+        """
+        :rtype:     list of :class:`spotify.Playlist`
+        :returns:   the indexed playlists
+        """
+        return [self._playlist_of(uri, entry)
+                for uri, entry in self._playlists.items()]
+
+    def track_uris(self, playlist):
+        """
+        :param playlist:    a playlist, or its URI
+        :type playlist:     :class:`spotify.Playlist` or :class:`str`
+        :rtype:             list of :class:`str`
+        :returns:           the URIs of the tracks of the playlist, empty if
+                            it is not indexed
+        """
+        if not isinstance(playlist, basestring):
+            playlist = _playlist_uri(playlist)
+        entry = self._playlists.get(playlist)
+        return list(entry.tracks) if entry is not None else []
+
+    def playlist(self, uri):
+        """
+        :param uri:     URI of a playlist
+        :type uri:      :class:`str`
+        :rtype:         :class:`spotify.Playlist` or :class:`NoneType`
+        :returns:       the playlist with this URI, if it is indexed
+        """
+        entry = self._playlists.get(uri)
+        return self._playlist_of(uri, entry) if entry is not None else None
+
+    def playlists_named(self, name):
+        """
+        :param name:    name of the playlists
+        :type name:     :class:`unicode`
+        :rtype:         list of :class:`spotify.Playlist`
+        :returns:       the indexed playlists with this name
+        """
+        return [self._playlist_of(uri, self._playlists[uri])
+                for uri in self._names.get(name, ())]
+
+    def playlists_containing(self, track):
+        """
+        Find the playlists containing a track. Only the playlists containing
+        it are scanned for its positions.
+
+        :param track:   a track, or its URI
+        :type track:    :class:`spotify.Track` or :class:`str`
+        :rtype:         list of (:class:`spotify.Playlist`, list of
+                        :class:`int`) tuples
+        :returns:       the playlists containing the track, with its positions
+                        in each of them
+        """
+        if not isinstance(track, basestring):
+            track = _track_uri(track)
+        result = []
+        for uri in self._track_playlists.get(track, ()):
+            entry = self._playlists[uri]
+            positions = [i for i, t in enumerate(entry.tracks) if t == track]
+            result.append((self._playlist_of(uri, entry), positions))
+        return result
+
+    def track_count(self, playlist):
+        """
+        :param playlist:    a playlist, or its URI
+        :type playlist:     :class:`spotify.Playlist` or :class:`str`
+        :rtype:             :class:`int`
+        :returns:           the number of tracks of the playlist, or 0 if it
+                            is not indexed
+        """
+        if not isinstance(playlist, basestring):
+            playlist = _playlist_uri(playlist)
+        entry = self._playlists.get(playlist)
+        return len(entry.tracks) if entry is not None else 0
+
+    def _playlist_of(self, uri, entry):
+        if entry.playlist is None:
+            entry.playlist = spotify.Link.from_string(uri).as_playlist()
+        return entry.playlist
+
+    def _load_snapshot(self):
+        self._items, playlists = self.snapshot.load()
+        for uri, (name, tracks) in playlists.items():
+            self._add_entry(uri, _IndexedPlaylist(None, name, tracks, False))
+
+    # Updates, called from the listeners
+
+    def _container_loaded(self, container):
+        # container_loaded is also called after every change to the container,
+        # which the other callbacks take care of
+        if not self._container_is_loaded:
+            self._container_is_loaded = True
+            # Playlists added while the container was loading are seen again
+            self._occurrences.clear()
+            for item in container:
+                if item.type() == 'playlist':
+                    self._add_playlist(item)
+        self._save_items(container)
+        self._reconcile()
+        self.save_if_due()
+
+    def _save_items(self, container):
+        items = []
+        complete = True
+        # A playlist can be listed more than once, but is indexed once
+        playlists = set()
+        for item in container:
+            kind = item.type()
+            if kind == 'playlist':
+                playlists.add(item)
+                uri = _playlist_uri(item)
+                complete = complete and uri is not None
+                items.append((kind, uri, item.name(), None))
+            else:
+                items.append((kind, None, item.name(), item.id()))
+        # Keep the previous structure until all playlists are loaded
+        if complete and items != self._items:
+            self._items = items
+            self._items_dirty = True
+        self._num_expected = len(playlists)
+
+    def _reconcile(self):
+        # Once every playlist of the container is loaded, the remaining
+        # playlists read from the snapshot are no longer in it
+        if (self._num_expected is None or
+                self._num_live < self._num_expected or
+                self._num_live == len(self._playlists)):
+            return
+        for uri, entry in list(self._playlists.items()):
+            if not entry.live:
+                self._unindex(uri)
+
+    def _add_playlist(self, playlist):
+        self._occurrences[playlist] = self._occurrences.get(playlist, 0) + 1
+        uri = _playlist_uri(playlist)
+        entry = self._playlists.get(uri)
+        if entry is not None and entry.live:
+            return
+        # Playlists not loaded yet may be added more than once, make sure they
+        # are only watched once
+        self.playlist_manager.unwatch(playlist)
+        self.playlist_manager.watch(playlist)
+        if uri is not None and playlist.is_loaded():
+            self._index(uri, playlist)
+
+    def _remove_playlist(self, playlist):
+        count = self._occurrences.pop(playlist, 0) - 1
+        if count > 0:
+            # Still in the container at another position
+            self._occurrences[playlist] = count
+            return
+        self.playlist_manager.unwatch(playlist)
+        uri = _playlist_uri(playlist)
+        if uri in self._playlists:
+            self._unindex(uri)
+
+    def _playlist_state_changed(self, playlist):
+        if not playlist.is_loaded():
+            return
+        uri = _playlist_uri(playlist)
+        entry = self._playlists.get(uri)
+        if uri is not None and (entry is None or not entry.live):
+            self._index(uri, playlist)
+            if self._num_live == self._num_expected:
+                self._save_items(self.container)
+            self._reconcile()
+            self.save_if_due()
+
+    def _index(self, uri, playlist):
+        if uri in self._playlists:
+            self._unindex(uri)
+        tracks = playlist.snapshot(['uri'])['uri']
+        self._add_entry(uri, _IndexedPlaylist(playlist, playlist.name(),
+                                              tracks))
+        self._num_live += 1
+        self._changed(uri)
+
+    def _add_entry(self, uri, entry):
+        self._playlists[uri] = entry
+        self._names.setdefault(entry.name, set()).add(uri)
+        for track in entry.tracks:
+            self._count_track(track, uri, 1)
+
+    def _unindex(self, uri):
+        entry = self._playlists.pop(uri)
+        if entry.live:
+            self._num_live -= 1
+        self._unname(entry.name, uri)
+        for track in entry.tracks:
+            self._count_track(track, uri, -1)
+        self._dirty[uri] = None
+
+    def _changed(self, uri):
+        entry = self._playlists[uri]
+        self._dirty[uri] = (entry.name, entry.tracks)
+
+    def _unname(self, name, uri):
+        uris = self._names.get(name)
+        if uris is not None:
+            uris.discard(uri)
+            if not uris:
+                del self._names[name]
+
+    def _count_track(self, track, uri, increment):
+        if track is None:
+            return
+        counts = self._track_playlists.setdefault(track, {})
+        count = counts.get(uri, 0) + increment
+        if count > 0:
+            counts[uri] = count
+        else:
+            counts.pop(uri, None)
+            if not counts:
+                del self._track_playlists[track]
+
+    def _entry(self, playlist):
+        uri = _playlist_uri(playlist)
+        entry = self._playlists.get(uri)
+        if entry is not None and not entry.live:
+            entry = None
+        return uri, entry
+
+    def _tracks_added(self, playlist, tracks, position):
+        uri, entry = self._entry(playlist)
+        if entry is None:
+            return
+        uris = [_track_uri(track) for track in tracks]
+        entry.tracks[position:position] = uris
+        for track in uris:
+            self._count_track(track, uri, 1)
+        self._changed(uri)
+
+    def _tracks_removed(self, playlist, indices):
+        uri, entry = self._entry(playlist)
+        if entry is None:
+            return
+        for index in sorted(indices, reverse=True):
+            self._count_track(entry.tracks.pop(index), uri, -1)
+        self._changed(uri)
+
+    def _tracks_moved(self, playlist, indices, new_position):
+        uri, entry = self._entry(playlist)
+        if entry is None:
+            return
+        indices = sorted(indices)
+        moved = [entry.tracks[i] for i in indices]
+        for index in reversed(indices):
+            del entry.tracks[index]
+        new_position -= len([i for i in indices if i < new_position])
+        entry.tracks[new_position:new_position] = moved
+        self._changed(uri)
+
+    def _playlist_renamed(self, playlist):
+        uri, entry = self._entry(playlist)
+        if entry is None:
+            return
+        self._unname(entry.name, uri)
+        entry.name = playlist.name()
+        self._names.setdefault(entry.name, set()).add(uri)
+        self._changed(uri)
@@ -0,0 +1,114 @@
+import sqlite3
+
+# Folder ids are unsigned 64 bit integers, stored as signed ones by sqlite
+_FOLDER_ID_RANGE = 2 ** 64
+
+
+def _to_signed(folder_id):
+    if folder_id is not None and folder_id >= _FOLDER_ID_RANGE // 2:
+        folder_id -= _FOLDER_ID_RANGE
+    return folder_id
+
+
+def _to_unsigned(folder_id):
+    if folder_id is not None and folder_id < 0:
+        folder_id += _FOLDER_ID_RANGE
+    return folder_id
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS items (
+    position INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    uri TEXT,
+    name TEXT,
+    folder_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    uri TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    playlist TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    uri TEXT,
+    PRIMARY KEY (playlist, position)
+);
+'''
+
+
+class LibrarySnapshot(object):
+    """
+    A copy of the structure of a playlist container and of the tracks of its
+    playlists, kept in an *sqlite* database at *path*.
+
+    It is written by a :class:`LibraryIndex` as the library changes, and read
+    back by the next one, so that the library can be queried before
+    *libspotify* has loaded it again.
+
+    The database connection is not thread safe, and is only used from the
+    thread processing the session events once the snapshot is given to a
+    :class:`LibraryIndex`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def load(self):
+        """
+        Read the snapshot.
+
+        :returns:   the container items, a list of ``(type, uri, name,
+                    folder_id)`` tuples, and a dict of the playlists, mapping
+                    their URI to a ``(name, track_uris)`` tuple
+        """
+        items = [(kind, uri, name, _to_unsigned(folder_id))
+                 for kind, uri, name, folder_id in self._db.execute(
+                     'SELECT type, uri, name, folder_id FROM items '
+                     'ORDER BY position')]
+        playlists = {}
+        for uri, name in self._db.execute('SELECT uri, name FROM playlists'):
+            playlists[uri] = (name, [])
+        for playlist, uri in self._db.execute(
+                'SELECT playlist, uri FROM tracks ORDER BY playlist, position'):
+            if playlist in playlists:
+                playlists[playlist][1].append(uri)
+        return items, playlists
+
+    def save_container(self, items):
+        """
+        Replace the container items with *items*, a list of ``(type, uri,
+        name, folder_id)`` tuples.
+        """
+        with self._db:
+            self._db.execute('DELETE FROM items')
+            self._db.executemany(
+                'INSERT INTO items VALUES (?, ?, ?, ?, ?)',
+                [(i, kind, uri, name, _to_signed(folder_id))
+                 for i, (kind, uri, name, folder_id) in enumerate(items)])
+
+    def save_playlists(self, playlists):
+        """
+        Replace the playlists of *playlists*, a dict mapping their URI to a
+        ``(name, track_uris)`` tuple, or to ``None`` to remove them, in a
+        single transaction.
+        """
+        with self._db:
+            for uri, playlist in playlists.items():
+                self._db.execute('DELETE FROM tracks WHERE playlist = ?',
+                                 (uri,))
+                if playlist is None:
+                    self._db.execute('DELETE FROM playlists WHERE uri = ?',
+                                     (uri,))
+                    continue
+                name, tracks = playlist
+                self._db.execute(
+                    'INSERT OR REPLACE INTO playlists VALUES (?, ?)',
+                    (uri, name))
+                self._db.executemany(
+                    'INSERT INTO tracks VALUES (?, ?, ?)',
+                    [(uri, i, track) for i, track in enumerate(tracks)])
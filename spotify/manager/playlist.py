@@ -7,38 +7,79 @@ class SpotifyPlaylistManager:
     standard error output (stderr).
     """
 
+    #: Names of the playlist events, which are also the names of the methods
+    #: handling them.
+    EVENTS = (
+        'tracks_added', 'tracks_removed', 'tracks_moved', 'playlist_renamed',
+        'playlist_state_changed', 'playlist_update_in_progress',
+        'playlist_metadata_updated', 'track_created_changed',
+        'track_message_changed', 'track_seen_changed', 'description_changed',
+        'image_changed', 'subscribers_changed',
+    )
+
+    #: Whether the track events of a playlist are batched while it is being
+    #: updated. If true, the :meth:`tracks_added`, :meth:`tracks_removed` and
+    #: :meth:`tracks_moved` events occurring between the
+    #: :meth:`playlist_update_in_progress` events bracketing an update are
+    #: delivered as a single :meth:`tracks_changed` event once it is done.
+    batch_updates = False
+
     def __init__(self):
         pass
 
-    def watch(self, playlist, userdata=None):
+    def watch(self, playlist, userdata=None, events=None):
         """
         Listen to modifications events on a playlist.
+
+        A single set of callbacks is added to the playlist for this manager
+        and *userdata*, dispatching only the given *events*, by default the
+        ones whose handler is overridden in this manager.
+
+        :param events:      names of the events to listen to
+        :type events:       iterable of :class:`str`
         """
-        playlist.add_tracks_added_callback(self.tracks_added, userdata)
-        playlist.add_tracks_moved_callback(self.tracks_moved, userdata)
-        playlist.add_tracks_removed_callback(self.tracks_removed, userdata)
-        playlist.add_playlist_renamed_callback(self.playlist_renamed, userdata)
-        playlist.add_playlist_state_changed_callback(self.playlist_state_changed, userdata)
-        playlist.add_playlist_update_in_progress_callback(self.playlist_update_in_progress, userdata)
-        playlist.add_playlist_metadata_updated_callback(self.playlist_metadata_updated, userdata)
-        playlist.add_track_created_changed_callback(self.track_created_changed, userdata)
-        playlist.add_track_message_changed_callback(self.track_message_changed, userdata)
-        playlist.add_track_seen_changed_callback(self.track_seen_changed, userdata)
-        playlist.add_description_changed_callback(self.description_changed, userdata)
-        playlist.add_subscribers_changed_callback(self.subscribers_changed, userdata)
-        playlist.add_image_changed_callback(self.image_changed, userdata)
+        if events is None:
+            events = self.overridden_events()
+        handlers = {}
+        for name in events:
+            if name not in self.EVENTS:
+                raise ValueError('Unknown playlist event: %s' % name)
+            handlers[name] = getattr(self, name)
+        if self.batch_updates:
+            batch = _UpdateBatch(self)
+            for name in _UpdateBatch.EVENTS:
+                handlers[name] = getattr(batch, name)
+        playlist.add_callbacks(self, handlers, userdata)
 
     def unwatch(self, playlist, userdata=None):
         """
         Stop listening to events on the playlist.
         """
         try:
-            playlist.remove_callback(self.tracks_added, userdata)
-            playlist.remove_callback(self.tracks_moved, userdata)
-            playlist.remove_callback(self.tracks_removed, userdata)
+            playlist.remove_callback(self, userdata)
         except:
             pass
 
+    def overridden_events(self):
+        """
+        Return the names of the events whose handler is overridden in this
+        manager.
+        """
+        return [name for name in self.EVENTS
+                if _function(getattr(self, name)) is not
+                _function(getattr(SpotifyPlaylistManager, name))]
+
+    def unwatch_all(self, playlist):
+        """
+        Stop listening to events on the playlist, whatever the userdata they
+        were watched with.
+
+        Callbacks added to the playlist by other managers are kept.
+
+        :return: number of callbacks removed
+        """
+        return playlist.remove_all_callbacks(owner=self)
+
 ### Callbacks
 
     def tracks_added(self, playlist, tracks, position, userdata):
@@ -131,6 +172,20 @@ class SpotifyPlaylistManager:
         """
         pass
 
+    def tracks_changed(self, playlist, delta, userdata):
+        """
+        Callback
+
+        Called once a playlist is done updating, with the changes made to its
+        tracks during the update, if :attr:`batch_updates` is true.
+
+        :param playlist:    playlist on which the event occured
+        :type playlist:     :class:`spotify.Playlist`
+        :param delta:       changes made to the tracks of the playlist
+        :type delta:        :class:`PlaylistDelta`
+        """
+        pass
+
     def playlist_metadata_updated(self, playlist, userdata):
         """
         Callback
@@ -226,3 +281,109 @@ class SpotifyPlaylistManager:
         :type image:        :class:`str`
         """
         pass
+
+
+class PlaylistDelta(object):
+    """
+    The changes made to the tracks of a playlist during an update, in the
+    order they were made.
+
+    Each change is a tuple, one of:
+
+    - ``('added', position, tracks)``
+    - ``('removed', indices)``
+    - ``('moved', indices, new_position)``
+
+    Additions of adjacent tracks in a row are merged into a single one, as are
+    removals in a row, the indices of which are then relative to the playlist
+    before the first removal.
+    """
+
+    def __init__(self):
+        self.changes = []
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __repr__(self):
+        return 'PlaylistDelta(%r)' % self.changes
+
+    def add(self, position, tracks):
+        if self.changes and self.changes[-1][0] == 'added':
+            _, start, added = self.changes[-1]
+            if start <= position <= start + len(added):
+                added[position - start:position - start] = tracks
+                return
+        self.changes.append(('added', position, list(tracks)))
+
+    def remove(self, indices):
+        if self.changes and self.changes[-1][0] == 'removed':
+            removed = self.changes[-1][1]
+            original = []
+            for index in indices:
+                for previous in removed:
+                    if previous > index:
+                        break
+                    index += 1
+                original.append(index)
+            removed.extend(original)
+            removed.sort()
+            return
+        self.changes.append(('removed', sorted(indices)))
+
+    def move(self, indices, new_position):
+        self.changes.append(('moved', list(indices), new_position))
+
+
+class _UpdateBatch(object):
+    """
+    Collects the track events of a watched playlist into a
+    :class:`PlaylistDelta` while it is being updated.
+    """
+
+    EVENTS = ('tracks_added', 'tracks_removed', 'tracks_moved',
+              'playlist_update_in_progress')
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.depth = 0
+        self.delta = None
+
+    def playlist_update_in_progress(self, playlist, done, userdata):
+        if not done:
+            self.depth += 1
+            if self.delta is None:
+                self.delta = PlaylistDelta()
+        elif self.depth > 0:
+            self.depth -= 1
+            if self.depth == 0:
+                delta, self.delta = self.delta, None
+                if delta:
+                    self.manager.tracks_changed(playlist, delta, userdata)
+        self.manager.playlist_update_in_progress(playlist, done, userdata)
+
+    def tracks_added(self, playlist, tracks, position, userdata):
+        if self.delta is None:
+            self.manager.tracks_added(playlist, tracks, position, userdata)
+        else:
+            self.delta.add(position, tracks)
+
+    def tracks_removed(self, playlist, tracks, userdata):
+        if self.delta is None:
+            self.manager.tracks_removed(playlist, tracks, userdata)
+        else:
+            self.delta.remove(tracks)
+
+    def tracks_moved(self, playlist, tracks, new_position, userdata):
+        if self.delta is None:
+            self.manager.tracks_moved(playlist, tracks, new_position,
+                                      userdata)
+        else:
+            self.delta.move(tracks, new_position)
+
+
+def _function(method):
+    return getattr(method, '__func__', method)
@@ -0,0 +1,358 @@
+import itertools
+import logging
+import multiprocessing
+import threading
+
+import spotify
+from spotify import futures
+from spotify.manager.session import SpotifySessionManager
+
+logger = logging.getLogger('pyspotify.manager.pool')
+
+def _uri(obj):
+    """
+    Returns the Spotify URI of a track, album, artist or playlist.
+    """
+    if isinstance(obj, spotify.Track):
+        return str(spotify.Link.from_track(obj, 0))
+    elif isinstance(obj, spotify.Album):
+        return str(spotify.Link.from_album(obj))
+    elif isinstance(obj, spotify.Artist):
+        return str(spotify.Link.from_artist(obj))
+    elif isinstance(obj, spotify.Playlist):
+        return str(spotify.Link.from_playlist(obj))
+    raise TypeError('Cannot serialise %r' % obj)
+
+def _uris(objs):
+    return [_uri(obj) for obj in objs]
+
+
+# Operations run by the workers. Each is called from the manager loop as
+# operation(manager, reply, *args) and must eventually call reply(result),
+# where result is picklable.
+
+def _reply_when_done(future, reply, convert):
+    def done(future):
+        try:
+            reply(convert(future.result()))
+        except Exception as e:
+            reply.error(e)
+    future.add_done_callback(done)
+
+def _search(manager, reply, query, kwargs):
+    def convert(results):
+        return {
+            'tracks': _uris(results.tracks()),
+            'albums': _uris(results.albums()),
+            'artists': _uris(results.artists()),
+            'playlists': results.playlists(),
+            'total_tracks': results.total_tracks(),
+            'total_albums': results.total_albums(),
+            'total_artists': results.total_artists(),
+            'total_playlists': results.total_playlists(),
+        }
+    _reply_when_done(
+        futures.search(manager.session, query, **kwargs), reply, convert)
+
+def _browse_album(manager, reply, uri):
+    album = spotify.Link.from_string(uri).as_album()
+    _reply_when_done(futures.browse_album(album), reply, _uris)
+
+def _browse_artist(manager, reply, uri):
+    def convert(browser):
+        return {
+            'albums': _uris(browser.albums()),
+            'tracks': _uris(browser.tracks()),
+            'similar_artists': _uris(browser.similar_artists()),
+        }
+    artist = spotify.Link.from_string(uri).as_artist()
+    _reply_when_done(futures.browse_artist(artist), reply, convert)
+
+def _when_playlist_loaded(manager, reply, uri, function):
+    playlist = spotify.Link.from_string(uri).as_playlist()
+
+    def call():
+        try:
+            reply(function(playlist))
+        except Exception as e:
+            reply.error(e)
+
+    if playlist.is_loaded():
+        call()
+        return
+
+    # The state may change again before the callback is removed
+    done = []
+
+    def state_changed(playlist, userdata):
+        if playlist.is_loaded() and not done:
+            done.append(True)
+            # Can't remove the callback while it is running
+            manager.run_in_loop(playlist.remove_callback, state_changed)
+            call()
+    playlist.add_playlist_state_changed_callback(state_changed)
+
+def _playlist_tracks(manager, reply, uri):
+    _when_playlist_loaded(manager, reply, uri, _uris)
+
+def _add_tracks(manager, reply, uri, track_uris, position):
+    tracks = [spotify.Link.from_string(t).as_track() for t in track_uris]
+
+    def add(playlist):
+        if position is None:
+            playlist.add_tracks(len(playlist), tracks)
+        else:
+            playlist.add_tracks(position, tracks)
+    _when_playlist_loaded(manager, reply, uri, add)
+
+def _call(manager, reply, function, args):
+    reply(function(manager, *args))
+
+_OPERATIONS = {
+    'search': _search,
+    'browse_album': _browse_album,
+    'browse_artist': _browse_artist,
+    'playlist_tracks': _playlist_tracks,
+    'add_tracks': _add_tracks,
+    'call': _call,
+}
+
+
+class _Reply(object):
+    """
+    Sends the result of one request from a worker back to the pool.
+    """
+
+    def __init__(self, results, index, request_id):
+        self._results = results
+        self._index = index
+        self._request_id = request_id
+
+    def __call__(self, result):
+        self._results.put((self._index, self._request_id, True, result))
+
+    def error(self, exception):
+        self._results.put(
+            (self._index, self._request_id, False, str(exception)))
+
+def _run_operation(manager, reply, name, args):
+    try:
+        _OPERATIONS[name](manager, reply, *args)
+    except Exception as e:
+        reply.error(e)
+
+def _worker_main(index, manager_class, args, kwargs, requests, results):
+    """
+    Entry point of a worker process: logs in and serves requests until the
+    pool sends ``None``.
+    """
+    logged_in = threading.Event()
+    login_error = []
+
+    class WorkerManager(manager_class):
+        def logged_in(self, session, error):
+            manager_class.logged_in(self, session, error)
+            if error is not None:
+                login_error.append(error)
+            results.put((index, None, error is None, error))
+            logged_in.set()
+
+    manager = WorkerManager(*args, **kwargs)
+
+    def dispatch():
+        logged_in.wait()
+        while True:
+            request = requests.get()
+            if request is None:
+                manager.disconnect()
+                return
+            request_id, name, request_args = request
+            reply = _Reply(results, index, request_id)
+            if login_error:
+                reply.error(login_error[0])
+            else:
+                manager.run_in_loop(
+                    _run_operation, manager, reply, name, request_args)
+
+    dispatcher = threading.Thread(target=dispatch)
+    dispatcher.daemon = True
+    dispatcher.start()
+    manager.connect()
+
+
+class _Worker(object):
+
+    def __init__(self, index, username, process, requests):
+        self.index = index
+        self.username = username
+        self.process = process
+        self.requests = requests
+        # Requests sent to the worker and not answered yet
+        self.load = 0
+
+
+class SessionPool(object):
+    """
+    A pool of worker processes, each logged in to Spotify with its own
+    account through a ``manager_class`` instance, which defaults to
+    :class:`SpotifySessionManager`. This works around *libspotify* allowing
+    only one session per process.
+
+    :param accounts: ``(username, password)`` pairs, one per worker
+    :param manager_class: the session manager class to run in the workers.
+        It must not override :meth:`~SpotifySessionManager.loop`.
+
+    Additional keyword arguments are passed to ``manager_class``.
+
+    Requests are sent to the worker given by the ``worker`` argument, either
+    its index in ``accounts`` or its username, or by default to the worker
+    with the fewest outstanding requests. They return a
+    :class:`spotify.futures.Future`, whose result uses Spotify URIs in place
+    of tracks, albums, artists and playlists.
+    """
+
+    def __init__(self, accounts, manager_class=SpotifySessionManager,
+                 **kwargs):
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._pending = {}
+        self._results = multiprocessing.Queue()
+        self._workers = []
+        for index, (username, password) in enumerate(accounts):
+            requests = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_worker_main,
+                args=(index, manager_class, (username, password), kwargs,
+                      requests, self._results),
+                name='pyspotify worker %d' % index)
+            process.daemon = True
+            process.start()
+            self._workers.append(
+                _Worker(index, username, process, requests))
+        self._reader = threading.Thread(target=self._read_results)
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read_results(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            index, request_id, ok, value = message
+            if request_id is None:
+                if ok:
+                    logger.debug('Worker %d logged in', index)
+                else:
+                    logger.error('Worker %d failed to log in: %s', index, value)
+                continue
+            with self._lock:
+                # Missing once close() gave up waiting for the workers
+                pending = self._pending.pop(request_id, None)
+                if pending is not None:
+                    pending[1].load -= 1
+            if pending is None or pending[0].done():
+                continue
+            future = pending[0]
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(spotify.SpotifyError(value))
+
+    def _choose_worker(self, worker):
+        if worker is None:
+            return min(self._workers, key=lambda w: w.load)
+        for w in self._workers:
+            if worker == w.index or worker == w.username:
+                return w
+        raise ValueError('No such worker: %r' % (worker,))
+
+    def submit(self, name, args, worker=None):
+        """
+        Send the operation ``name`` with the arguments ``args`` to a worker.
+        """
+        future = futures.Future()
+        with self._lock:
+            chosen = self._choose_worker(worker)
+            request_id = self._request_ids.next()
+            self._pending[request_id] = (future, chosen)
+            chosen.load += 1
+        chosen.requests.put((request_id, name, args))
+        return future
+
+    def loads(self):
+        """
+        :return: the number of outstanding requests of each worker
+        :rtype: :class:`list`
+        """
+        with self._lock:
+            return [w.load for w in self._workers]
+
+    def search(self, query, worker=None, **kwargs):
+        """
+        Search Spotify, see :meth:`spotify.Session.search` for the keyword
+        arguments.
+
+        :return: a future for a :class:`dict` with the ``tracks``, ``albums``
+            and ``artists`` URIs found, the ``playlists`` as returned by
+            :meth:`spotify.Results.playlists`, and their ``total_tracks``,
+            ``total_albums``, ``total_artists`` and ``total_playlists``.
+        """
+        return self.submit('search', (query, kwargs), worker)
+
+    def browse_album(self, uri, worker=None):
+        """
+        :return: a future for the URIs of the album's tracks
+        """
+        return self.submit('browse_album', (uri,), worker)
+
+    def browse_artist(self, uri, worker=None):
+        """
+        :return: a future for a :class:`dict` with the ``albums``, ``tracks``
+            and ``similar_artists`` URIs of the artist
+        """
+        return self.submit('browse_artist', (uri,), worker)
+
+    def playlist_tracks(self, uri, worker=None):
+        """
+        :return: a future for the URIs of the playlist's tracks, once it is
+            loaded
+        """
+        return self.submit('playlist_tracks', (uri,), worker)
+
+    def add_tracks(self, uri, track_uris, position=None, worker=None):
+        """
+        Add the tracks ``track_uris`` to the playlist ``uri`` at
+        ``position``, or at the end by default.
+
+        :return: a future which is done when the tracks have been added
+        """
+        return self.submit('add_tracks', (uri, track_uris, position), worker)
+
+    def call(self, function, *args, **kwargs):
+        """
+        Call ``function(manager, *args)`` in a worker, from its manager loop.
+        ``function`` and ``args`` must be picklable, which usually means that
+        ``function`` is defined at module level.
+
+        :param worker: the worker to use, as a keyword argument
+        :return: a future for the value returned by ``function``, which must
+            be picklable too
+        """
+        return self.submit('call', (function, args), kwargs.get('worker'))
+
+    def close(self, timeout=None):
+        """
+        Log out all workers and wait up to ``timeout`` seconds for each of
+        them to exit. Requests still outstanding fail with
+        :exc:`spotify.SpotifyError`.
+        """
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout)
+        self._results.put(None)
+        self._reader.join(timeout)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, worker in pending.values():
+            future.set_exception(spotify.SpotifyError('Session pool closed'))
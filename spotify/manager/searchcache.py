@@ -0,0 +1,88 @@
+import collections
+import time
+
+# Defaults of the paging arguments of spotify.Session.search
+SEARCH_DEFAULTS = {
+    'track_offset': 0,
+    'track_count': 32,
+    'album_offset': 0,
+    'album_count': 32,
+    'artist_offset': 0,
+    'artist_count': 32,
+    'playlist_offset': 0,
+    'playlist_count': 32,
+    'search_type': 'standard',
+}
+
+# Count argument of each type of result a search can be projected on
+SEARCH_COUNTS = {
+    'tracks': 'track_count',
+    'albums': 'album_count',
+    'artists': 'artist_count',
+    'playlists': 'playlist_count',
+}
+
+class SearchCache(object):
+    """
+    A cache of completed :class:`spotify.Results`, holding at most ``size``
+    entries for at most ``ttl`` seconds each. When full, the least recently
+    used entry is evicted.
+
+    Keeping a :class:`spotify.Results` keeps its underlying search alive, so
+    the cache is cheap compared to searching again.
+    """
+
+    def __init__(self, size=128, ttl=300, clock=time.time):
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def key(query, **kwargs):
+        """
+        Return the cache key of a search for ``query`` with the keyword
+        arguments of :meth:`spotify.Session.search`. Case and whitespace
+        differences in ``query`` are ignored, and ``types`` is replaced by
+        the counts it implies.
+        """
+        if isinstance(query, str):
+            query = query.decode('utf-8')
+        params = dict(SEARCH_DEFAULTS)
+        types = kwargs.pop('types', None)
+        params.update(kwargs)
+        if types is not None:
+            if isinstance(types, basestring):
+                types = (types,)
+            for type, count in SEARCH_COUNTS.items():
+                if type not in types:
+                    params[count] = 0
+        return (u' '.join(query.lower().split()),) + tuple(sorted(params.items()))
+
+    def get(self, key):
+        """
+        :return: the results cached for ``key``, or :class:`None`
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        expires, results = entry
+        if expires <= self._clock():
+            return None
+        self._entries[key] = entry
+        return results
+
+    def put(self, key, results):
+        """
+        Cache ``results`` for ``key``.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (self._clock() + self.ttl, results)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
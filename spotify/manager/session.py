@@ -1,11 +1,82 @@
 import logging
 import Queue
+import threading
+import time
 
 import spotify
 from spotify import Settings
+from spotify.manager import stats
+from spotify.manager.searchcache import SearchCache
 
 logger = logging.getLogger('pyspotify.manager.session')
 
+# Wakeup message shared by all notifications, see notify_main_thread
+_PROCESS_EVENTS = {'command': 'process_events'}
+# Wakeup message for a pending music delivery, see music_delivery
+_MUSIC_DELIVERY = {'command': 'music_delivery'}
+
+class _DeliverySlot(object):
+    """
+    Hands music deliveries from the libspotify thread to the thread calling
+    :meth:`SpotifySessionManager.music_delivery_safe`, one at a time, and the
+    number of consumed frames back. The slot is reused for every delivery.
+    """
+
+    IDLE, PENDING, BUSY, DONE = range(4)
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.state = self.IDLE
+        self._args = None
+        self._result = 0
+
+    def offer(self, args, timeout, wake):
+        """
+        Offer a delivery and wait for its result. ``wake`` is called to tell
+        the consumer about it. If the consumer hasn't taken the delivery after
+        ``timeout`` seconds, it is withdrawn and 0 is returned, which makes
+        libspotify deliver the same frames again later.
+        """
+        with self._condition:
+            if self.state != self.IDLE:
+                return 0
+            self._args = args
+            self.state = self.PENDING
+            wake()
+            deadline = time.time() + timeout
+            while self.state == self.PENDING:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._args = None
+                    self.state = self.IDLE
+                    return 0
+                self._condition.wait(remaining)
+            # The frames buffer is only valid during this call, so once the
+            # consumer has taken it we must wait for it to be done.
+            while self.state == self.BUSY:
+                self._condition.wait()
+            result = self._result
+            self._args = None
+            self.state = self.IDLE
+            return result
+
+    def take(self):
+        """
+        Take the pending delivery, if any, and return its arguments. The
+        consumer must call :meth:`reply` afterwards.
+        """
+        with self._condition:
+            if self.state != self.PENDING:
+                return None
+            self.state = self.BUSY
+            return self._args
+
+    def reply(self, num_frames):
+        with self._condition:
+            self._result = num_frames
+            self.state = self.DONE
+            self._condition.notify_all()
+
 class SpotifySessionManager(object):
     """
     Client for Spotify. Inherit from this class to have your callbacks
@@ -37,11 +108,26 @@ class SpotifySessionManager(object):
     application_key = None
     appkey_file = 'spotify_appkey.key'
     user_agent = 'pyspotify-example'
+    music_delivery_timeout = 0.1
+    search_cache_size = 0
+    search_cache_ttl = 300
 
     def __init__(self, username=None, password=None, remember_me=False,
                  login_blob='', proxy=None, proxy_username=None,
                  proxy_password=None):
         self._cmdqueue = Queue.Queue()
+        # Whether a process_events message is already queued
+        self._wakeup_pending = False
+        self._delivery = _DeliverySlot()
+        self._wakeup_time = 0.0
+        self._stats = stats.SessionManagerStats()
+        self._stats_reporter = None
+        self.search_cache = None
+        if self.search_cache_size > 0:
+            self.search_cache = SearchCache(
+                self.search_cache_size, self.search_cache_ttl)
+        for name in stats.TIMED_CALLBACKS:
+            setattr(self, name, self._stats.timed(name, getattr(self, name)))
 
         # Session settings
         self.settings = Settings()
@@ -92,33 +178,167 @@ class SpotifySessionManager(object):
         while running:
             try:
                 message = self._cmdqueue.get(timeout=timeout)
-                if message.get('command') == 'music_delivery':
-                    num_frames = self.music_delivery_safe(
-                        session, *message['args'])
-                    message['reply_to'].put(num_frames)
-                elif message.get('command') == 'process_events':
-                    logger.debug('Got message; processing events')
-                    timeout = session.process_events() / 1000.0
-                    logger.debug('Will wait %.3fs for next message', timeout)
-                elif message.get('command') == 'disconnect':
-                    logger.debug('Got message; disconnecting')
-                    session.logout()
-                elif message.get('command') == 'stop':
-                    logger.debug('Got message; stopping main loop')
-                    running = False
-                else:
-                    raise ValueError('Unknown message type')
             except Queue.Empty:
-                logger.debug(
-                    'No message received before timeout. Processing events')
-                timeout = session.process_events() / 1000.0
-                logger.debug('Will wait %.3fs for next message', timeout)
+                message = None
+            # Audio is always served before anything else in the queue
+            self._serve_music_delivery(session)
+            if message is None:
+                timeout = self._timed_process_events(session)
+            elif message is _MUSIC_DELIVERY:
+                pass
+            elif message is _PROCESS_EVENTS:
+                # Clear first, so notifications arriving while we are
+                # processing events queue another wakeup.
+                self._wakeup_pending = False
+                queued_at = self._wakeup_time
+                timeout = self._timed_process_events(session)
+                self._stats.add_latency(
+                    'process_events', time.time() - queued_at)
+            elif message.get('command') == 'call':
+                try:
+                    message['function'](*message['args'])
+                except Exception:
+                    logger.exception('Error in %r called from the loop',
+                                     message['function'])
+                self._stats.add_latency(
+                    'call', time.time() - message['queued_at'])
+            elif message.get('command') == 'disconnect':
+                logger.debug('Got message; disconnecting')
+                session.logout()
+                self._stats.add_latency(
+                    'disconnect', time.time() - message['queued_at'])
+            elif message.get('command') == 'stop':
+                logger.debug('Got message; stopping main loop')
+                running = False
+                self._stats.add_latency(
+                    'stop', time.time() - message['queued_at'])
+            else:
+                raise ValueError('Unknown message type')
+
+    def _timed_process_events(self, session):
+        start = time.time()
+        timeout = session.process_events() / 1000.0
+        self._stats.add_process_events(time.time() - start)
+        return timeout
+
+    def _serve_music_delivery(self, session):
+        args = self._delivery.take()
+        if args is None:
+            return
+        num_frames = 0
+        try:
+            num_frames = self.music_delivery_safe(session, *args)
+        finally:
+            self._delivery.reply(num_frames)
+
+    def _wake_for_music_delivery(self):
+        self._cmdqueue.put(_MUSIC_DELIVERY)
 
     def disconnect(self):
         """
         Terminate the current Spotify session.
         """
-        self._cmdqueue.put({'command': 'disconnect'})
+        self._cmdqueue.put({'command': 'disconnect', 'queued_at': time.time()})
+
+    def run_in_loop(self, function, *args):
+        """
+        Call ``function(*args)`` from the manager loop, where it is safe to
+        use the Spotify API. This method itself is safe to call from any
+        thread. Exceptions raised by ``function`` are logged.
+        """
+        self._cmdqueue.put({'command': 'call', 'function': function,
+                            'args': args, 'queued_at': time.time()})
+
+    def search(self, query, callback, userdata=None, **kwargs):
+        """
+        Search Spotify like :meth:`session.search() <spotify.Session.search>`,
+        through the manager's search cache.
+
+        The cache is enabled by setting :attr:`search_cache_size` to the
+        maximum number of results to keep, each for at most
+        :attr:`search_cache_ttl` seconds. On a hit, ``callback`` is called
+        from the manager loop with the cached results, without searching
+        again. Queries differing only in case and whitespace share their
+        results. Exceptions raised by ``callback`` are logged.
+
+        :return: the search results
+        :rtype: :class:`spotify.Results`
+        """
+        if self.search_cache is None:
+            return self.session.search(
+                query, callback, userdata=userdata, **kwargs)
+
+        key = SearchCache.key(query, **kwargs)
+        results = self.search_cache.get(key)
+        if results is not None:
+            self.run_in_loop(self._cached_search_complete, callback, results,
+                             userdata)
+            return results
+
+        def search_complete(results, userdata):
+            if results.error() == 0:
+                self.search_cache.put(key, results)
+            callback(results, userdata)
+        return self.session.search(
+            query, search_complete, userdata=userdata, **kwargs)
+
+    def _cached_search_complete(self, callback, results, userdata):
+        try:
+            callback(results, userdata)
+        except Exception:
+            logger.exception('Error in search callback %r', callback)
+
+    def stats(self):
+        """
+        Return a snapshot of the manager's counters, as a :class:`dict` with
+        the keys:
+
+        - ``queue_depth``: number of messages waiting for the loop.
+        - ``commands``: for each command served by the loop
+          (``process_events``, ``music_delivery``, ``call``, ``disconnect``,
+          ``stop``),
+          a :class:`dict` with its ``count`` and ``latency_histogram``, the
+          time from the command being queued until it was served. The
+          histogram is a list of ``(upper bound in seconds, count)`` pairs,
+          the last bound being :class:`None`.
+        - ``process_events_calls``, ``process_events_time`` and
+          ``process_events_max_time``: calls to
+          :meth:`session.process_events() <spotify.Session.process_events>`
+          and the total and longest time spent in them, in seconds.
+        - ``callbacks``: for each callback, a :class:`dict` with its number
+          of ``calls`` and total ``time``. ``callback_time`` is the total
+          over all callbacks.
+        - ``music_deliveries``, ``partial_music_deliveries`` and
+          ``music_delivery_frames``: deliveries handled by
+          :meth:`music_delivery`, how many of them were not fully consumed,
+          and the number of frames consumed.
+        - ``music_delivery_fps``: frames consumed per second over the last
+          second or so of playback.
+
+        The counters are always on and cheap to maintain.
+        """
+        snapshot = self._stats.snapshot()
+        snapshot['queue_depth'] = self._cmdqueue.qsize()
+        return snapshot
+
+    def start_stats_reporter(self, interval=60, report=None):
+        """
+        Start a daemon thread calling ``report(self.stats())`` every
+        ``interval`` seconds. By default the stats are logged to the
+        ``pyspotify.manager.stats`` logger at ``INFO`` level.
+        """
+        self.stop_stats_reporter()
+        self._stats_reporter = stats.StatsReporter(
+            self, interval, report or stats.log_stats)
+        self._stats_reporter.start()
+
+    def stop_stats_reporter(self):
+        """
+        Stop the thread started by :meth:`start_stats_reporter`.
+        """
+        if self._stats_reporter is not None:
+            self._stats_reporter.stop()
+            self._stats_reporter = None
 
     def logged_in(self, session, error):
         """
@@ -148,7 +368,7 @@ class SpotifySessionManager(object):
         :param session: the current session.
         :type session: :class:`spotify.Session`
         """
-        self._cmdqueue.put({'command': 'stop'})
+        self._cmdqueue.put({'command': 'stop', 'queued_at': time.time()})
         self.logged_out(session)
 
     def logged_out(self, session):
@@ -212,6 +432,10 @@ class SpotifySessionManager(object):
         your own loop for handling Spotify events, you'll need to override this
         method.
 
+        Notifications received while a wakeup is already queued are
+        coalesced into it, as one call to ``process_events()`` handles all
+        pending events.
+
         .. warning::
             This method is called from an internal thread in libspotify. You
             should make sure *not* to use the Spotify API from within it, as
@@ -220,7 +444,10 @@ class SpotifySessionManager(object):
         :param session: the current session.
         :type session: :class:`spotify.Session`
         """
-        self._cmdqueue.put({'command': 'process_events'})
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._wakeup_time = time.time()
+            self._cmdqueue.put(_PROCESS_EVENTS)
 
     def music_delivery(self, session, frames, frame_size, num_frames,
             sample_type, sample_rate, channels):
@@ -231,6 +458,11 @@ class SpotifySessionManager(object):
 
         You should override this method *or* :meth:`music_delivery_safe`, not both.
 
+        The default implementation hands the data to the manager loop, which
+        serves it before any other pending message. If the loop hasn't picked
+        it up within :attr:`music_delivery_timeout` seconds, 0 is returned and
+        libspotify will deliver the same data again later.
+
         .. warning::
             This method is called from an internal thread in libspotify. You
             should make sure *not* to use the Spotify API from within it, as
@@ -254,17 +486,14 @@ class SpotifySessionManager(object):
         :return: number of frames consumed
         :rtype: :class:`int`
         """
-        try:
-            future = Queue.Queue()
-            self._cmdqueue.put({
-                'command': 'music_delivery',
-                'args': (frames, frame_size, num_frames, sample_type, sample_rate,
-                    channels),
-                'reply_to': future,
-            }, block=False)
-            return future.get()
-        except Queue.Full:
-            return 0
+        start = time.time()
+        consumed = self._delivery.offer(
+            (frames, frame_size, num_frames, sample_type, sample_rate,
+                channels),
+            self.music_delivery_timeout, self._wake_for_music_delivery)
+        self._stats.add_latency('music_delivery', time.time() - start)
+        self._stats.add_music_delivery(num_frames, consumed)
+        return consumed
 
     def music_delivery_safe(self, session, frames, frame_size, num_frames,
             sample_type, sample_rate, channels):
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger('pyspotify.manager.stats')
+
+# Upper bounds, in seconds, of the latency histogram buckets. The last bucket
+# counts everything slower.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Seconds over which the music delivery rate is measured
+FPS_WINDOW = 1.0
+
+# Callbacks whose time is accounted as time spent in user code
+TIMED_CALLBACKS = (
+    'logged_in',
+    'logged_out',
+    'metadata_updated',
+    'connection_error',
+    'message_to_user',
+    'music_delivery_safe',
+    'play_token_lost',
+    'log_message',
+    'end_of_track',
+    'credentials_blob_updated',
+)
+
+class SessionManagerStats(object):
+    """
+    Counters updated by :class:`SpotifySessionManager` while it runs. They
+    are updated from both the manager loop and libspotify's threads, so all
+    updates happen under a lock.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._callbacks = {}
+        self.process_events_calls = 0
+        self.process_events_time = 0.0
+        self.process_events_max_time = 0.0
+        self.music_deliveries = 0
+        self.partial_music_deliveries = 0
+        self.music_delivery_frames = 0
+        self._fps_start = clock()
+        self._fps_frames = 0
+        self._fps = 0.0
+
+    def add_latency(self, command, latency):
+        with self._lock:
+            histogram = self._latencies.get(command)
+            if histogram is None:
+                histogram = self._latencies[command] = \
+                    [0] * (len(LATENCY_BUCKETS) + 1)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    break
+            else:
+                i = len(LATENCY_BUCKETS)
+            histogram[i] += 1
+
+    def add_process_events(self, duration):
+        with self._lock:
+            self.process_events_calls += 1
+            self.process_events_time += duration
+            if duration > self.process_events_max_time:
+                self.process_events_max_time = duration
+
+    def add_callback(self, name, duration):
+        with self._lock:
+            calls, total = self._callbacks.get(name, (0, 0.0))
+            self._callbacks[name] = (calls + 1, total + duration)
+
+    def add_music_delivery(self, num_frames, consumed):
+        now = self._clock()
+        with self._lock:
+            self.music_deliveries += 1
+            self.music_delivery_frames += consumed
+            if consumed < num_frames:
+                self.partial_music_deliveries += 1
+            self._fps_frames += consumed
+            elapsed = now - self._fps_start
+            if elapsed >= FPS_WINDOW:
+                self._fps = self._fps_frames / elapsed
+                self._fps_start = now
+                self._fps_frames = 0
+
+    def timed(self, name, callback):
+        """
+        Wrap ``callback`` so that calls to it are accounted as ``name``.
+        """
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                self.add_callback(name, time.time() - start)
+        wrapper.__name__ = callback.__name__
+        wrapper.__doc__ = callback.__doc__
+        return wrapper
+
+    def _music_delivery_fps(self):
+        # The rate is only measured as frames arrive, so once a whole window
+        # has passed without one, decay it to the rate since then
+        elapsed = self._clock() - self._fps_start
+        if elapsed >= FPS_WINDOW:
+            return self._fps_frames / elapsed
+        return self._fps
+
+    def snapshot(self):
+        with self._lock:
+            callbacks = dict(
+                (name, {'calls': calls, 'time': total})
+                for name, (calls, total) in self._callbacks.items())
+            return {
+                'commands': dict(
+                    (command, {
+                        'count': sum(histogram),
+                        'latency_histogram': zip(
+                            LATENCY_BUCKETS + (None,), histogram),
+                    })
+                    for command, histogram in self._latencies.items()),
+                'process_events_calls': self.process_events_calls,
+                'process_events_time': self.process_events_time,
+                'process_events_max_time': self.process_events_max_time,
+                'callbacks': callbacks,
+                'callback_time': sum(c['time'] for c in callbacks.values()),
+                'music_deliveries': self.music_deliveries,
+                'partial_music_deliveries': self.partial_music_deliveries,
+                'music_delivery_frames': self.music_delivery_frames,
+                'music_delivery_fps': self._music_delivery_fps(),
+            }
+
+
+class StatsReporter(threading.Thread):
+    """
+    Daemon thread calling ``report(manager.stats())`` every ``interval``
+    seconds until :meth:`stop` is called.
+    """
+
+    def __init__(self, manager, interval, report):
+        threading.Thread.__init__(self, name='pyspotify stats reporter')
+        self.daemon = True
+        self._manager = manager
+        self._interval = interval
+        self._report = report
+        self._stopped = threading.Event()
+
+    def run(self):
+        while True:
+            self._stopped.wait(self._interval)
+            if self._stopped.is_set():
+                return
+            try:
+                self._report(self._manager.stats())
+            except Exception:
+                logger.exception('Stats report failed')
+
+    def stop(self):
+        self._stopped.set()
+
+
+def log_stats(stats):
+    """
+    Default report function for :class:`StatsReporter`.
+    """
+    logger.info(
+        'queue depth %d, process_events %d calls in %.3fs, '
+        'callbacks %.3fs, music delivery %.0f fps, %d partial',
+        stats['queue_depth'], stats['process_events_calls'],
+        stats['process_events_time'], stats['callback_time'],
+        stats['music_delivery_fps'], stats['partial_music_deliveries'])
@@ -3,8 +3,12 @@
 #include "libspotify/api.h"
 #include "pyspotify.h"
 #include "album.h"
+#include "intern.h"
 #include "artist.h"
 
+/* The live album wrappers, by sp_album pointer, see intern.h */
+static intern_table album_wrappers = INTERN_TABLE_INIT;
+
 static PyObject *
 Album_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -16,20 +20,44 @@ Album_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 PyObject *
 Album_FromSpotify(sp_album *album)
 {
-    PyObject *self = AlbumType.tp_alloc(&AlbumType, 0);
+    PyObject *self = intern_lookup(&album_wrappers, album);
+
+    if (self != NULL)
+        return self;
+    self = AlbumType.tp_alloc(&AlbumType, 0);
     Album_SP_ALBUM(self) = album;
     sp_album_add_ref(album);
+    intern_add(&album_wrappers, album, self);
     return self;
 }
 
 static void
 Album_dealloc(PyObject *self)
 {
+    intern_remove(&album_wrappers, Album_SP_ALBUM(self), self);
+    if (((Album *)self)->weakreflist != NULL)
+        PyObject_ClearWeakRefs(self);
     if (Album_SP_ALBUM(self) != NULL)
         sp_album_release(Album_SP_ALBUM(self));
     self->ob_type->tp_free(self);
 }
 
+static long
+Album_hash(PyObject *self)
+{
+    return sp_hash(Album_SP_ALBUM(self));
+}
+
+static PyObject *
+Album_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyObject_TypeCheck(other, &AlbumType)) {
+        Py_INCREF(Py_NotImplemented);
+        return Py_NotImplemented;
+    }
+    return sp_richcompare(Album_SP_ALBUM(self), Album_SP_ALBUM(other), op);
+}
+
 static PyObject *
 Album_is_loaded(PyObject *self)
 {
@@ -135,7 +163,7 @@ PyTypeObject AlbumType = {
     0,                                        /*tp_as_number*/
     0,                                        /*tp_as_sequence*/
     0,                                        /*tp_as_mapping*/
-    0,                                        /*tp_hash*/
+    (hashfunc) Album_hash,                    /*tp_hash*/
     0,                                        /*tp_call*/
     (reprfunc) Album_str,                     /*tp_str*/
     0,                                        /*tp_getattro*/
@@ -145,8 +173,8 @@ PyTypeObject AlbumType = {
     "Album objects",                          /* tp_doc */
     0,                                        /* tp_traverse */
     0,                                        /* tp_clear */
-    0,                                        /* tp_richcompare */
-    0,                                        /* tp_weaklistoffset */
+    Album_richcompare,                        /* tp_richcompare */
+    offsetof(Album, weakreflist),             /* tp_weaklistoffset */
     0,                                        /* tp_iter */
     0,                                        /* tp_iternext */
     Album_methods,                            /* tp_methods */
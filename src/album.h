@@ -1,6 +1,7 @@
 typedef struct {
     PyObject_HEAD
     sp_album *_album;
+    PyObject *weakreflist;
 } Album;
 
 #define Album_SP_ALBUM(o) ((Album *)o)->_album
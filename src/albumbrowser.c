@@ -2,8 +2,11 @@
 #include <structmember.h>
 #include "libspotify/api.h"
 #include "pyspotify.h"
+#include "seqiter.h"
+#include "profile.h"
 #include "album.h"
 #include "albumbrowser.h"
+#include "snapshot.h"
 #include "track.h"
 #include "session.h"
 
@@ -26,7 +29,9 @@ AlbumBrowser_browse_complete(sp_albumbrowse *browser, void *data)
         return;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "albumbrowse_complete");
 
     self = AlbumBrowser_FromSpotify(browser);
     result = PyObject_CallFunction(trampoline->callback, "NO", self,
@@ -35,10 +40,10 @@ AlbumBrowser_browse_complete(sp_albumbrowse *browser, void *data)
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
     delete_trampoline(trampoline);
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -53,8 +58,11 @@ AlbumBrowser_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
                                      &album, &callback, &userdata))
         return NULL;
 
-    if (callback)
+    if (callback) {
         trampoline = create_trampoline(callback, userdata);
+        if (trampoline == NULL)
+            return NULL;
+    }
 
     /* TODO: audit that we cleanup with _release */
     sp_albumbrowse *browser = sp_albumbrowse_create(
@@ -88,6 +96,14 @@ AlbumBrowser_sq_length(PyObject *self)
     return sp_albumbrowse_num_tracks(AlbumBrowser_SP_ALBUMBROWSE(self));
 }
 
+static PyObject *
+AlbumBrowser_item_at(PyObject *self, Py_ssize_t index)
+{
+    sp_track *track = sp_albumbrowse_track(
+        AlbumBrowser_SP_ALBUMBROWSE(self), (int)index);
+    return Track_FromSpotify(track);
+}
+
 PyObject *
 AlbumBrowser_sq_item(PyObject *self, Py_ssize_t index)
 {
@@ -95,11 +111,27 @@ AlbumBrowser_sq_item(PyObject *self, Py_ssize_t index)
         PyErr_SetNone(PyExc_IndexError);
         return NULL;
     }
-    sp_track *track = sp_albumbrowse_track(
-        AlbumBrowser_SP_ALBUMBROWSE(self), (int)index);
-    return Track_FromSpotify(track);
+    return AlbumBrowser_item_at(self, index);
+}
+
+static PyObject *
+AlbumBrowser_iter(PyObject *self)
+{
+    return seq_iter_new(self, AlbumBrowser_sq_length(self), AlbumBrowser_item_at);
 }
 
+static PyObject *
+AlbumBrowser_mp_subscript(PyObject *self, PyObject *key)
+{
+    return seq_subscript(self, key, AlbumBrowser_sq_length(self), AlbumBrowser_item_at);
+}
+
+static PyMappingMethods AlbumBrowser_as_mapping = {
+    (lenfunc) AlbumBrowser_sq_length,  /*mp_length*/
+    AlbumBrowser_mp_subscript,         /*mp_subscript*/
+    0,                          /*mp_ass_subscript*/
+};
+
 PySequenceMethods AlbumBrowser_as_sequence = {
     (lenfunc) AlbumBrowser_sq_length,    /*sq_length*/
     0,                                   /*sq_concat*/
@@ -111,10 +143,35 @@ PySequenceMethods AlbumBrowser_as_sequence = {
     0,                                   /*sq_inplace_repeat*/
 };
 
+static sp_track *
+AlbumBrowser_track_at(void *source, int index)
+{
+    return sp_albumbrowse_track((sp_albumbrowse *)source, index);
+}
+
+static PyObject *
+AlbumBrowser_snapshot(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fields = NULL;
+    sp_albumbrowse *albumbrowse = AlbumBrowser_SP_ALBUMBROWSE(self);
+
+    static char *kwlist[] = {"fields", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &fields))
+        return NULL;
+
+    return track_snapshot(fields, sp_albumbrowse_num_tracks(albumbrowse),
+                          AlbumBrowser_track_at, albumbrowse, NULL);
+}
+
 static PyMethodDef AlbumBrowser_methods[] = {
     {"is_loaded", (PyCFunction)AlbumBrowser_is_loaded, METH_NOARGS,
      "True if this album browser has finished loading"
     },
+    {"snapshot", (PyCFunction)AlbumBrowser_snapshot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Return metadata of the tracks of this album as columns"
+    },
     {NULL} /* Sentinel */
 };
 
@@ -136,7 +193,7 @@ PyTypeObject AlbumBrowserType = {
     0,                                        /*tp_repr*/
     0,                                        /*tp_as_number*/
     &AlbumBrowser_as_sequence,                /*tp_as_sequence*/
-    0,                                        /*tp_as_mapping*/
+    &AlbumBrowser_as_mapping,                 /*tp_as_mapping*/
     0,                                        /*tp_hash*/
     0,                                        /*tp_call*/
     0,                                        /*tp_str*/
@@ -149,7 +206,7 @@ PyTypeObject AlbumBrowserType = {
     0,                                        /* tp_clear */
     0,                                        /* tp_richcompare */
     0,                                        /* tp_weaklistoffset */
-    0,                                        /* tp_iter */
+    AlbumBrowser_iter,                        /* tp_iter */
     0,                                        /* tp_iternext */
     AlbumBrowser_methods,                     /* tp_methods */
     AlbumBrowser_members,                     /* tp_members */
@@ -3,6 +3,10 @@
 #include "libspotify/api.h"
 #include "pyspotify.h"
 #include "artist.h"
+#include "intern.h"
+
+/* The live artist wrappers, by sp_artist pointer, see intern.h */
+static intern_table artist_wrappers = INTERN_TABLE_INIT;
 
 static PyObject *
 Artist_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
@@ -15,20 +19,44 @@ Artist_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 PyObject *
 Artist_FromSpotify(sp_artist *artist)
 {
-    PyObject *self = ArtistType.tp_alloc(&ArtistType, 0);
+    PyObject *self = intern_lookup(&artist_wrappers, artist);
+
+    if (self != NULL)
+        return self;
+    self = ArtistType.tp_alloc(&ArtistType, 0);
     Artist_SP_ARTIST(self) = artist;
     sp_artist_add_ref(artist);
+    intern_add(&artist_wrappers, artist, self);
     return self;
 }
 
 static void
 Artist_dealloc(PyObject *self)
 {
+    intern_remove(&artist_wrappers, Artist_SP_ARTIST(self), self);
+    if (((Artist *)self)->weakreflist != NULL)
+        PyObject_ClearWeakRefs(self);
     if (Artist_SP_ARTIST(self) != NULL)
         sp_artist_release(Artist_SP_ARTIST(self));
     self->ob_type->tp_free(self);
 }
 
+static long
+Artist_hash(PyObject *self)
+{
+    return sp_hash(Artist_SP_ARTIST(self));
+}
+
+static PyObject *
+Artist_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyObject_TypeCheck(other, &ArtistType)) {
+        Py_INCREF(Py_NotImplemented);
+        return Py_NotImplemented;
+    }
+    return sp_richcompare(Artist_SP_ARTIST(self), Artist_SP_ARTIST(other), op);
+}
+
 static PyObject *
 Artist_is_loaded(PyObject *self)
 {
@@ -78,7 +106,7 @@ PyTypeObject ArtistType = {
     0,                                         /*tp_as_number*/
     0,                                         /*tp_as_sequence*/
     0,                                         /*tp_as_mapping*/
-    0,                                         /*tp_hash*/
+    (hashfunc) Artist_hash,                    /*tp_hash*/
     0,                                         /*tp_call*/
     Artist_str,                                /*tp_str*/
     0,                                         /*tp_getattro*/
@@ -88,8 +116,8 @@ PyTypeObject ArtistType = {
     "Artist objects",                          /* tp_doc */
     0,                                         /* tp_traverse */
     0,                                         /* tp_clear */
-    0,                                         /* tp_richcompare */
-    0,                                         /* tp_weaklistoffset */
+    Artist_richcompare,                        /* tp_richcompare */
+    offsetof(Artist, weakreflist),             /* tp_weaklistoffset */
     0,                                         /* tp_iter */
     0,                                         /* tp_iternext */
     Artist_methods,                            /* tp_methods */
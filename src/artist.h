@@ -1,6 +1,7 @@
 typedef struct {
     PyObject_HEAD
     sp_artist *_artist;
+    PyObject *weakreflist;
 } Artist;
 
 #define Artist_SP_ARTIST(o) ((Artist *)o)->_artist
@@ -2,8 +2,11 @@
 #include <structmember.h>
 #include "libspotify/api.h"
 #include "pyspotify.h"
+#include "seqiter.h"
+#include "profile.h"
 #include "artist.h"
 #include "artistbrowser.h"
+#include "snapshot.h"
 #include "album.h"
 #include "session.h"
 #include "track.h"
@@ -27,7 +30,9 @@ ArtistBrowser_browse_complete(sp_artistbrowse *browser, void *data)
         return;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "artistbrowse_complete");
 
     self = ArtistBrowser_FromSpotify(browser);
     result = PyObject_CallFunction(trampoline->callback, "NO", self,
@@ -36,10 +41,10 @@ ArtistBrowser_browse_complete(sp_artistbrowse *browser, void *data)
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
     delete_trampoline(trampoline);
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -76,8 +81,11 @@ ArtistBrowser_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
         }
     }
 
-    if (callback)
+    if (callback) {
         trampoline = create_trampoline(callback, userdata);
+        if (trampoline == NULL)
+            return NULL;
+    }
 
     /* TODO: audit that we cleanup with _release */
     browser = sp_artistbrowse_create(g_session, Artist_SP_ARTIST(artist),
@@ -175,6 +183,14 @@ ArtistBrowser_sq_length(PyObject *self)
     return sp_artistbrowse_num_tracks(ArtistBrowser_SP_ARTISTBROWSE(self));
 }
 
+static PyObject *
+ArtistBrowser_item_at(PyObject *self, Py_ssize_t index)
+{
+    sp_track *track = sp_artistbrowse_track(
+        ArtistBrowser_SP_ARTISTBROWSE(self), (int)index);
+    return Track_FromSpotify(track);
+}
+
 PyObject *
 ArtistBrowser_sq_item(PyObject *self, Py_ssize_t index)
 {
@@ -182,11 +198,27 @@ ArtistBrowser_sq_item(PyObject *self, Py_ssize_t index)
         PyErr_SetNone(PyExc_IndexError);
         return NULL;
     }
-    sp_track *track = sp_artistbrowse_track(
-        ArtistBrowser_SP_ARTISTBROWSE(self), (int)index);
-    return Track_FromSpotify(track);
+    return ArtistBrowser_item_at(self, index);
+}
+
+static PyObject *
+ArtistBrowser_iter(PyObject *self)
+{
+    return seq_iter_new(self, ArtistBrowser_sq_length(self), ArtistBrowser_item_at);
+}
+
+static PyObject *
+ArtistBrowser_mp_subscript(PyObject *self, PyObject *key)
+{
+    return seq_subscript(self, key, ArtistBrowser_sq_length(self), ArtistBrowser_item_at);
 }
 
+static PyMappingMethods ArtistBrowser_as_mapping = {
+    (lenfunc) ArtistBrowser_sq_length,  /*mp_length*/
+    ArtistBrowser_mp_subscript,         /*mp_subscript*/
+    0,                          /*mp_ass_subscript*/
+};
+
 PySequenceMethods ArtistBrowser_as_sequence = {
     (lenfunc) ArtistBrowser_sq_length,          /*sq_length*/
     0,                                          /*sq_concat*/
@@ -198,10 +230,35 @@ PySequenceMethods ArtistBrowser_as_sequence = {
     0,                                          /*sq_inplace_repeat*/
 };
 
+static sp_track *
+ArtistBrowser_track_at(void *source, int index)
+{
+    return sp_artistbrowse_track((sp_artistbrowse *)source, index);
+}
+
+static PyObject *
+ArtistBrowser_snapshot(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fields = NULL;
+    sp_artistbrowse *artistbrowse = ArtistBrowser_SP_ARTISTBROWSE(self);
+
+    static char *kwlist[] = {"fields", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &fields))
+        return NULL;
+
+    return track_snapshot(fields, sp_artistbrowse_num_tracks(artistbrowse),
+                          ArtistBrowser_track_at, artistbrowse, NULL);
+}
+
 static PyMethodDef ArtistBrowser_methods[] = {
     {"is_loaded", (PyCFunction)ArtistBrowser_is_loaded, METH_NOARGS,
      "True if this artist browser has finished loading"
     },
+    {"snapshot", (PyCFunction)ArtistBrowser_snapshot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Return metadata of the tracks of this artist as columns"
+    },
     {"albums", (PyCFunction)ArtistBrowser_albums, METH_NOARGS,
      "Return a list of all the albums found while browsing."
     },
@@ -234,7 +291,7 @@ PyTypeObject ArtistBrowserType = {
     0,                                        /*tp_repr */
     0,                                        /*tp_as_number */
     &ArtistBrowser_as_sequence,               /*tp_as_sequence */
-    0,                                        /*tp_as_mapping */
+    &ArtistBrowser_as_mapping,                /*tp_as_mapping*/
     0,                                        /*tp_hash */
     0,                                        /*tp_call */
     0,                                        /*tp_str */
@@ -247,7 +304,7 @@ PyTypeObject ArtistBrowserType = {
     0,                                        /* tp_clear */
     0,                                        /* tp_richcompare */
     0,                                        /* tp_weaklistoffset */
-    0,                                        /* tp_iter */
+    ArtistBrowser_iter,                       /* tp_iter */
     0,                                        /* tp_iternext */
     ArtistBrowser_methods,                    /* tp_methods */
     ArtistBrowser_members,                    /* tp_members */
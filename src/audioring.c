@@ -0,0 +1,436 @@
+#include <Python.h>
+#include <structmember.h>
+#include <string.h>
+#include "libspotify/api.h"
+#include "pyspotify.h"
+#include "audioring.h"
+
+/* Both ends publish their counter with a full barrier, so the other side
+ * never sees the counter move before the bytes it covers. */
+#define ring_barrier() __sync_synchronize()
+
+int
+audio_ring_write(audio_ring *ring, const sp_audioformat *format,
+                 int frame_size, const void *frames, int num_frames)
+{
+    size_t head, used, room, bytes, offset, first;
+    int fit;
+
+    if (frame_size <= 0 || num_frames <= 0)
+        return num_frames;
+
+    head = ring->head;
+    ring_barrier();
+    used = head - ring->tail;
+
+    if (ring->frame_size != frame_size
+            || ring->sample_rate != format->sample_rate
+            || ring->channels != format->channels) {
+        /* Never mix formats in the ring: wait for the reader to drain it. */
+        if (used > 0) {
+            ring->short_writes++;
+            return 0;
+        }
+        ring->sample_type = format->sample_type;
+        ring->sample_rate = format->sample_rate;
+        ring->channels = format->channels;
+        ring->frame_size = frame_size;
+    }
+
+    room = ring->size - used;
+    fit = (int)(room / frame_size);
+    if (fit > num_frames)
+        fit = num_frames;
+    if (fit < num_frames)
+        ring->short_writes++;
+    if (fit == 0)
+        return 0;
+
+    bytes = (size_t)fit * frame_size;
+    offset = head % ring->size;
+    first = ring->size - offset;
+    if (first > bytes)
+        first = bytes;
+    memcpy(ring->data + offset, frames, first);
+    memcpy(ring->data, (const char *)frames + first, bytes - first);
+
+    ring_barrier();
+    ring->head = head + bytes;
+    return fit;
+}
+
+/* Returns the number of bytes that can be read, rounded down to whole
+ * frames. */
+static size_t
+audio_ring_available(audio_ring *ring)
+{
+    size_t head = ring->head;
+    size_t available;
+
+    ring_barrier();
+    available = head - ring->tail;
+    if (ring->frame_size > 0)
+        available -= available % ring->frame_size;
+    return available;
+}
+
+static size_t
+audio_ring_read(audio_ring *ring, char *target, size_t len)
+{
+    size_t tail = ring->tail;
+    size_t available = audio_ring_available(ring);
+    size_t offset, first;
+
+    if (len > available)
+        len = available;
+    if (ring->frame_size > 0)
+        len -= len % ring->frame_size;
+    if (len == 0)
+        return 0;
+
+    offset = tail % ring->size;
+    first = ring->size - offset;
+    if (first > len)
+        first = len;
+    memcpy(target, ring->data + offset, first);
+    memcpy(target + first, ring->data, len - first);
+
+    ring_barrier();
+    ring->tail = tail + len;
+    return len;
+}
+
+static PyObject *
+AudioRing_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    PyObject *self;
+    audio_ring *ring;
+    Py_ssize_t size;
+
+    static char *kwlist[] = {"size", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "n", kwlist, &size))
+        return NULL;
+
+    if (size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "size must be positive");
+        return NULL;
+    }
+
+    ring = PyMem_New(audio_ring, 1);
+    if (ring == NULL)
+        return PyErr_NoMemory();
+    memset(ring, 0, sizeof(audio_ring));
+
+    ring->data = PyMem_New(char, size);
+    if (ring->data == NULL) {
+        PyMem_Del(ring);
+        return PyErr_NoMemory();
+    }
+    ring->size = (size_t)size;
+
+    self = type->tp_alloc(type, 0);
+    if (self == NULL) {
+        PyMem_Del(ring->data);
+        PyMem_Del(ring);
+        return NULL;
+    }
+    AudioRing_RING(self) = ring;
+    return self;
+}
+
+static void
+AudioRing_dealloc(PyObject *self)
+{
+    audio_ring *ring = AudioRing_RING(self);
+    if (ring != NULL) {
+        PyMem_Del(ring->data);
+        PyMem_Del(ring);
+    }
+    self->ob_type->tp_free(self);
+}
+
+static PyObject *
+AudioRing_read_into(PyObject *self, PyObject *args)
+{
+    Py_buffer buffer;
+    size_t len;
+
+    if (!PyArg_ParseTuple(args, "w*", &buffer))
+        return NULL;
+
+    len = audio_ring_read(AudioRing_RING(self), buffer.buf, (size_t)buffer.len);
+    PyBuffer_Release(&buffer);
+    return PyInt_FromSize_t(len);
+}
+
+static PyObject *
+AudioRing_read(PyObject *self, PyObject *args)
+{
+    PyObject *data;
+    Py_ssize_t size = -1;
+    size_t available, len;
+    audio_ring *ring = AudioRing_RING(self);
+
+    if (!PyArg_ParseTuple(args, "|n", &size))
+        return NULL;
+
+    available = audio_ring_available(ring);
+    if (size < 0 || (size_t)size > available)
+        size = (Py_ssize_t)available;
+
+    data = PyBytes_FromStringAndSize(NULL, size);
+    if (data == NULL)
+        return NULL;
+
+    len = audio_ring_read(ring, PyBytes_AS_STRING(data), (size_t)size);
+    if ((Py_ssize_t)len != size && _PyBytes_Resize(&data, len) < 0)
+        return NULL;
+    return data;
+}
+
+static PyObject *
+AudioRing_chunks(PyObject *self, PyObject *args)
+{
+    Py_ssize_t size;
+    PyObject *chunks;
+
+    if (!PyArg_ParseTuple(args, "n", &size))
+        return NULL;
+
+    if (size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "chunk size must be positive");
+        return NULL;
+    }
+
+    chunks = PyObject_CallFunction((PyObject *)&AudioRingChunksType, "On",
+                                   self, size);
+    return chunks;
+}
+
+static PyObject *
+AudioRing_available(PyObject *self)
+{
+    return PyInt_FromSize_t(audio_ring_available(AudioRing_RING(self)));
+}
+
+static PyObject *
+AudioRing_capacity(PyObject *self)
+{
+    return PyInt_FromSize_t(AudioRing_RING(self)->size);
+}
+
+static PyObject *
+AudioRing_format(PyObject *self)
+{
+    audio_ring *ring = AudioRing_RING(self);
+    if (ring->frame_size == 0)
+        Py_RETURN_NONE;
+    return Py_BuildValue("(iiii)", ring->frame_size, ring->sample_type,
+                         ring->sample_rate, ring->channels);
+}
+
+static PyObject *
+AudioRing_short_writes(PyObject *self)
+{
+    return PyLong_FromUnsignedLong(AudioRing_RING(self)->short_writes);
+}
+
+static PyObject *
+AudioRing_clear(PyObject *self)
+{
+    audio_ring *ring = AudioRing_RING(self);
+    size_t head = ring->head;
+
+    ring_barrier();
+    ring->tail = head;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef AudioRing_methods[] = {
+    {"read_into", (PyCFunction)AudioRing_read_into, METH_VARARGS,
+     "Copy whole frames into a writable buffer, return the number of bytes"
+    },
+    {"read", (PyCFunction)AudioRing_read, METH_VARARGS,
+     "Return up to size bytes of whole frames as a string"
+    },
+    {"chunks", (PyCFunction)AudioRing_chunks, METH_VARARGS,
+     "Iterate over the available data in chunks of size bytes, rounded " \
+     "down to whole frames"
+    },
+    {"available", (PyCFunction)AudioRing_available, METH_NOARGS,
+     "Number of bytes that can be read right now"
+    },
+    {"capacity", (PyCFunction)AudioRing_capacity, METH_NOARGS,
+     "Size of the ring in bytes"
+    },
+    {"format", (PyCFunction)AudioRing_format, METH_NOARGS,
+     "Return (frame_size, sample_type, sample_rate, channels) of the " \
+     "buffered audio, or None if nothing has been delivered yet"
+    },
+    {"short_writes", (PyCFunction)AudioRing_short_writes, METH_NOARGS,
+     "Number of deliveries that did not fit entirely in the ring"
+    },
+    {"clear", (PyCFunction)AudioRing_clear, METH_NOARGS,
+     "Drop all buffered audio"
+    },
+    {NULL} /* Sentinel */
+};
+
+static PyMemberDef AudioRing_members[] = {
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject AudioRingType = {
+    PyObject_HEAD_INIT(NULL)
+    0,                                        /*ob_size*/
+    "spotify.AudioRing",                      /*tp_name*/
+    sizeof(AudioRing),                        /*tp_basicsize*/
+    0,                                        /*tp_itemsize*/
+    (destructor) AudioRing_dealloc,           /*tp_dealloc*/
+    0,                                        /*tp_print*/
+    0,                                        /*tp_getattr*/
+    0,                                        /*tp_setattr*/
+    0,                                        /*tp_compare*/
+    0,                                        /*tp_repr*/
+    0,                                        /*tp_as_number*/
+    0,                                        /*tp_as_sequence*/
+    0,                                        /*tp_as_mapping*/
+    0,                                        /*tp_hash*/
+    0,                                        /*tp_call*/
+    0,                                        /*tp_str*/
+    0,                                        /*tp_getattro*/
+    0,                                        /*tp_setattro*/
+    0,                                        /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,                       /*tp_flags*/
+    "AudioRing objects",                      /* tp_doc */
+    0,                                        /* tp_traverse */
+    0,                                        /* tp_clear */
+    0,                                        /* tp_richcompare */
+    0,                                        /* tp_weaklistoffset */
+    0,                                        /* tp_iter */
+    0,                                        /* tp_iternext */
+    AudioRing_methods,                        /* tp_methods */
+    AudioRing_members,                        /* tp_members */
+    0,                                        /* tp_getset */
+    0,                                        /* tp_base */
+    0,                                        /* tp_dict */
+    0,                                        /* tp_descr_get */
+    0,                                        /* tp_descr_set */
+    0,                                        /* tp_dictoffset */
+    0,                                        /* tp_init */
+    0,                                        /* tp_alloc */
+    AudioRing_new,                            /* tp_new */
+};
+
+/* Iterator returned by AudioRing.chunks() */
+typedef struct {
+    PyObject_HEAD
+    PyObject *ring;
+    Py_ssize_t size;
+} AudioRingChunks;
+
+static PyObject *
+AudioRingChunks_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    PyObject *ring, *self;
+    Py_ssize_t size;
+
+    if (!PyArg_ParseTuple(args, "O!n", &AudioRingType, &ring, &size))
+        return NULL;
+
+    self = type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    Py_INCREF(ring);
+    ((AudioRingChunks *)self)->ring = ring;
+    ((AudioRingChunks *)self)->size = size;
+    return self;
+}
+
+static void
+AudioRingChunks_dealloc(PyObject *self)
+{
+    Py_XDECREF(((AudioRingChunks *)self)->ring);
+    self->ob_type->tp_free(self);
+}
+
+static PyObject *
+AudioRingChunks_next(PyObject *self)
+{
+    AudioRingChunks *chunks = (AudioRingChunks *)self;
+    audio_ring *ring = AudioRing_RING(chunks->ring);
+    PyObject *data;
+    size_t size = (size_t)chunks->size;
+
+    /* Only whole frames are read from the ring */
+    if (ring->frame_size > 0) {
+        size -= size % ring->frame_size;
+        if (size == 0) {
+            PyErr_SetString(PyExc_ValueError,
+                            "chunk size is smaller than a frame");
+            return NULL;
+        }
+    }
+    if (audio_ring_available(ring) < size)
+        return NULL;
+
+    data = PyBytes_FromStringAndSize(NULL, size);
+    if (data == NULL)
+        return NULL;
+    audio_ring_read(ring, PyBytes_AS_STRING(data), size);
+    return data;
+}
+
+PyTypeObject AudioRingChunksType = {
+    PyObject_HEAD_INIT(NULL)
+    0,                                        /*ob_size*/
+    "spotify.AudioRingChunks",                /*tp_name*/
+    sizeof(AudioRingChunks),                  /*tp_basicsize*/
+    0,                                        /*tp_itemsize*/
+    (destructor) AudioRingChunks_dealloc,     /*tp_dealloc*/
+    0,                                        /*tp_print*/
+    0,                                        /*tp_getattr*/
+    0,                                        /*tp_setattr*/
+    0,                                        /*tp_compare*/
+    0,                                        /*tp_repr*/
+    0,                                        /*tp_as_number*/
+    0,                                        /*tp_as_sequence*/
+    0,                                        /*tp_as_mapping*/
+    0,                                        /*tp_hash*/
+    0,                                        /*tp_call*/
+    0,                                        /*tp_str*/
+    0,                                        /*tp_getattro*/
+    0,                                        /*tp_setattro*/
+    0,                                        /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,                       /*tp_flags*/
+    "Iterator over fixed-size chunks of an AudioRing", /* tp_doc */
+    0,                                        /* tp_traverse */
+    0,                                        /* tp_clear */
+    0,                                        /* tp_richcompare */
+    0,                                        /* tp_weaklistoffset */
+    PyObject_SelfIter,                        /* tp_iter */
+    AudioRingChunks_next,                     /* tp_iternext */
+    0,                                        /* tp_methods */
+    0,                                        /* tp_members */
+    0,                                        /* tp_getset */
+    0,                                        /* tp_base */
+    0,                                        /* tp_dict */
+    0,                                        /* tp_descr_get */
+    0,                                        /* tp_descr_set */
+    0,                                        /* tp_dictoffset */
+    0,                                        /* tp_init */
+    0,                                        /* tp_alloc */
+    AudioRingChunks_new,                      /* tp_new */
+};
+
+void
+audioring_init(PyObject *module)
+{
+    if (PyType_Ready(&AudioRingType) < 0)
+        return;
+    if (PyType_Ready(&AudioRingChunksType) < 0)
+        return;
+    Py_INCREF(&AudioRingType);
+    PyModule_AddObject(module, "AudioRing", (PyObject *)&AudioRingType);
+}
@@ -0,0 +1,40 @@
+#include <Python.h>
+#include "pyspotify.h"
+
+/* Single-producer/single-consumer ring of PCM bytes.
+ *
+ * The producer is the libspotify thread (music_delivery), which never takes
+ * the GIL; the consumer is a Python thread. head and tail are free-running
+ * byte counters, only ever written by the producer and the consumer
+ * respectively.
+ */
+typedef struct {
+    char *data;
+    size_t size;
+    volatile size_t head;
+    volatile size_t tail;
+    volatile int sample_type;
+    volatile int sample_rate;
+    volatile int channels;
+    volatile int frame_size;
+    volatile unsigned long short_writes;
+} audio_ring;
+
+typedef struct {
+    PyObject_HEAD
+    audio_ring *_ring;
+} AudioRing;
+
+#define AudioRing_RING(o) ((AudioRing *)o)->_ring
+
+extern PyTypeObject AudioRingType;
+extern PyTypeObject AudioRingChunksType;
+
+/* Copies as many whole frames as fit into the ring and returns how many
+ * frames were consumed. Safe to call without holding the GIL. */
+int
+audio_ring_write(audio_ring *ring, const sp_audioformat *format,
+                 int frame_size, const void *frames, int num_frames);
+
+extern void
+audioring_init(PyObject *module);
@@ -0,0 +1,256 @@
+#include <Python.h>
+#include <string.h>
+#include <libspotify/api.h>
+#include "pyspotify.h"
+#include "cbtable.h"
+
+#define TABLE_MIN_BUCKETS 64
+#define ENTRY_MIN_BUCKETS 16
+
+static size_t
+hash_pointer(const void *p)
+{
+    size_t h = (size_t)p;
+
+    /* Objects are aligned, so the low bits carry no information */
+    h ^= h >> 4;
+    return h * 2654435761UL;
+}
+
+static size_t
+hash_registration(PyObject *key, PyObject *userdata)
+{
+    return hash_pointer(key) ^ (hash_pointer(userdata) * 31);
+}
+
+static PyObject *
+callback_key(PyObject *callback)
+{
+    PyObject *function;
+
+    if (PyTuple_Check(callback))
+        return PyTuple_GET_ITEM(callback, 0);
+    function = as_function(callback);
+
+    if (PyFunction_Check(function))
+        return PyFunction_GET_CODE(function);
+    return function;
+}
+
+static void **
+new_buckets(size_t num_buckets)
+{
+    void **buckets = PyMem_New(void *, num_buckets);
+
+    if (buckets == NULL) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    memset(buckets, 0, num_buckets * sizeof(void *));
+    return buckets;
+}
+
+/* Doubles the buckets of table once it holds as many entries */
+static int
+grow_table(cb_table *table)
+{
+    cb_entry **buckets, *entry, *next;
+    size_t i, num_buckets, h;
+
+    if (table->buckets != NULL && table->count < table->num_buckets)
+        return 0;
+    num_buckets = table->buckets ? table->num_buckets * 2 : TABLE_MIN_BUCKETS;
+    buckets = (cb_entry **)new_buckets(num_buckets);
+    if (buckets == NULL)
+        return -1;
+    for (i = 0; i < table->num_buckets; i++) {
+        for (entry = table->buckets[i]; entry; entry = next) {
+            next = entry->next;
+            h = hash_pointer(entry->owner) & (num_buckets - 1);
+            entry->next = buckets[h];
+            buckets[h] = entry;
+        }
+    }
+    PyMem_Free(table->buckets);
+    table->buckets = buckets;
+    table->num_buckets = num_buckets;
+    return 0;
+}
+
+/* Doubles the buckets of entry once it holds as many registrations */
+static int
+grow_entry(cb_entry *entry)
+{
+    cb_registration **buckets, *reg, *next;
+    size_t i, num_buckets, h;
+
+    if (entry->count < entry->num_buckets)
+        return 0;
+    num_buckets = entry->num_buckets * 2;
+    buckets = (cb_registration **)new_buckets(num_buckets);
+    if (buckets == NULL)
+        return -1;
+    for (i = 0; i < entry->num_buckets; i++) {
+        for (reg = entry->buckets[i]; reg; reg = next) {
+            next = reg->next;
+            h = hash_registration(reg->key, reg->trampoline->userdata)
+                & (num_buckets - 1);
+            reg->next = buckets[h];
+            buckets[h] = reg;
+        }
+    }
+    PyMem_Free(entry->buckets);
+    entry->buckets = buckets;
+    entry->num_buckets = num_buckets;
+    return 0;
+}
+
+/* Returns the slot pointing to the entry of owner, or to the NULL ending its
+ * bucket if there is none */
+static cb_entry **
+find_entry(cb_table *table, void *owner)
+{
+    cb_entry **slot;
+
+    slot = &table->buckets[hash_pointer(owner) & (table->num_buckets - 1)];
+    while (*slot && (*slot)->owner != owner)
+        slot = &(*slot)->next;
+    return slot;
+}
+
+/* Unlinks and frees the entry at slot once it has no registrations left */
+static void
+drop_entry(cb_table *table, cb_entry **slot, int *emptied)
+{
+    cb_entry *entry = *slot;
+
+    *emptied = (entry->count == 0);
+    if (!*emptied)
+        return;
+    *slot = entry->next;
+    table->count--;
+    PyMem_Free(entry->buckets);
+    PyMem_Free(entry);
+}
+
+int
+cb_table_add(cb_table *table, void *owner, void *callbacks,
+             Callback *trampoline)
+{
+    cb_entry **slot, *entry;
+    cb_registration *reg;
+    int created = 0;
+    size_t h;
+
+    if (grow_table(table) < 0)
+        return -1;
+    slot = find_entry(table, owner);
+    entry = *slot;
+    if (entry == NULL) {
+        entry = PyMem_New(cb_entry, 1);
+        if (entry == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        entry->buckets = (cb_registration **)new_buckets(ENTRY_MIN_BUCKETS);
+        if (entry->buckets == NULL) {
+            PyMem_Free(entry);
+            return -1;
+        }
+        entry->owner = owner;
+        entry->num_buckets = ENTRY_MIN_BUCKETS;
+        entry->count = 0;
+        entry->next = NULL;
+        *slot = entry;
+        table->count++;
+        created = 1;
+    }
+    else if (grow_entry(entry) < 0)
+        return -1;
+
+    reg = PyMem_New(cb_registration, 1);
+    if (reg == NULL) {
+        PyErr_NoMemory();
+        if (created)
+            drop_entry(table, slot, &created);
+        return -1;
+    }
+    reg->callbacks = callbacks;
+    reg->trampoline = trampoline;
+    reg->key = callback_key(trampoline->callback);
+    h = hash_registration(reg->key, trampoline->userdata)
+        & (entry->num_buckets - 1);
+    reg->next = entry->buckets[h];
+    entry->buckets[h] = reg;
+    entry->count++;
+    return created;
+}
+
+cb_registration *
+cb_table_remove(cb_table *table, void *owner, PyObject *callback,
+                PyObject *userdata, int *emptied)
+{
+    cb_entry **slot;
+    cb_registration **reg_slot, *reg;
+    PyObject *key;
+
+    *emptied = 0;
+    if (table->buckets == NULL)
+        return NULL;
+    slot = find_entry(table, owner);
+    if (*slot == NULL)
+        return NULL;
+
+    key = callback_key(callback);
+    reg_slot = &(*slot)->buckets[hash_registration(key, userdata)
+                                 & ((*slot)->num_buckets - 1)];
+    while (*reg_slot && ((*reg_slot)->key != key ||
+                         (*reg_slot)->trampoline->userdata != userdata))
+        reg_slot = &(*reg_slot)->next;
+    reg = *reg_slot;
+    if (reg == NULL)
+        return NULL;
+
+    *reg_slot = reg->next;
+    reg->next = NULL;
+    (*slot)->count--;
+    drop_entry(table, slot, emptied);
+    return reg;
+}
+
+cb_registration *
+cb_table_remove_all(cb_table *table, void *owner, PyObject *self,
+                    int *emptied)
+{
+    cb_entry **slot, *entry;
+    cb_registration **reg_slot, *reg, *removed = NULL;
+    PyObject *callback;
+    size_t i;
+
+    *emptied = 0;
+    if (table->buckets == NULL)
+        return NULL;
+    slot = find_entry(table, owner);
+    entry = *slot;
+    if (entry == NULL)
+        return NULL;
+
+    for (i = 0; i < entry->num_buckets; i++) {
+        reg_slot = &entry->buckets[i];
+        while ((reg = *reg_slot) != NULL) {
+            callback = reg->trampoline->callback;
+            if (self != NULL && reg->key != self &&
+                    !(PyMethod_Check(callback) &&
+                      PyMethod_GET_SELF(callback) == self)) {
+                reg_slot = &reg->next;
+                continue;
+            }
+            *reg_slot = reg->next;
+            reg->next = removed;
+            removed = reg;
+            entry->count--;
+        }
+    }
+    drop_entry(table, slot, emptied);
+    return removed;
+}
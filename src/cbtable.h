@@ -0,0 +1,63 @@
+#include <Python.h>
+#include "pyspotify.h"
+
+/* Callback tables for playlists and playlist containers.
+ *
+ * They keep enough information into pyspotify to be able to remove callbacks
+ * after a while, especially when dealing with a different Python object than
+ * the one the callbacks were added from. Each table hashes its entries by
+ * the sp_playlist or sp_playlistcontainer pointer, and each entry hashes its
+ * registrations by the (callback, userdata) pair, so that adding and removing
+ * a callback does not depend on how many are registered.
+ *
+ * The tables are protected by the GIL, which all callers must hold.
+ */
+
+/* A libspotify callbacks structure added with its trampoline */
+typedef struct _cb_registration {
+    void *callbacks;
+    Callback *trampoline;
+    /* Identity of the Python callback: a sole Python function can be
+     * represented by several Python Method objects, but has an unique Code
+     * object. Callbacks that are tuples register several handlers at once,
+     * and are identified by their first item, the object owning them. */
+    PyObject *key;
+    struct _cb_registration *next;
+} cb_registration;
+
+/* The registrations of one playlist or playlist container */
+typedef struct _cb_entry {
+    void *owner;
+    cb_registration **buckets;
+    size_t num_buckets;
+    size_t count;
+    struct _cb_entry *next;
+} cb_entry;
+
+typedef struct {
+    cb_entry **buckets;
+    size_t num_buckets;
+    size_t count;
+} cb_table;
+
+#define CB_TABLE_INIT {NULL, 0, 0}
+
+/* Registers callbacks and trampoline for owner. Returns 1 if owner had no
+ * registrations before, 0 if it had, and -1 with an exception set. */
+int
+cb_table_add(cb_table *table, void *owner, void *callbacks,
+             Callback *trampoline);
+
+/* Unregisters the most recent registration of callback and userdata for
+ * owner and returns it, or NULL if there is none. emptied is set to whether
+ * owner has no registrations left. */
+cb_registration *
+cb_table_remove(cb_table *table, void *owner, PyObject *callback,
+                PyObject *userdata, int *emptied);
+
+/* Unregisters all registrations for owner, or only the ones of methods bound
+ * to self or owned by self if it is not NULL, and returns them chained by
+ * next. emptied is set to whether owner has no registrations left. */
+cb_registration *
+cb_table_remove_all(cb_table *table, void *owner, PyObject *self,
+                    int *emptied);
@@ -2,6 +2,7 @@
 #include <structmember.h>
 #include "libspotify/api.h"
 #include "pyspotify.h"
+#include "profile.h"
 #include "image.h"
 
 static PyObject *
@@ -76,7 +77,8 @@ Image_loaded(sp_image *image, void *data)
         return;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "image_loaded");
 
     self = Image_FromSpotify(image);
     result = PyObject_CallFunction(trampoline->callback, "NO", self,
@@ -85,10 +87,10 @@ Image_loaded(sp_image *image, void *data)
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
     delete_trampoline(trampoline);
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -101,6 +103,8 @@ Image_add_load_callback(PyObject *self, PyObject *args)
         return NULL;
 
     trampoline = create_trampoline(callback, userdata);
+    if (trampoline == NULL)
+        return NULL;
     sp_image_add_load_callback(Image_SP_IMAGE(self), Image_loaded, trampoline);
     Py_RETURN_NONE;
 }
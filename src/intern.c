@@ -0,0 +1,177 @@
+#include <Python.h>
+#include <string.h>
+#include <libspotify/api.h>
+#include "pyspotify.h"
+#include "intern.h"
+
+#define TABLE_MIN_BUCKETS 256
+
+static int g_interning = 0;
+
+static size_t
+hash_pointer(const void *p)
+{
+    size_t h = (size_t)p;
+
+    /* Objects are aligned, so the low bits carry no information */
+    h ^= h >> 4;
+    return h * 2654435761UL;
+}
+
+/* Doubles the buckets of table once it holds as many entries */
+static int
+grow_table(intern_table *table)
+{
+    intern_entry **buckets, *entry, *next;
+    size_t i, num_buckets, h;
+
+    if (table->buckets != NULL && table->count < table->num_buckets)
+        return 0;
+    num_buckets = table->buckets ? table->num_buckets * 2 : TABLE_MIN_BUCKETS;
+    buckets = PyMem_New(intern_entry *, num_buckets);
+    if (buckets == NULL)
+        return -1;
+    memset(buckets, 0, num_buckets * sizeof(intern_entry *));
+    for (i = 0; i < table->num_buckets; i++) {
+        for (entry = table->buckets[i]; entry; entry = next) {
+            next = entry->next;
+            h = hash_pointer(entry->sp) & (num_buckets - 1);
+            entry->next = buckets[h];
+            buckets[h] = entry;
+        }
+    }
+    PyMem_Free(table->buckets);
+    table->buckets = buckets;
+    table->num_buckets = num_buckets;
+    return 0;
+}
+
+static intern_entry **
+find_entry(intern_table *table, void *sp)
+{
+    intern_entry **slot;
+
+    slot = &table->buckets[hash_pointer(sp) & (table->num_buckets - 1)];
+    while (*slot && (*slot)->sp != sp)
+        slot = &(*slot)->next;
+    return slot;
+}
+
+PyObject *
+intern_lookup(intern_table *table, void *sp)
+{
+    intern_entry *entry;
+
+    if (!g_interning || table->buckets == NULL)
+        return NULL;
+    entry = *find_entry(table, sp);
+    if (entry == NULL)
+        return NULL;
+    Py_INCREF(entry->object);
+    return entry->object;
+}
+
+void
+intern_add(intern_table *table, void *sp, PyObject *object)
+{
+    intern_entry **slot, *entry;
+
+    if (!g_interning || sp == NULL || object == NULL)
+        return;
+    if (grow_table(table) < 0)
+        return;
+    slot = find_entry(table, sp);
+    if (*slot != NULL) {
+        /* Wrapped while interning was disabled: keep the recorded one */
+        return;
+    }
+    entry = PyMem_New(intern_entry, 1);
+    if (entry == NULL)
+        return;
+    entry->sp = sp;
+    entry->object = object;
+    entry->next = NULL;
+    *slot = entry;
+    table->count++;
+}
+
+void
+intern_remove(intern_table *table, void *sp, PyObject *object)
+{
+    intern_entry **slot, *entry;
+
+    /* Wrappers may outlive a call to set_interning(False), so this does not
+     * depend on whether interning is enabled */
+    if (table->buckets == NULL || sp == NULL)
+        return;
+    slot = find_entry(table, sp);
+    entry = *slot;
+    if (entry == NULL || entry->object != object)
+        return;
+    *slot = entry->next;
+    table->count--;
+    PyMem_Free(entry);
+}
+
+long
+sp_hash(void *sp)
+{
+    return _Py_HashPointer(sp);
+}
+
+PyObject *
+sp_richcompare(void *sp, void *other, int op)
+{
+    PyObject *result;
+
+    switch (op) {
+    case Py_EQ:
+        result = (sp == other) ? Py_True : Py_False;
+        break;
+    case Py_NE:
+        result = (sp != other) ? Py_True : Py_False;
+        break;
+    default:
+        result = Py_NotImplemented;
+    }
+    Py_INCREF(result);
+    return result;
+}
+
+static PyObject *
+set_interning(PyObject *self, PyObject *args)
+{
+    PyObject *enabled;
+    int enabled_value;
+
+    if (!PyArg_ParseTuple(args, "O", &enabled))
+        return NULL;
+
+    enabled_value = PyObject_IsTrue(enabled);
+    if (enabled_value < 0)
+        return NULL;
+    g_interning = enabled_value;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef intern_methods[] = {
+    {"set_interning", (PyCFunction)set_interning, METH_VARARGS,
+     "Enable or disable the interning of tracks, albums, artists, playlists "
+     "and users"
+    },
+    {NULL} /* Sentinel */
+};
+
+void
+intern_init(PyObject *module)
+{
+    PyMethodDef *def;
+    PyObject *function;
+
+    for (def = intern_methods; def->ml_name != NULL; def++) {
+        function = PyCFunction_New(def, NULL);
+        if (function == NULL)
+            return;
+        PyModule_AddObject(module, def->ml_name, function);
+    }
+}
@@ -0,0 +1,53 @@
+#include <Python.h>
+
+/* Identity of the wrappers of libspotify objects.
+ *
+ * Wrappers compare equal and hash alike when they wrap the same libspotify
+ * pointer, see sp_hash() and sp_richcompare(). When interning is enabled
+ * with spotify.set_interning(), the constructors of the types keeping an
+ * intern table, such as Track_FromSpotify(), also return the live wrapper
+ * of a pointer if there is one instead of a new object, so that a given
+ * sp_track maps to a single Python object.
+ *
+ * Tables hold no references: a wrapper removes itself from its table when
+ * it is deallocated. They are protected by the GIL, which all callers must
+ * hold.
+ */
+typedef struct _intern_entry {
+    void *sp;
+    PyObject *object;
+    struct _intern_entry *next;
+} intern_entry;
+
+typedef struct {
+    intern_entry **buckets;
+    size_t num_buckets;
+    size_t count;
+} intern_table;
+
+#define INTERN_TABLE_INIT {NULL, 0, 0}
+
+/* Returns a new reference to the wrapper of sp, or NULL if interning is
+ * disabled or there is none. Never sets an exception. */
+PyObject *
+intern_lookup(intern_table *table, void *sp);
+
+/* Records object as the wrapper of sp if interning is enabled. Failing to
+ * allocate the entry only leaves object out of the table. */
+void
+intern_add(intern_table *table, void *sp, PyObject *object);
+
+/* Forgets object if it is the wrapper recorded for sp */
+void
+intern_remove(intern_table *table, void *sp, PyObject *object);
+
+long
+sp_hash(void *sp);
+
+/* Compares the pointers of two wrappers of the same type. Only == and != are
+ * supported. */
+PyObject *
+sp_richcompare(void *sp, void *other, int op);
+
+extern void
+intern_init(PyObject *module);
@@ -189,6 +189,161 @@ Link_as_playlist(PyObject *self)
     return Playlist_FromSpotify(playlist);
 }
 
+/* Create a link from a URI, a str or unicode object. Returns NULL with a
+ * Python exception set if uri is not a string, and NULL without an exception
+ * if it is not a valid Spotify URI. */
+static sp_link *
+link_from_uri(PyObject *uri)
+{
+    PyObject *encoded;
+    sp_link *link;
+
+    if (PyString_Check(uri))
+        return sp_link_create_from_string(PyString_AS_STRING(uri));
+
+    if (!PyUnicode_Check(uri)) {
+        PyErr_SetString(PyExc_TypeError, "URIs must be strings");
+        return NULL;
+    }
+    encoded = PyUnicode_AsUTF8String(uri);
+    if (encoded == NULL)
+        return NULL;
+    link = sp_link_create_from_string(PyString_AS_STRING(encoded));
+    Py_DECREF(encoded);
+    return link;
+}
+
+/* Return the object a link refers to, or a new SpotifyError instance if it
+ * cannot be resolved. */
+static PyObject *
+resolve_link(sp_link *link)
+{
+    sp_track *track;
+    sp_album *album;
+    sp_artist *artist;
+    sp_playlist *playlist;
+    PyObject *result;
+
+    switch (sp_link_type(link)) {
+    case SP_LINKTYPE_TRACK:
+    case SP_LINKTYPE_LOCALTRACK:
+        track = sp_link_as_track(link);
+        if (track != NULL)
+            return Track_FromSpotify(track);
+        break;
+    case SP_LINKTYPE_ALBUM:
+        album = sp_link_as_album(link);
+        if (album != NULL)
+            return Album_FromSpotify(album);
+        break;
+    case SP_LINKTYPE_ARTIST:
+        artist = sp_link_as_artist(link);
+        if (artist != NULL)
+            return Artist_FromSpotify(artist);
+        break;
+    case SP_LINKTYPE_PLAYLIST:
+    case SP_LINKTYPE_STARRED:
+        if (!g_session)
+            return PyObject_CallFunction(SpotifyError, "s", "Not logged in");
+        playlist = sp_playlist_create(g_session, link);
+        if (playlist != NULL) {
+            result = Playlist_FromSpotify(playlist);
+            sp_playlist_release(playlist);
+            return result;
+        }
+        break;
+    default:
+        return PyObject_CallFunction(SpotifyError, "s",
+                                     "Unsupported link type");
+    }
+    return PyObject_CallFunction(SpotifyError, "s", "Failed to resolve link");
+}
+
+static PyObject *
+Link_resolve_many(PyObject *self, PyObject *args)
+{
+    PyObject *uris, *seq, *list, *item;
+    sp_link *link;
+    Py_ssize_t i, count;
+
+    if (!PyArg_ParseTuple(args, "O", &uris))
+        return NULL;
+    seq = PySequence_Fast(uris, "URIs must be iterable");
+    if (seq == NULL)
+        return NULL;
+    count = PySequence_Fast_GET_SIZE(seq);
+    list = PyList_New(count);
+    if (list == NULL)
+        goto error;
+
+    for (i = 0; i < count; i++) {
+        link = link_from_uri(PySequence_Fast_GET_ITEM(seq, i));
+        if (link == NULL) {
+            if (PyErr_Occurred())
+                goto error;
+            item = PyObject_CallFunction(
+                SpotifyError, "s", "Failed to get link from a Spotify URI");
+        }
+        else {
+            item = resolve_link(link);
+            sp_link_release(link);
+        }
+        if (item == NULL)
+            goto error;
+        PyList_SET_ITEM(list, i, item);
+    }
+    Py_DECREF(seq);
+    return list;
+
+error:
+    Py_XDECREF(list);
+    Py_DECREF(seq);
+    return NULL;
+}
+
+static PyObject *
+Link_classify_many(PyObject *self, PyObject *args)
+{
+    PyObject *uris, *seq, *list, *item;
+    sp_link *link;
+    sp_linktype link_type;
+    Py_ssize_t i, count;
+
+    if (!PyArg_ParseTuple(args, "O", &uris))
+        return NULL;
+    seq = PySequence_Fast(uris, "URIs must be iterable");
+    if (seq == NULL)
+        return NULL;
+    count = PySequence_Fast_GET_SIZE(seq);
+    list = PyList_New(count);
+    if (list == NULL)
+        goto error;
+
+    for (i = 0; i < count; i++) {
+        link = link_from_uri(PySequence_Fast_GET_ITEM(seq, i));
+        if (link == NULL) {
+            if (PyErr_Occurred())
+                goto error;
+            link_type = SP_LINKTYPE_INVALID;
+        }
+        else {
+            link_type = sp_link_type(link);
+            sp_link_release(link);
+        }
+        item = PyInt_FromLong(link_type);
+        if (item == NULL)
+            goto error;
+        PyList_SET_ITEM(list, i, item);
+    }
+    Py_DECREF(seq);
+    return list;
+
+error:
+    Py_XDECREF(list);
+    Py_DECREF(seq);
+    return NULL;
+}
+
 static PyObject *
 Link_str(PyObject *self)
 {
@@ -223,6 +378,14 @@ static PyMethodDef Link_methods[] = {
     {"from_playlist", (PyCFunction)Link_from_playlist, METH_VARARGS | METH_CLASS,
      "Create a new Link object from a Playlist object"
     },
+    {"resolve_many", (PyCFunction)Link_resolve_many, METH_VARARGS | METH_CLASS,
+     "Return the tracks, albums, artists and playlists a sequence of " \
+     "Spotify URIs refer to"
+    },
+    {"classify_many", (PyCFunction)Link_classify_many,
+     METH_VARARGS | METH_CLASS,
+     "Return the link types of a sequence of Spotify URIs"
+    },
     {"type", (PyCFunction)Link_type, METH_NOARGS,
      "Return the type of the link"},
     {"as_playlist", (PyCFunction)Link_as_playlist, METH_NOARGS,
@@ -0,0 +1,419 @@
+#include <Python.h>
+#include <structmember.h>
+#include "libspotify/api.h"
+#include "pyspotify.h"
+#include "profile.h"
+#include "loadbarrier.h"
+#include "track.h"
+#include "album.h"
+#include "artist.h"
+#include "user.h"
+#include "playlist.h"
+#include "image.h"
+
+static LoadBarrier *g_barriers = NULL;
+
+static sp_playlist_callbacks g_playlist_callbacks;
+
+/* Returns 1 if obj is loaded, 0 if not, and -1 with a TypeError set if it
+ * is not of a supported type. */
+static int
+object_is_loaded(PyObject *obj)
+{
+    if (PyObject_TypeCheck(obj, &TrackType))
+        return sp_track_is_loaded(Track_SP_TRACK(obj));
+    if (PyObject_TypeCheck(obj, &AlbumType))
+        return sp_album_is_loaded(Album_SP_ALBUM(obj));
+    if (PyObject_TypeCheck(obj, &ArtistType))
+        return sp_artist_is_loaded(Artist_SP_ARTIST(obj));
+    if (PyObject_TypeCheck(obj, &UserType))
+        return sp_user_is_loaded(User_SP_USER(obj));
+    if (PyObject_TypeCheck(obj, &PlaylistType))
+        return sp_playlist_is_loaded(Playlist_SP_PLAYLIST(obj));
+    if (PyObject_TypeCheck(obj, &ImageType))
+        return sp_image_is_loaded(Image_SP_IMAGE(obj));
+
+    PyErr_Format(PyExc_TypeError, "Cannot wait for %s objects to load",
+                 obj->ob_type->tp_name);
+    return -1;
+}
+
+static void
+barrier_playlist_state_changed(sp_playlist *playlist, void *data);
+
+static void
+barrier_image_loaded(sp_image *image, void *data);
+
+static void
+barrier_register(LoadBarrier *self)
+{
+    PyObject *obj;
+    Py_ssize_t i, index;
+
+    Py_INCREF(self);
+    self->registered = 1;
+    /* Image callbacks may be called from sp_image_add_load_callback() */
+    self->scanning = 1;
+    self->prev = NULL;
+    self->next = g_barriers;
+    if (g_barriers != NULL)
+        g_barriers->prev = self;
+    g_barriers = self;
+
+    for (i = 0; i < self->num_pending; i++) {
+        index = self->pending[i];
+        obj = PyTuple_GET_ITEM(self->objects, index);
+        if (object_is_loaded(obj))
+            continue;
+        if (PyObject_TypeCheck(obj, &PlaylistType)) {
+            sp_playlist_add_callbacks(Playlist_SP_PLAYLIST(obj),
+                                      &g_playlist_callbacks, self);
+            self->watched[index] = 1;
+        }
+        else if (PyObject_TypeCheck(obj, &ImageType)) {
+            sp_image_add_load_callback(Image_SP_IMAGE(obj),
+                                       barrier_image_loaded, self);
+            self->watched[index] = 1;
+        }
+    }
+    self->scanning = 0;
+}
+
+/* Drops the registry's reference to self, which may be the last one. */
+static void
+barrier_unregister(LoadBarrier *self)
+{
+    PyObject *obj;
+    Py_ssize_t i;
+
+    if (!self->registered)
+        return;
+
+    for (i = 0; i < PyTuple_GET_SIZE(self->objects); i++) {
+        if (!self->watched[i])
+            continue;
+        obj = PyTuple_GET_ITEM(self->objects, i);
+        if (PyObject_TypeCheck(obj, &PlaylistType))
+            sp_playlist_remove_callbacks(Playlist_SP_PLAYLIST(obj),
+                                         &g_playlist_callbacks, self);
+        else
+            sp_image_remove_load_callback(Image_SP_IMAGE(obj),
+                                          barrier_image_loaded, self);
+        self->watched[i] = 0;
+    }
+
+    if (self->prev != NULL)
+        self->prev->next = self->next;
+    else
+        g_barriers = self->next;
+    if (self->next != NULL)
+        self->next->prev = self->prev;
+    self->prev = self->next = NULL;
+    self->registered = 0;
+    Py_DECREF(self);
+}
+
+static void
+call_handler(PyObject *handler, PyObject *obj, PyObject *userdata)
+{
+    PyObject *result;
+
+    if (handler == Py_None)
+        return;
+    result = PyObject_CallFunctionObjArgs(handler, obj, userdata, NULL);
+    if (result != NULL)
+        Py_DECREF(result);
+    else
+        write_unraisable(handler);
+}
+
+/* Checks the objects still pending, calling item_callback for each one now
+ * loaded, and callback once they all are. The caller must hold a reference
+ * to self. */
+static void
+barrier_scan(LoadBarrier *self)
+{
+    PyObject *obj;
+    Py_ssize_t i, kept;
+
+    if (self->scanning || self->num_pending == 0)
+        return;
+    self->scanning = 1;
+
+    for (i = kept = 0; i < self->num_pending; i++) {
+        obj = PyTuple_GET_ITEM(self->objects, self->pending[i]);
+        if (object_is_loaded(obj) <= 0)
+            self->pending[kept++] = self->pending[i];
+        else if (!self->cancelled)
+            call_handler(self->item_callback, obj, self->userdata);
+    }
+    self->num_pending = kept;
+
+    self->scanning = 0;
+    if (self->num_pending == 0) {
+        barrier_unregister(self);
+        if (!self->cancelled)
+            call_handler(self->callback, (PyObject *)self, self->userdata);
+    }
+}
+
+void
+load_barrier_rescan_all(void)
+{
+    LoadBarrier *barrier;
+    PyObject *barriers;
+    Py_ssize_t i;
+
+    if (g_barriers == NULL)
+        return;
+
+    /* Handlers may create or cancel barriers, so work on a snapshot */
+    barriers = PyList_New(0);
+    if (barriers == NULL) {
+        PyErr_Clear();
+        return;
+    }
+    for (barrier = g_barriers; barrier != NULL; barrier = barrier->next) {
+        if (PyList_Append(barriers, (PyObject *)barrier) < 0) {
+            PyErr_Clear();
+            break;
+        }
+    }
+    for (i = 0; i < PyList_GET_SIZE(barriers); i++) {
+        barrier = (LoadBarrier *)PyList_GET_ITEM(barriers, i);
+        if (barrier->registered)
+            barrier_scan(barrier);
+    }
+    Py_DECREF(barriers);
+}
+
+static void
+barrier_rescan(void *data, const char *name)
+{
+    LoadBarrier *self = (LoadBarrier *)data;
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, name);
+
+    Py_INCREF(self);
+    barrier_scan(self);
+    Py_DECREF(self);
+
+    profile_gil_release(&profile, gstate);
+}
+
+static void
+barrier_playlist_state_changed(sp_playlist *playlist, void *data)
+{
+    debug_printf(">> load barrier playlist state changed (%p)", data);
+    barrier_rescan(data, "load_barrier_playlist_state_changed");
+}
+
+static void
+barrier_image_loaded(sp_image *image, void *data)
+{
+    debug_printf(">> load barrier image loaded (%p)", data);
+    barrier_rescan(data, "load_barrier_image_loaded");
+}
+
+static PyObject *
+LoadBarrier_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    PyObject *objects, *callback = Py_None, *userdata = Py_None;
+    PyObject *item_callback = Py_None;
+    LoadBarrier *self;
+    Py_ssize_t i, count;
+
+    static char *kwlist[] = {
+        "objects", "callback", "userdata", "item_callback", NULL };
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|OOO", kwlist, &objects,
+                                     &callback, &userdata, &item_callback))
+        return NULL;
+
+    if ((callback != Py_None && !PyCallable_Check(callback)) ||
+            (item_callback != Py_None && !PyCallable_Check(item_callback))) {
+        PyErr_SetString(PyExc_TypeError, "callbacks must be callable");
+        return NULL;
+    }
+
+    self = (LoadBarrier *)type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    self->objects = PySequence_Tuple(objects);
+    if (self->objects == NULL)
+        goto error;
+    count = PyTuple_GET_SIZE(self->objects);
+    self->pending = PyMem_New(Py_ssize_t, count > 0 ? count : 1);
+    self->watched = PyMem_Malloc(count > 0 ? count : 1);
+    if (self->pending == NULL || self->watched == NULL) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    memset(self->watched, 0, count > 0 ? count : 1);
+
+    Py_INCREF(callback);
+    self->callback = callback;
+    Py_INCREF(item_callback);
+    self->item_callback = item_callback;
+    Py_INCREF(userdata);
+    self->userdata = userdata;
+
+    for (i = 0; i < count; i++) {
+        if (object_is_loaded(PyTuple_GET_ITEM(self->objects, i)) < 0)
+            goto error;
+        self->pending[i] = i;
+    }
+    self->num_pending = count;
+
+    if (count == 0) {
+        call_handler(self->callback, (PyObject *)self, self->userdata);
+        return (PyObject *)self;
+    }
+    barrier_register(self);
+    barrier_scan(self);
+    return (PyObject *)self;
+
+error:
+    Py_DECREF(self);
+    return NULL;
+}
+
+static void
+LoadBarrier_dealloc(PyObject *self)
+{
+    LoadBarrier *barrier = (LoadBarrier *)self;
+
+    PyMem_Free(barrier->pending);
+    PyMem_Free(barrier->watched);
+    Py_XDECREF(barrier->objects);
+    Py_XDECREF(barrier->callback);
+    Py_XDECREF(barrier->item_callback);
+    Py_XDECREF(barrier->userdata);
+    self->ob_type->tp_free(self);
+}
+
+static PyObject *
+LoadBarrier_is_done(PyObject *self)
+{
+    return PyBool_FromLong(((LoadBarrier *)self)->num_pending == 0);
+}
+
+static PyObject *
+LoadBarrier_objects(PyObject *self)
+{
+    PyObject *objects = ((LoadBarrier *)self)->objects;
+
+    Py_INCREF(objects);
+    return objects;
+}
+
+static PyObject *
+LoadBarrier_pending(PyObject *self)
+{
+    LoadBarrier *barrier = (LoadBarrier *)self;
+    PyObject *obj, *list;
+    Py_ssize_t i;
+
+    list = PyList_New(barrier->num_pending);
+    if (list == NULL)
+        return NULL;
+    for (i = 0; i < barrier->num_pending; i++) {
+        obj = PyTuple_GET_ITEM(barrier->objects, barrier->pending[i]);
+        Py_INCREF(obj);
+        PyList_SET_ITEM(list, i, obj);
+    }
+    return list;
+}
+
+static PyObject *
+LoadBarrier_rescan(PyObject *self)
+{
+    if (((LoadBarrier *)self)->registered)
+        barrier_scan((LoadBarrier *)self);
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+LoadBarrier_cancel(PyObject *self)
+{
+    ((LoadBarrier *)self)->cancelled = 1;
+    barrier_unregister((LoadBarrier *)self);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef LoadBarrier_methods[] = {
+    {"is_done", (PyCFunction)LoadBarrier_is_done, METH_NOARGS,
+     "True if all the objects are loaded"
+    },
+    {"objects", (PyCFunction)LoadBarrier_objects, METH_NOARGS,
+     "Return the objects waited for, as a tuple"
+    },
+    {"pending", (PyCFunction)LoadBarrier_pending, METH_NOARGS,
+     "Return the objects which are not loaded yet"
+    },
+    {"rescan", (PyCFunction)LoadBarrier_rescan, METH_NOARGS,
+     "Check again the objects which are not loaded yet"
+    },
+    {"cancel", (PyCFunction)LoadBarrier_cancel, METH_NOARGS,
+     "Stop waiting, the callbacks will not be called anymore"
+    },
+    {NULL} /* Sentinel */
+};
+
+static PyMemberDef LoadBarrier_members[] = {
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject LoadBarrierType = {
+    PyObject_HEAD_INIT(NULL)
+    0,                                        /*ob_size*/
+    "spotify.LoadBarrier",                    /*tp_name*/
+    sizeof(LoadBarrier),                      /*tp_basicsize*/
+    0,                                        /*tp_itemsize*/
+    (destructor) LoadBarrier_dealloc,         /*tp_dealloc*/
+    0,                                        /*tp_print*/
+    0,                                        /*tp_getattr*/
+    0,                                        /*tp_setattr*/
+    0,                                        /*tp_compare*/
+    0,                                        /*tp_repr*/
+    0,                                        /*tp_as_number*/
+    0,                                        /*tp_as_sequence*/
+    0,                                        /*tp_as_mapping*/
+    0,                                        /*tp_hash*/
+    0,                                        /*tp_call*/
+    0,                                        /*tp_str*/
+    0,                                        /*tp_getattro*/
+    0,                                        /*tp_setattro*/
+    0,                                        /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,                       /*tp_flags*/
+    "LoadBarrier objects",                    /* tp_doc */
+    0,                                        /* tp_traverse */
+    0,                                        /* tp_clear */
+    0,                                        /* tp_richcompare */
+    0,                                        /* tp_weaklistoffset */
+    0,                                        /* tp_iter */
+    0,                                        /* tp_iternext */
+    LoadBarrier_methods,                      /* tp_methods */
+    LoadBarrier_members,                      /* tp_members */
+    0,                                        /* tp_getset */
+    0,                                        /* tp_base */
+    0,                                        /* tp_dict */
+    0,                                        /* tp_descr_get */
+    0,                                        /* tp_descr_set */
+    0,                                        /* tp_dictoffset */
+    0,                                        /* tp_init */
+    0,                                        /* tp_alloc */
+    LoadBarrier_new,                          /* tp_new */
+};
+
+void
+loadbarrier_init(PyObject *module)
+{
+    g_playlist_callbacks.playlist_state_changed =
+        &barrier_playlist_state_changed;
+
+    if (PyType_Ready(&LoadBarrierType) < 0)
+        return;
+    Py_INCREF(&LoadBarrierType);
+    PyModule_AddObject(module, "LoadBarrier", (PyObject *)&LoadBarrierType);
+}
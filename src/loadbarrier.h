@@ -0,0 +1,37 @@
+#include <Python.h>
+#include "pyspotify.h"
+
+/* Waits for a set of tracks, albums, artists, users, playlists and images to
+ * be loaded.
+ *
+ * Barriers with objects still pending are kept in a registry, each holding a
+ * reference to itself. They are rescanned on metadata_updated, and on the
+ * playlist_state_changed and image load callbacks of their own playlists and
+ * images. Only the objects still pending are checked.
+ */
+typedef struct _LoadBarrier {
+    PyObject_HEAD
+    PyObject *objects;
+    /* Indices in objects of the objects not loaded yet, in order */
+    Py_ssize_t *pending;
+    Py_ssize_t num_pending;
+    /* Whether a playlist or image callback was added for each object */
+    char *watched;
+    PyObject *callback;
+    PyObject *item_callback;
+    PyObject *userdata;
+    int registered;
+    int scanning;
+    int cancelled;
+    struct _LoadBarrier *prev;
+    struct _LoadBarrier *next;
+} LoadBarrier;
+
+extern PyTypeObject LoadBarrierType;
+
+/* Rescans all registered barriers. Must be called with the GIL held. */
+void
+load_barrier_rescan_all(void);
+
+extern void
+loadbarrier_init(PyObject *module);
@@ -4,8 +4,10 @@
  *
 */
 #include <Python.h>
+#include <dlfcn.h>
 #include <stdio.h>
 #include <string.h>
+#include <stdint.h>
 #include <libspotify/api.h>
 #include <libmockspotify.h>
 #include "pyspotify.h"
@@ -13,11 +15,16 @@
 #include "albumbrowser.h"
 #include "artist.h"
 #include "artistbrowser.h"
+#include "audioring.h"
+#include "loadbarrier.h"
+#include "seqiter.h"
 #include "image.h"
 #include "link.h"
 #include "playlist.h"
 #include "playlistcontainer.h"
 #include "playlistfolder.h"
+#include "profile.h"
+#include "intern.h"
 #include "search.h"
 #include "session.h"
 #include "track.h"
@@ -29,6 +36,217 @@
 PyObject *SpotifyError;
 PyObject *SpotifyApiVersion;
 
+/************************* HELD SEARCH COMPLETIONS *************************/
+
+/* libmockspotify completes searches from within sp_search_create(). To test
+ * searches in flight, sp_search_create() is wrapped here, shadowing the one
+ * from libmockspotify, and completions can be queued until released. */
+
+typedef struct held_search {
+    sp_search *search;
+    search_complete_cb *callback;
+    void *userdata;
+    struct held_search *next;
+} held_search;
+
+typedef sp_search *(search_create_func)(sp_session *, const char *, int, int,
+                                        int, int, int, int, int, int,
+                                        sp_search_type, search_complete_cb *,
+                                        void *);
+
+static int g_hold_searches = 0;
+static held_search *g_held_searches = NULL;
+/* Offsets and counts of the last search created */
+static int g_last_search_params[8];
+
+static void
+mock_search_complete(sp_search *search, void *userdata)
+{
+    held_search *held = (held_search *)userdata;
+    held_search **link;
+
+    if (g_hold_searches) {
+        held->search = search;
+        for (link = &g_held_searches; *link; link = &(*link)->next)
+            ;
+        *link = held;
+        return;
+    }
+    held->callback(search, held->userdata);
+    free(held);
+}
+
+sp_search *
+sp_search_create(sp_session *session, const char *query, int track_offset,
+                 int track_count, int album_offset, int album_count,
+                 int artist_offset, int artist_count, int playlist_offset,
+                 int playlist_count, sp_search_type search_type,
+                 search_complete_cb *callback, void *userdata)
+{
+    static search_create_func *create = NULL;
+    held_search *held;
+
+    if (create == NULL)
+        create = (search_create_func *)dlsym(RTLD_NEXT, "sp_search_create");
+    /* Without the GIL, so not with PyMem_Malloc() */
+    held = malloc(sizeof(held_search));
+    if (create == NULL || held == NULL) {
+        free(held);
+        return NULL;
+    }
+    held->search = NULL;
+    held->callback = callback;
+    held->userdata = userdata;
+    held->next = NULL;
+    g_last_search_params[0] = track_offset;
+    g_last_search_params[1] = track_count;
+    g_last_search_params[2] = album_offset;
+    g_last_search_params[3] = album_count;
+    g_last_search_params[4] = artist_offset;
+    g_last_search_params[5] = artist_count;
+    g_last_search_params[6] = playlist_offset;
+    g_last_search_params[7] = playlist_count;
+    return create(session, query, track_offset, track_count, album_offset,
+                  album_count, artist_offset, artist_count, playlist_offset,
+                  playlist_count, search_type, mock_search_complete, held);
+}
+
+/******************************** LOADING **********************************/
+
+/* Like sp_search_create(), the functions below shadow libmockspotify to let
+ * the tests load objects after they were created: mock_set_loaded()
+ * overrides whether an object is loaded, mock_image_loaded() calls the load
+ * callbacks of an image and mock_metadata_updated() calls the
+ * metadata_updated callback of the session. */
+
+#define MAX_LOADED_OVERRIDES 32
+
+typedef struct loaded_override {
+    void *object;
+    int loaded;
+} loaded_override;
+
+typedef struct image_load_callback {
+    sp_image *image;
+    image_loaded_cb *callback;
+    void *userdata;
+    int called;
+    struct image_load_callback *next;
+} image_load_callback;
+
+typedef sp_error (session_create_func)(const sp_session_config *,
+                                       sp_session **);
+
+static loaded_override g_loaded_overrides[MAX_LOADED_OVERRIDES];
+static int g_num_loaded_overrides = 0;
+static image_load_callback *g_image_callbacks = NULL;
+static const sp_session_callbacks *g_session_callbacks = NULL;
+
+/* Returns the loaded state set for object, or -1 if there is none */
+static int
+get_loaded_override(void *object)
+{
+    int i;
+
+    for (i = 0; i < g_num_loaded_overrides; i++) {
+        if (g_loaded_overrides[i].object == object)
+            return g_loaded_overrides[i].loaded;
+    }
+    return -1;
+}
+
+static int
+set_loaded_override(void *object, int loaded)
+{
+    int i;
+
+    for (i = 0; i < g_num_loaded_overrides; i++) {
+        if (g_loaded_overrides[i].object == object)
+            break;
+    }
+    if (i == MAX_LOADED_OVERRIDES) {
+        PyErr_SetString(SpotifyError, "too many objects with a loaded state");
+        return -1;
+    }
+    if (i == g_num_loaded_overrides)
+        g_num_loaded_overrides++;
+    g_loaded_overrides[i].object = object;
+    g_loaded_overrides[i].loaded = loaded;
+    return 0;
+}
+
+#define SHADOW_IS_LOADED(kind)                                              \
+bool                                                                        \
+sp_##kind##_is_loaded(sp_##kind *kind)                                      \
+{                                                                           \
+    static bool (*is_loaded)(sp_##kind *) = NULL;                          \
+    int loaded = get_loaded_override(kind);                                 \
+                                                                            \
+    if (loaded >= 0)                                                        \
+        return loaded;                                                      \
+    if (is_loaded == NULL)                                                  \
+        is_loaded = (bool (*)(sp_##kind *))dlsym(RTLD_NEXT,                \
+                                                 "sp_" #kind "_is_loaded"); \
+    return is_loaded != NULL && is_loaded(kind);                            \
+}
+
+SHADOW_IS_LOADED(track)
+SHADOW_IS_LOADED(album)
+SHADOW_IS_LOADED(artist)
+SHADOW_IS_LOADED(user)
+SHADOW_IS_LOADED(playlist)
+SHADOW_IS_LOADED(image)
+
+sp_error
+sp_image_add_load_callback(sp_image *image, image_loaded_cb *callback,
+                           void *userdata)
+{
+    image_load_callback *entry;
+
+    /* Without the GIL, so not with PyMem_Malloc() */
+    entry = malloc(sizeof(image_load_callback));
+    if (entry == NULL)
+        return SP_ERROR_OTHER_TRANSIENT;
+    entry->image = image;
+    entry->callback = callback;
+    entry->userdata = userdata;
+    entry->called = 0;
+    entry->next = g_image_callbacks;
+    g_image_callbacks = entry;
+    return SP_ERROR_OK;
+}
+
+sp_error
+sp_image_remove_load_callback(sp_image *image, image_loaded_cb *callback,
+                              void *userdata)
+{
+    image_load_callback *entry, **link;
+
+    for (link = &g_image_callbacks; (entry = *link) != NULL;
+         link = &entry->next) {
+        if (entry->image == image && entry->callback == callback
+            && entry->userdata == userdata) {
+            *link = entry->next;
+            free(entry);
+            return SP_ERROR_OK;
+        }
+    }
+    return SP_ERROR_INVALID_INDATA;
+}
+
+sp_error
+sp_session_create(const sp_session_config *config, sp_session **sess)
+{
+    static session_create_func *create = NULL;
+
+    if (create == NULL)
+        create = (session_create_func *)dlsym(RTLD_NEXT, "sp_session_create");
+    if (create == NULL)
+        return SP_ERROR_OTHER_PERMANENT;
+    g_session_callbacks = config->callbacks;
+    return create(config, sess);
+}
+
 /***************************** MOCK EVENT GENERATION ***************************/
 
 PyObject *
@@ -654,6 +872,8 @@ PyObject *
 mock_registry_clean(PyObject *self)
 {
     registry_clean();
+    /* Objects may be allocated again at the same addresses */
+    g_num_loaded_overrides = 0;
     Py_RETURN_NONE;
 }
 
@@ -680,6 +900,160 @@ mock_set_current_session(PyObject *self, PyObject *args, PyObject *kwds)
 
 /************************* MODULE INITIALISATION ****************************/
 
+/// Hold the completion of searches until they are released
+PyObject *
+mock_hold_search_completions(PyObject *self, PyObject *args)
+{
+    PyObject *hold;
+    int hold_value;
+
+    if (!PyArg_ParseTuple(args, "O", &hold))
+        return NULL;
+    hold_value = PyObject_IsTrue(hold);
+    if (hold_value < 0)
+        return NULL;
+    g_hold_searches = hold_value;
+    Py_RETURN_NONE;
+}
+
+/// Complete the held searches, returning how many there were
+PyObject *
+mock_release_search_completions(PyObject *self)
+{
+    held_search *held;
+    int count = 0;
+
+    while ((held = g_held_searches) != NULL) {
+        g_held_searches = held->next;
+        held->callback(held->search, held->userdata);
+        free(held);
+        count++;
+    }
+    return Py_BuildValue("i", count);
+}
+
+/// Return the offsets and counts of the last search created
+PyObject *
+mock_last_search_params(PyObject *self)
+{
+    int *params = g_last_search_params;
+
+    return Py_BuildValue("{s:i,s:i,s:i,s:i,s:i,s:i,s:i,s:i}",
+                         "track_offset", params[0], "track_count", params[1],
+                         "album_offset", params[2], "album_count", params[3],
+                         "artist_offset", params[4], "artist_count", params[5],
+                         "playlist_offset", params[6],
+                         "playlist_count", params[7]);
+}
+
+/// Override whether a track, album, artist, user, playlist or image is loaded
+PyObject *
+mock_set_loaded(PyObject *self, PyObject *args)
+{
+    PyObject *obj, *loaded;
+    void *object;
+    int loaded_value;
+
+    if (!PyArg_ParseTuple(args, "OO", &obj, &loaded))
+        return NULL;
+
+    if (PyObject_TypeCheck(obj, &TrackType))
+        object = Track_SP_TRACK(obj);
+    else if (PyObject_TypeCheck(obj, &AlbumType))
+        object = Album_SP_ALBUM(obj);
+    else if (PyObject_TypeCheck(obj, &ArtistType))
+        object = Artist_SP_ARTIST(obj);
+    else if (PyObject_TypeCheck(obj, &UserType))
+        object = User_SP_USER(obj);
+    else if (PyObject_TypeCheck(obj, &PlaylistType))
+        object = Playlist_SP_PLAYLIST(obj);
+    else if (PyObject_TypeCheck(obj, &ImageType))
+        object = Image_SP_IMAGE(obj);
+    else {
+        PyErr_Format(PyExc_TypeError, "Cannot load %s objects",
+                     obj->ob_type->tp_name);
+        return NULL;
+    }
+
+    loaded_value = PyObject_IsTrue(loaded);
+    if (loaded_value < 0)
+        return NULL;
+    if (set_loaded_override(object, loaded_value) < 0)
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+/// Mark an image as loaded and call its load callbacks
+PyObject *
+mock_image_loaded(PyObject *self, PyObject *args)
+{
+    PyObject *image;
+    image_load_callback *entry;
+    sp_image *sp_image;
+
+    if (!PyArg_ParseTuple(args, "O!", &ImageType, &image))
+        return NULL;
+    sp_image = Image_SP_IMAGE(image);
+    if (set_loaded_override(sp_image, 1) < 0)
+        return NULL;
+
+    for (entry = g_image_callbacks; entry != NULL; entry = entry->next)
+        entry->called = 0;
+    /* Callbacks may remove themselves, so start over after each one */
+    entry = g_image_callbacks;
+    while (entry != NULL) {
+        if (entry->image == sp_image && !entry->called) {
+            entry->called = 1;
+            entry->callback(sp_image, entry->userdata);
+            entry = g_image_callbacks;
+        }
+        else
+            entry = entry->next;
+    }
+    Py_RETURN_NONE;
+}
+
+/// Call the metadata_updated callback of the current session
+PyObject *
+mock_metadata_updated(PyObject *self)
+{
+    if (g_session_callbacks == NULL
+        || g_session_callbacks->metadata_updated == NULL) {
+        PyErr_SetString(SpotifyError, "no session was created");
+        return NULL;
+    }
+    g_session_callbacks->metadata_updated(g_session);
+    Py_RETURN_NONE;
+}
+
+/// Write frames to an AudioRing as music_delivery does
+PyObject *
+mock_audio_ring_write(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *ring;
+    sp_audioformat format;
+    const char *frames;
+    int size, channels, sample_rate, frame_size;
+
+    static char *kwlist[] =
+        {"ring", "frames", "channels", "sample_rate", NULL};
+
+    channels = 2;
+    sample_rate = 44100;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!s#|ii", kwlist,
+                                     &AudioRingType, &ring, &frames, &size,
+                                     &channels, &sample_rate))
+        return NULL;
+
+    format.sample_type = SP_SAMPLETYPE_INT16_NATIVE_ENDIAN;
+    format.sample_rate = sample_rate;
+    format.channels = channels;
+    frame_size = channels * (int)sizeof(int16_t);
+    return Py_BuildValue("i", audio_ring_write(AudioRing_RING(ring), &format,
+                                               frame_size, frames,
+                                               size / frame_size));
+}
+
 static PyMethodDef module_methods[] = {
     {"mock_track", (PyCFunction)mock_track,
         METH_VARARGS | METH_KEYWORDS, "Create a mock track"},
@@ -707,12 +1081,30 @@ static PyMethodDef module_methods[] = {
         METH_VARARGS | METH_KEYWORDS, "Set the current session."},
     {"mock_event_trigger", event_trigger,
         METH_VARARGS, "Triggers an event"},
+    {"mock_hold_search_completions", mock_hold_search_completions,
+        METH_VARARGS, "Hold the completion of searches."},
+    {"mock_release_search_completions",
+        (PyCFunction)mock_release_search_completions,
+        METH_NOARGS, "Complete the held searches."},
+    {"mock_last_search_params", (PyCFunction)mock_last_search_params,
+        METH_NOARGS, "Return the offsets and counts of the last search."},
+    {"mock_set_loaded", mock_set_loaded,
+        METH_VARARGS, "Override whether an object is loaded."},
+    {"mock_image_loaded", mock_image_loaded,
+        METH_VARARGS, "Load an image, calling its load callbacks."},
+    {"mock_metadata_updated", (PyCFunction)mock_metadata_updated,
+        METH_NOARGS, "Call the metadata_updated session callback."},
+    {"mock_audio_ring_write", (PyCFunction)mock_audio_ring_write,
+        METH_VARARGS | METH_KEYWORDS,
+        "Write frames to an AudioRing as music_delivery does."},
     {"mock_user", (PyCFunction)mock_user,
         METH_VARARGS | METH_KEYWORDS, "Create a mock user."},
     {"registry_add", (PyCFunction)mock_registry_add,
         METH_VARARGS | METH_KEYWORDS, "Add an object to the mock registry."},
     {"registry_clean", (PyCFunction)mock_registry_clean,
-        METH_NOARGS, "Delete all the objects from the mock registry."},
+        METH_NOARGS,
+        "Delete all the objects from the mock registry, and forget the "
+        "loaded states set with mock_set_loaded()."},
     {NULL, NULL, 0, NULL}
 };
 
@@ -766,10 +1158,15 @@ init_mockspotify(void)
     albumbrowser_init(m);
     artist_init(m);
     artistbrowser_init(m);
+    audioring_init(m);
+    loadbarrier_init(m);
+    seqiter_init(m);
     link_init(m);
     playlist_init(m);
     playlistcontainer_init(m);
     playlistfolder_init(m);
+    profile_init(m);
+    intern_init(m);
     session_init(m);
     search_init(m);
     track_init(m);
@@ -3,6 +3,9 @@
 #include "libspotify/api.h"
 #include "pyspotify.h"
 #include "artist.h"
+#include "audioring.h"
+#include "loadbarrier.h"
+#include "seqiter.h"
 #include "artistbrowser.h"
 #include "album.h"
 #include "albumbrowser.h"
@@ -10,11 +13,13 @@
 #include "playlist.h"
 #include "playlistcontainer.h"
 #include "playlistfolder.h"
+#include "profile.h"
 #include "search.h"
 #include "session.h"
 #include "toplistbrowser.h"
 #include "track.h"
 #include "image.h"
+#include "intern.h"
 #include "user.h"
 
 PyObject *SpotifyError;
@@ -73,6 +78,9 @@ init_spotify(void)
     /* TODO: figure out if we can remove this in favour of generic helper? */
     /* TODO: figure out if PyType_Ready needs to be both in _init and above? */
     album_init(module);
+    audioring_init(module);
+    loadbarrier_init(module);
+    seqiter_init(module);
     albumbrowser_init(module);
     artist_init(module);
     artistbrowser_init(module);
@@ -80,10 +88,12 @@ init_spotify(void)
     playlist_init(module);
     playlistcontainer_init(module);
     playlistfolder_init(module);
+    profile_init(module);
     session_init(module);
     search_init(module);
     toplistbrowser_init(module);
     track_init(module);
     image_init(module);
+    intern_init(module);
     user_init(module);
 }
@@ -2,21 +2,65 @@
 #include <structmember.h>
 #include <libspotify/api.h>
 #include "pyspotify.h"
+#include "seqiter.h"
+#include "profile.h"
 #include "playlist.h"
+#include "intern.h"
+#include "cbtable.h"
+#include "snapshot.h"
 #include "track.h"
 #include "session.h"
 #include "user.h"
 
-/* This is the playlist callbacks table.
- *
- * It is a linked list of entries keeping enough information into pyspotify
- * to be able to remove the callbacks after a while, especially when dealing
- * with a different python Playlist object than the one the callbacks were
- * added from. Each entry corresponds to a spotify playlist on which
- * callbacks have been added. When all callbacks are removed from a playlist,
- * the entry is free'd from memory.
- */
-static pl_cb_entry *playlist_callbacks_table = NULL;
+/* This is the playlist callbacks table, see cbtable.h. Each entry holds a
+ * reference to its playlist, released once all its callbacks are removed. */
+static cb_table playlist_callbacks_table = CB_TABLE_INIT;
+
+/* Events of the playlist callbacks, in the order of their handlers in the
+ * tuple of a combined registration, see Playlist_add_callbacks() */
+enum {
+    PLAYLIST_EVENT_TRACKS_ADDED,
+    PLAYLIST_EVENT_TRACKS_REMOVED,
+    PLAYLIST_EVENT_TRACKS_MOVED,
+    PLAYLIST_EVENT_RENAMED,
+    PLAYLIST_EVENT_STATE_CHANGED,
+    PLAYLIST_EVENT_UPDATE_IN_PROGRESS,
+    PLAYLIST_EVENT_METADATA_UPDATED,
+    PLAYLIST_EVENT_TRACK_CREATED_CHANGED,
+    PLAYLIST_EVENT_TRACK_MESSAGE_CHANGED,
+    PLAYLIST_EVENT_TRACK_SEEN_CHANGED,
+    PLAYLIST_EVENT_DESCRIPTION_CHANGED,
+    PLAYLIST_EVENT_IMAGE_CHANGED,
+    PLAYLIST_EVENT_SUBSCRIBERS_CHANGED,
+    NUM_PLAYLIST_EVENTS
+};
+
+static const char *playlist_event_names[NUM_PLAYLIST_EVENTS] = {
+    "tracks_added",
+    "tracks_removed",
+    "tracks_moved",
+    "playlist_renamed",
+    "playlist_state_changed",
+    "playlist_update_in_progress",
+    "playlist_metadata_updated",
+    "track_created_changed",
+    "track_message_changed",
+    "track_seen_changed",
+    "description_changed",
+    "image_changed",
+    "subscribers_changed",
+};
+
+/* Returns the Python callable handling event for trampoline. Its callback is
+ * either that callable, or the (owner, handler, ...) tuple of a combined
+ * registration. */
+static PyObject *
+event_callback(Callback *trampoline, int event)
+{
+    if (PyTuple_Check(trampoline->callback))
+        return PyTuple_GET_ITEM(trampoline->callback, event + 1);
+    return trampoline->callback;
+}
 
 /* Mallocs and memsets a new sp_playlist_callbacks structure. */
 static sp_playlist_callbacks *
@@ -27,101 +71,8 @@ create_and_initialize_callbacks(void) {
     return callbacks;
 }
 
-/* TODO: cleanup table add and remove */
-static void
-pl_callbacks_table_add(Playlist * pl, playlist_callback * cb)
-{
-    pl_cb_entry *curr, *entry = NULL;
-
-    /* Look for an existing entry for this playlist */
-    curr = playlist_callbacks_table;
-    while (curr) {
-        if (curr->playlist == pl->_playlist) {
-            entry = curr;
-            break;
-        }
-        curr = curr->next;
-    }
-    /* Update callbacks entry */
-    if (entry) {
-        cb->next = entry->callbacks;
-        entry->callbacks = cb;
-    }
-    else {
-        cb->next = NULL;
-        /* TODO: switch to PyMem_Malloc and audit for coresponding free */
-        entry = malloc(sizeof(pl_cb_entry));
-        sp_playlist_add_ref(pl->_playlist);
-        entry->playlist = pl->_playlist;
-        entry->callbacks = cb;
-        entry->next = playlist_callbacks_table;
-        playlist_callbacks_table = entry;
-    }
-}
-
-static playlist_callback *
-pl_callbacks_table_remove(Playlist *pl,
-                          PyObject *callback, PyObject *userdata)
-{
-    pl_cb_entry *e_prev = NULL, *e_curr, *entry = NULL;
-    playlist_callback *c_prev = NULL, *c_curr;
-    playlist_callback *result = NULL;
-    PyObject *code1, *code2;
-
-    /* Look for an existing entry for this playlist */
-    e_curr = playlist_callbacks_table;
-    while (e_curr) {
-        if (e_curr->playlist == pl->_playlist) {
-            entry = e_curr;
-            break;
-        }
-        e_prev = e_curr;
-        e_curr = e_curr->next;
-    }
-    /* Update callbacks entry */
-    if (!entry) {
-        return NULL;
-    }
-    else {
-        c_curr = entry->callbacks;
-        while (c_curr) {
-            /* Note: a sole Python function can be represented by several
-             * Python Function objects. However, to each function corresponds
-             * an unique Code object.
-             */
-            PyObject *tmp1 = as_function(c_curr->trampoline->callback);
-            PyObject *tmp2 = as_function(callback);
-            code1 = PyFunction_GetCode(tmp1);
-            code2 = PyFunction_GetCode(tmp2);
-            if (code1 == code2 && c_curr->trampoline->userdata == userdata) {
-                result = c_curr;
-                if (c_prev) {
-                    c_prev->next = c_curr->next;
-                }
-                else {
-                    entry->callbacks = c_curr->next;
-                };
-                break;
-            }
-            c_prev = c_curr;
-            c_curr = c_curr->next;
-        }
-    }
-    if (!result)
-        return NULL;
-    /* Cleanup */
-    if (!entry->callbacks) {
-        if (e_prev) {
-            e_prev->next = entry->next;
-        }
-        else {
-            playlist_callbacks_table = entry->next;
-        }
-        sp_playlist_release(entry->playlist);
-        free(entry);
-    }
-    return result;
-}
+/* The live playlist wrappers, by sp_playlist pointer, see intern.h */
+static intern_table playlist_wrappers = INTERN_TABLE_INIT;
 
 static PyObject *
 Playlist_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
@@ -134,22 +85,46 @@ Playlist_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 PyObject *
 Playlist_FromSpotify(sp_playlist *playlist)
 {
-    PyObject *self = PlaylistType.tp_alloc(&PlaylistType, 0);
+    PyObject *self = intern_lookup(&playlist_wrappers, playlist);
+
+    if (self != NULL)
+        return self;
+    self = PlaylistType.tp_alloc(&PlaylistType, 0);
     Playlist_SP_PLAYLIST(self) = playlist;
     sp_playlist_add_ref(playlist);
     /* TODO: move to helper for setting playlist defaults */
     sp_playlist_set_autolink_tracks(playlist, 1);
+    intern_add(&playlist_wrappers, playlist, self);
     return self;
 }
 
 static void
 Playlist_dealloc(PyObject *self)
 {
+    intern_remove(&playlist_wrappers, Playlist_SP_PLAYLIST(self), self);
+    if (((Playlist *)self)->weakreflist != NULL)
+        PyObject_ClearWeakRefs(self);
     if (Playlist_SP_PLAYLIST(self) != NULL)
         sp_playlist_release(Playlist_SP_PLAYLIST(self));
     self->ob_type->tp_free(self);
 }
 
+static long
+Playlist_hash(PyObject *self)
+{
+    return sp_hash(Playlist_SP_PLAYLIST(self));
+}
+
+static PyObject *
+Playlist_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyObject_TypeCheck(other, &PlaylistType)) {
+        Py_INCREF(Py_NotImplemented);
+        return Py_NotImplemented;
+    }
+    return sp_richcompare(Playlist_SP_PLAYLIST(self), Playlist_SP_PLAYLIST(other), op);
+}
+
 static PyObject *
 Playlist_is_loaded(PyObject *self)
 {
@@ -204,46 +179,82 @@ Playlist_remove_tracks(PyObject *self, PyObject *args)
     return none_or_raise_error(error);
 }
 
-/* TODO: cleanup add and remove callback */
+/* Registers playlist_callbacks with a trampoline for callback and userdata.
+ * playlist_callbacks is freed if this fails. */
+static PyObject *
+add_callbacks(PyObject *self, PyObject *callback, PyObject *userdata,
+              sp_playlist_callbacks *playlist_callbacks)
+{
+    Callback *trampoline;
+    sp_playlist *playlist = Playlist_SP_PLAYLIST(self);
+    int created;
+
+    trampoline = create_trampoline(callback, userdata);
+    if (trampoline == NULL)
+        goto error;
+
+    created = cb_table_add(&playlist_callbacks_table, playlist,
+                           playlist_callbacks, trampoline);
+    if (created < 0) {
+        delete_trampoline(trampoline);
+        goto error;
+    }
+    if (created)
+        sp_playlist_add_ref(playlist);
+
+    debug_printf("adding callback (%p,%p) py(%p,%p)",
+                 playlist_callbacks, trampoline, trampoline->callback,
+                 trampoline->userdata);
+
+    sp_playlist_add_callbacks(playlist, playlist_callbacks, (void *)trampoline);
+    Py_RETURN_NONE;
+
+error:
+    free(playlist_callbacks);
+    return NULL;
+}
+
 static PyObject *
 Playlist_add_callback(PyObject *self, PyObject *args, sp_playlist_callbacks *playlist_callbacks)
 {
     PyObject *callback, *userdata = NULL;
-    Callback *trampoline;
-    playlist_callback *entry;
 
-    if (!PyArg_ParseTuple(args, "O|O", &callback, &userdata))
+    if (!PyArg_ParseTuple(args, "O|O", &callback, &userdata)) {
+        free(playlist_callbacks);
         return NULL;
+    }
 
     if (!PyCallable_Check(callback)) {
         PyErr_SetString(PyExc_TypeError,
                         "callback argument must be of function or method type");
+        free(playlist_callbacks);
         return NULL;
     }
 
-    trampoline = create_trampoline(callback, userdata);
+    return add_callbacks(self, callback, userdata, playlist_callbacks);
+}
 
-    /* TODO: switch to PyMem_Malloc and audit for coresponding free */
-    /* TODO: extract to helper */
-    entry = malloc(sizeof(playlist_callback));
-    entry->callback = playlist_callbacks;
-    entry->trampoline = trampoline;
-    pl_callbacks_table_add((Playlist *)self, entry);
+/* Removes the registration from the playlist and frees it */
+static void
+remove_registration(sp_playlist *playlist, cb_registration *reg)
+{
+    debug_printf("removing callback (%p,%p)", reg->callbacks,
+                 reg->trampoline);
 
-    debug_printf("adding callback (%p,%p) py(%p,%p)",
-                 playlist_callbacks, trampoline, trampoline->callback,
-                 trampoline->userdata);
+    sp_playlist_remove_callbacks(playlist, reg->callbacks, reg->trampoline);
 
-    sp_playlist_add_callbacks(
-        Playlist_SP_PLAYLIST(self), playlist_callbacks, (void *)trampoline);
-    Py_RETURN_NONE;
+    delete_trampoline(reg->trampoline);
+    free(reg->callbacks);
+    PyMem_Free(reg);
 }
 
 static PyObject *
 Playlist_remove_callback(PyObject *self, PyObject *args)
 {
     PyObject *callback, *userdata = NULL;
-    playlist_callback *entry;
+    sp_playlist *playlist = Playlist_SP_PLAYLIST(self);
+    cb_registration *reg;
+    int emptied;
 
     if (!PyArg_ParseTuple(args, "O|O", &callback, &userdata))
         return NULL;
@@ -255,28 +266,48 @@ Playlist_remove_callback(PyObject *self, PyObject *args)
         userdata = Py_None;
     }
 
-    if (!(callback = as_function(callback)))
-        return NULL;
-
     debug_printf("looking for callback py(%p,%p)", callback, userdata);
-    entry = pl_callbacks_table_remove((Playlist *)self, callback, userdata);
+    reg = cb_table_remove(&playlist_callbacks_table, playlist, callback,
+                          userdata, &emptied);
 
-    if (entry == NULL) {
+    if (reg == NULL) {
         PyErr_SetString(SpotifyError, "This callback was not added");
         return NULL;
     }
 
-    debug_printf("removing callback (%p,%p)", entry->callback,
-                 entry->trampoline);
+    remove_registration(playlist, reg);
+    if (emptied)
+        sp_playlist_release(playlist);
+
+    Py_RETURN_NONE;
+}
 
-    sp_playlist_remove_callbacks(Playlist_SP_PLAYLIST(self), entry->callback,
-                                 entry->trampoline);
+static PyObject *
+Playlist_remove_all_callbacks(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *owner = NULL;
+    sp_playlist *playlist = Playlist_SP_PLAYLIST(self);
+    cb_registration *reg, *next;
+    int emptied, count = 0;
 
-    delete_trampoline(entry->trampoline);
-    free(entry->callback);
-    free(entry);
+    static char *kwlist[] = {"owner", NULL};
 
-    Py_RETURN_NONE;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &owner))
+        return NULL;
+    if (owner == Py_None)
+        owner = NULL;
+
+    reg = cb_table_remove_all(&playlist_callbacks_table, playlist, owner,
+                              &emptied);
+    for (; reg; reg = next) {
+        next = reg->next;
+        remove_registration(playlist, reg);
+        count++;
+    }
+    if (emptied)
+        sp_playlist_release(playlist);
+
+    return PyInt_FromLong(count);
 }
 
 void
@@ -287,7 +318,11 @@ playlist_tracks_added_callback(sp_playlist *playlist, sp_track *const *tracks,
 
     int i;
     PyObject *result, *self, *py_tracks;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_tracks_added");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACKS_ADDED);
 
     self = Playlist_FromSpotify(playlist);
     py_tracks = PyList_New(num_tracks);
@@ -300,15 +335,15 @@ playlist_tracks_added_callback(sp_playlist *playlist, sp_track *const *tracks,
         PyList_SET_ITEM(py_tracks, i, track);
     }
 
-    result = PyObject_CallFunction(trampoline->callback, "NNiO", self,
+    result = PyObject_CallFunction(callback, "NNiO", self,
                                    py_tracks, position, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -327,7 +362,11 @@ playlist_tracks_removed_callback(
 
     int i;
     PyObject *result, *self, *removed;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_tracks_removed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACKS_REMOVED);
 
     self = Playlist_FromSpotify(playlist);
     removed = PyList_New(num_tracks);
@@ -336,15 +375,15 @@ playlist_tracks_removed_callback(
         PyList_SET_ITEM(removed, i, Py_BuildValue("i", tracks[i]));
     }
 
-    result = PyObject_CallFunction(trampoline->callback, "NNO", self,
+    result = PyObject_CallFunction(callback, "NNO", self,
                                    removed, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -364,7 +403,11 @@ playlist_tracks_moved_callback(
 
     int i;
     PyObject *result, *self, *moved;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_tracks_moved");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACKS_MOVED);
 
     self = Playlist_FromSpotify(playlist);
     moved = PyList_New(num_tracks);
@@ -373,15 +416,15 @@ playlist_tracks_moved_callback(
         PyList_SET_ITEM(moved, i, Py_BuildValue("i", tracks[i]));
     }
 
-    result = PyObject_CallFunction(trampoline->callback, "NNiO", self,
+    result = PyObject_CallFunction(callback, "NNiO", self,
                                    moved, new_position, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -392,31 +435,62 @@ Playlist_add_tracks_moved_callback(PyObject *self, PyObject *args)
     return Playlist_add_callback(self, args, callbacks);
 }
 
-void
-playlist_simple_callback(sp_playlist *playlist, void *data)
+static void
+playlist_simple_callback(sp_playlist *playlist, void *data, int event,
+                         const char *name)
 {
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, name);
+    PyObject *callback = event_callback(trampoline, event);
 
     self = Playlist_FromSpotify(playlist);
-    result = PyObject_CallFunction(trampoline->callback, "NO", self,
+    result = PyObject_CallFunction(callback, "NO", self,
                                    trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
+}
+
+void
+playlist_renamed_callback(sp_playlist *playlist, void *data)
+{
+    playlist_simple_callback(playlist, data, PLAYLIST_EVENT_RENAMED,
+                             "playlist_renamed");
+}
+
+void
+playlist_state_changed_callback(sp_playlist *playlist, void *data)
+{
+    playlist_simple_callback(playlist, data, PLAYLIST_EVENT_STATE_CHANGED,
+                             "playlist_state_changed");
+}
+
+void
+playlist_metadata_updated_callback(sp_playlist *playlist, void *data)
+{
+    playlist_simple_callback(playlist, data, PLAYLIST_EVENT_METADATA_UPDATED,
+                             "playlist_metadata_updated");
+}
+
+void
+playlist_subscribers_changed_callback(sp_playlist *playlist, void *data)
+{
+    playlist_simple_callback(playlist, data, PLAYLIST_EVENT_SUBSCRIBERS_CHANGED,
+                             "playlist_subscribers_changed");
 }
 
 static PyObject *
 Playlist_add_playlist_renamed_callback(PyObject *self, PyObject *args)
 {
     sp_playlist_callbacks *callbacks = create_and_initialize_callbacks();
-    callbacks->playlist_renamed = &playlist_simple_callback;
+    callbacks->playlist_renamed = &playlist_renamed_callback;
     return Playlist_add_callback(self, args, callbacks);
 }
 
@@ -424,7 +498,7 @@ static PyObject *
 Playlist_add_playlist_state_changed_callback(PyObject *self, PyObject *args)
 {
     sp_playlist_callbacks *callbacks = create_and_initialize_callbacks();
-    callbacks->playlist_state_changed = &playlist_simple_callback;
+    callbacks->playlist_state_changed = &playlist_state_changed_callback;
     return Playlist_add_callback(self, args, callbacks);
 }
 
@@ -434,19 +508,23 @@ playlist_update_in_progress_callback(sp_playlist *playlist, bool done, void *dat
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_update_in_progress");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_UPDATE_IN_PROGRESS);
 
     self = Playlist_FromSpotify(playlist);
-    result = PyObject_CallFunction(trampoline->callback, "NOO", self,
+    result = PyObject_CallFunction(callback, "NOO", self,
                                    done ? Py_True : Py_False,
                                    trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -461,7 +539,7 @@ static PyObject *
 Playlist_add_playlist_metadata_updated_callback(PyObject *self, PyObject *args)
 {
     sp_playlist_callbacks *callbacks = create_and_initialize_callbacks();
-    callbacks->playlist_metadata_updated = &playlist_simple_callback;
+    callbacks->playlist_metadata_updated = &playlist_metadata_updated_callback;
     return Playlist_add_callback((PyObject *)self, args, callbacks);
 }
 
@@ -472,20 +550,24 @@ playlist_track_created_changed_callback(
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self, *py_user;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_track_created_changed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACK_CREATED_CHANGED);
 
     self = Playlist_FromSpotify(playlist);
     py_user = User_FromSpotify(user);
 
-    result = PyObject_CallFunction(trampoline->callback, "NiNiO", self,
+    result = PyObject_CallFunction(callback, "NiNiO", self,
                                    position, py_user, when, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -503,19 +585,23 @@ playlist_track_message_changed_callback(
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self, *py_message;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_track_message_changed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACK_MESSAGE_CHANGED);
 
     self = Playlist_FromSpotify(playlist);
     py_message = PyUnicode_FromString(message);
-    result = PyObject_CallFunction(trampoline->callback, "NiNO", self,
+    result = PyObject_CallFunction(callback, "NiNO", self,
                                    position, py_message, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -533,19 +619,23 @@ playlist_track_seen_changed_callback(
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_track_seen_changed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_TRACK_SEEN_CHANGED);
 
     self = Playlist_FromSpotify(playlist);
-    result = PyObject_CallFunction(trampoline->callback, "NiOO", self,
+    result = PyObject_CallFunction(callback, "NiOO", self,
                                    position, seen ? Py_True : Py_False,
                                    trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -563,19 +653,23 @@ playlist_description_changed_callback(
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self, *py_description;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_description_changed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_DESCRIPTION_CHANGED);
 
     self = Playlist_FromSpotify(playlist);
     py_description = PyUnicode_FromString(description);
-    result = PyObject_CallFunction(trampoline->callback, "NNO", self,
+    result = PyObject_CallFunction(callback, "NNO", self,
                                    py_description, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -590,7 +684,7 @@ static PyObject *
 Playlist_add_subscribers_changed_callback(PyObject *self, PyObject *args)
 {
     sp_playlist_callbacks *callbacks = create_and_initialize_callbacks();
-    callbacks->subscribers_changed = &playlist_simple_callback;
+    callbacks->subscribers_changed = &playlist_subscribers_changed_callback;
     return Playlist_add_callback(self, args, callbacks);
 }
 
@@ -601,20 +695,24 @@ playlist_image_changed_callback(
     Callback *trampoline = (Callback *)data;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlist_image_changed");
+    PyObject *callback =
+        event_callback(trampoline, PLAYLIST_EVENT_IMAGE_CHANGED);
 
     self = Playlist_FromSpotify(playlist);
 
     /* TODO: go with a Image_FromSpotify or an image from id instead? */
-    result = PyObject_CallFunction(trampoline->callback, "Ns#O", self,
+    result = PyObject_CallFunction(callback, "Ns#O", self,
                                    image, 20, trampoline->userdata);
 
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -625,6 +723,127 @@ Playlist_add_image_changed_callback(PyObject *self, PyObject *args)
     return Playlist_add_callback(self, args, callbacks);
 }
 
+static void
+set_event_callback(sp_playlist_callbacks *callbacks, int event)
+{
+    switch (event) {
+    case PLAYLIST_EVENT_TRACKS_ADDED:
+        callbacks->tracks_added = &playlist_tracks_added_callback;
+        break;
+    case PLAYLIST_EVENT_TRACKS_REMOVED:
+        callbacks->tracks_removed = &playlist_tracks_removed_callback;
+        break;
+    case PLAYLIST_EVENT_TRACKS_MOVED:
+        callbacks->tracks_moved = &playlist_tracks_moved_callback;
+        break;
+    case PLAYLIST_EVENT_RENAMED:
+        callbacks->playlist_renamed = &playlist_renamed_callback;
+        break;
+    case PLAYLIST_EVENT_STATE_CHANGED:
+        callbacks->playlist_state_changed = &playlist_state_changed_callback;
+        break;
+    case PLAYLIST_EVENT_UPDATE_IN_PROGRESS:
+        callbacks->playlist_update_in_progress =
+            &playlist_update_in_progress_callback;
+        break;
+    case PLAYLIST_EVENT_METADATA_UPDATED:
+        callbacks->playlist_metadata_updated =
+            &playlist_metadata_updated_callback;
+        break;
+    case PLAYLIST_EVENT_TRACK_CREATED_CHANGED:
+        callbacks->track_created_changed =
+            &playlist_track_created_changed_callback;
+        break;
+    case PLAYLIST_EVENT_TRACK_MESSAGE_CHANGED:
+        callbacks->track_message_changed =
+            &playlist_track_message_changed_callback;
+        break;
+    case PLAYLIST_EVENT_TRACK_SEEN_CHANGED:
+        callbacks->track_seen_changed = &playlist_track_seen_changed_callback;
+        break;
+    case PLAYLIST_EVENT_DESCRIPTION_CHANGED:
+        callbacks->description_changed = &playlist_description_changed_callback;
+        break;
+    case PLAYLIST_EVENT_IMAGE_CHANGED:
+        callbacks->image_changed = &playlist_image_changed_callback;
+        break;
+    case PLAYLIST_EVENT_SUBSCRIBERS_CHANGED:
+        callbacks->subscribers_changed = &playlist_subscribers_changed_callback;
+        break;
+    }
+}
+
+/* Adds a single sp_playlist_callbacks structure wiring only the events of
+ * handlers, a dict of event names to callables. The registration is removed
+ * with remove_callback(owner, userdata) instead of with one of the handlers.
+ */
+static PyObject *
+Playlist_add_callbacks(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *owner, *handlers, *userdata = NULL;
+    PyObject *combined, *handler, *key, *name, *result;
+    PyObject *event_handlers[NUM_PLAYLIST_EVENTS] = { NULL };
+    sp_playlist_callbacks *callbacks;
+    Py_ssize_t pos = 0;
+    int i;
+
+    static char *kwlist[] = {"owner", "handlers", "userdata", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO!|O", kwlist, &owner,
+                                     &PyDict_Type, &handlers, &userdata))
+        return NULL;
+
+    while (PyDict_Next(handlers, &pos, &key, &handler)) {
+        if (PyUnicode_Check(key)) {
+            /* Raises UnicodeEncodeError, a ValueError, for unknown events */
+            name = PyUnicode_AsASCIIString(key);
+            if (name == NULL)
+                return NULL;
+        }
+        else {
+            name = key;
+            Py_INCREF(name);
+        }
+        for (i = 0; i < NUM_PLAYLIST_EVENTS; i++) {
+            if (PyString_Check(name) && strcmp(PyString_AS_STRING(name),
+                                               playlist_event_names[i]) == 0)
+                break;
+        }
+        Py_DECREF(name);
+        if (i == NUM_PLAYLIST_EVENTS) {
+            PyErr_SetString(PyExc_ValueError, "Unknown playlist event");
+            return NULL;
+        }
+        event_handlers[i] = handler;
+        if (handler != Py_None && !PyCallable_Check(handler)) {
+            PyErr_Format(PyExc_TypeError, "%s handler is not callable",
+                         playlist_event_names[i]);
+            return NULL;
+        }
+    }
+
+    combined = PyTuple_New(NUM_PLAYLIST_EVENTS + 1);
+    if (combined == NULL)
+        return NULL;
+    Py_INCREF(owner);
+    PyTuple_SET_ITEM(combined, 0, owner);
+
+    callbacks = create_and_initialize_callbacks();
+    for (i = 0; i < NUM_PLAYLIST_EVENTS; i++) {
+        handler = event_handlers[i];
+        if (handler == NULL)
+            handler = Py_None;
+        if (handler != Py_None)
+            set_event_callback(callbacks, i);
+        Py_INCREF(handler);
+        PyTuple_SET_ITEM(combined, i + 1, handler);
+    }
+
+    result = add_callbacks(self, combined, userdata, callbacks);
+    Py_DECREF(combined);
+    return result;
+}
+
 static PyObject *
 Playlist_track_create_time(PyObject *self, PyObject *args)
 {
@@ -711,41 +930,113 @@ Playlist_update_subscribers(PyObject *self)
     Py_RETURN_NONE;
 }
 
-static PyObject *
-Playlist_add_tracks(PyObject *self, PyObject *args)
+/* Adds num_tracks staged tracks at position and releases them */
+static sp_error
+add_staged_tracks(sp_playlist *playlist, sp_track **tracks, int num_tracks,
+                  int position)
 {
-    int position, num_tracks;
-    PyObject *py_tracks;
+    sp_error error;
     int i;
 
-    sp_error error;
+    Py_BEGIN_ALLOW_THREADS;
+    error = sp_playlist_add_tracks(
+        playlist, (sp_track *const *)tracks, num_tracks, position, g_session);
+    Py_END_ALLOW_THREADS;
+
+    for (i = 0; i < num_tracks; i++)
+        sp_track_release(tracks[i]);
+    return error;
+}
+
+static PyObject *
+Playlist_add_tracks(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    int position, chunk_size = 0, num_tracks = 0, capacity = 0, added = 0, i;
+    PyObject *py_tracks, *progress = Py_None, *iter, *track, *result;
+    sp_track **tracks = NULL, **resized;
+
+    sp_error error = SP_ERROR_OK;
     sp_playlist *playlist = Playlist_SP_PLAYLIST(self);
 
+    static char *kwlist[] = {
+        "position", "tracks", "chunk_size", "progress", NULL };
+
     if (!sp_playlist_is_loaded(playlist)) {
         PyErr_SetString(SpotifyError, "Playlist not loaded");
         return NULL;
     }
 
-    /* TODO: use py check sequence instead? */
-    if (!PyArg_ParseTuple(args, "iO!", &position, &PyList_Type, &py_tracks))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "iO|iO", kwlist, &position,
+                                     &py_tracks, &chunk_size, &progress))
         return NULL;
 
-    num_tracks = (int)PyList_Size(py_tracks);
-    if (num_tracks <= 0)
-        Py_RETURN_NONE;
+    iter = PyObject_GetIter(py_tracks);
+    if (iter == NULL)
+        return NULL;
 
-    sp_track *tracks[num_tracks];
-    for (i = 0; i < num_tracks; i++) {
-        PyObject *track = PyList_GetItem(py_tracks, i);
-        if (Py_TYPE(track) != &TrackType) {
+    /* Tracks are staged on the heap with a reference of their own, as the
+     * Python objects coming from a generator do not outlive the loop. */
+    while ((track = PyIter_Next(iter)) != NULL) {
+        if (!PyObject_TypeCheck(track, &TrackType)) {
+            Py_DECREF(track);
             PyErr_SetString(PyExc_TypeError,
-                            "Expected a list of spotify.Track objects");
-            return NULL;
+                            "Expected an iterable of spotify.Track objects");
+            goto done;
+        }
+        if (num_tracks == capacity) {
+            capacity = capacity ? 2 * capacity : 64;
+            if (chunk_size > 0 && capacity > chunk_size)
+                capacity = chunk_size;
+            resized = PyMem_Resize(tracks, sp_track *, capacity);
+            if (resized == NULL) {
+                Py_DECREF(track);
+                PyErr_NoMemory();
+                goto done;
+            }
+            tracks = resized;
+        }
+        sp_track_add_ref(Track_SP_TRACK(track));
+        tracks[num_tracks++] = Track_SP_TRACK(track);
+        Py_DECREF(track);
+
+        if (num_tracks == chunk_size) {
+            error = add_staged_tracks(playlist, tracks, num_tracks,
+                                      position + added);
+            num_tracks = 0;
+            if (error != SP_ERROR_OK)
+                goto done;
+            added += chunk_size;
+            if (progress != Py_None) {
+                result = PyObject_CallFunction(progress, "i", added);
+                if (result == NULL)
+                    goto done;
+                Py_DECREF(result);
+            }
+        }
+    }
+    if (PyErr_Occurred())
+        goto done;
+
+    if (num_tracks > 0) {
+        error = add_staged_tracks(playlist, tracks, num_tracks,
+                                  position + added);
+        added += num_tracks;
+        num_tracks = 0;
+        if (error == SP_ERROR_OK && chunk_size > 0 && progress != Py_None) {
+            result = PyObject_CallFunction(progress, "i", added);
+            if (result == NULL)
+                goto done;
+            Py_DECREF(result);
         }
-        tracks[i] = Track_SP_TRACK(track);
     }
-    error = sp_playlist_add_tracks(
-        playlist, (sp_track *const *)tracks, num_tracks, position, g_session);
+
+done:
+    for (i = 0; i < num_tracks; i++)
+        sp_track_release(tracks[i]);
+    PyMem_Free(tracks);
+    Py_DECREF(iter);
+    if (PyErr_Occurred())
+        return NULL;
 
     if (error == SP_ERROR_INVALID_INDATA) {
         PyErr_SetString(PyExc_IndexError,
@@ -774,6 +1065,20 @@ Playlist_sq_length(PyObject *self)
     return sp_playlist_num_tracks(Playlist_SP_PLAYLIST(self));
 }
 
+static PyObject *
+Playlist_item_at(PyObject *self, Py_ssize_t index)
+{
+    sp_track *track = sp_playlist_track(
+        Playlist_SP_PLAYLIST(self), (int)index);
+
+    /* The playlist may have shrunk since index was checked */
+    if (track == NULL) {
+        PyErr_SetNone(PyExc_IndexError);
+        return NULL;
+    }
+    return Track_FromSpotify(track);
+}
+
 PyObject *
 Playlist_sq_item(PyObject *self, Py_ssize_t index)
 {
@@ -781,9 +1086,46 @@ Playlist_sq_item(PyObject *self, Py_ssize_t index)
         PyErr_SetNone(PyExc_IndexError);
         return NULL;
     }
-    sp_track *track = sp_playlist_track(
-        Playlist_SP_PLAYLIST(self), (int)index);
-    return Track_FromSpotify(track);
+    return Playlist_item_at(self, index);
+}
+
+static PyObject *
+Playlist_iter(PyObject *self)
+{
+    return seq_iter_new(self, Playlist_sq_length(self), Playlist_item_at);
+}
+
+static PyObject *
+Playlist_mp_subscript(PyObject *self, PyObject *key)
+{
+    return seq_subscript(self, key, Playlist_sq_length(self), Playlist_item_at);
+}
+
+static PyMappingMethods Playlist_as_mapping = {
+    (lenfunc) Playlist_sq_length,  /*mp_length*/
+    Playlist_mp_subscript,         /*mp_subscript*/
+    0,                          /*mp_ass_subscript*/
+};
+
+static sp_track *
+Playlist_track_at(void *source, int index)
+{
+    return sp_playlist_track((sp_playlist *)source, index);
+}
+
+static PyObject *
+Playlist_snapshot(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fields = NULL;
+    sp_playlist *playlist = Playlist_SP_PLAYLIST(self);
+
+    static char *kwlist[] = {"fields", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &fields))
+        return NULL;
+
+    return track_snapshot(fields, sp_playlist_num_tracks(playlist),
+                          Playlist_track_at, playlist, playlist);
 }
 
 static PyMethodDef Playlist_methods[] = {
@@ -791,6 +1133,10 @@ static PyMethodDef Playlist_methods[] = {
      (PyCFunction)Playlist_is_loaded, METH_NOARGS,
      "True if this playlist has been loaded by the client"
     },
+    {"snapshot", (PyCFunction)Playlist_snapshot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Return metadata of the tracks of this playlist as columns"
+    },
     {"is_collaborative",
      (PyCFunction)Playlist_is_collaborative, METH_NOARGS,
      "Return collaborative status for a playlist. A playlist in " \
@@ -798,8 +1144,8 @@ static PyMethodDef Playlist_methods[] = {
      "owning the list."
     },
     {"add_tracks",
-     (PyCFunction)Playlist_add_tracks, METH_VARARGS,
-     ""
+     (PyCFunction)Playlist_add_tracks, METH_VARARGS | METH_KEYWORDS,
+     "Add tracks from an iterable at the given position"
     },
     {"remove_tracks",
      (PyCFunction)Playlist_remove_tracks, METH_VARARGS,
@@ -857,10 +1203,20 @@ static PyMethodDef Playlist_methods[] = {
      (PyCFunction)Playlist_add_image_changed_callback, METH_VARARGS,
      ""
     },
+    {"add_callbacks",
+     (PyCFunction)Playlist_add_callbacks, METH_VARARGS | METH_KEYWORDS,
+     "Add a single registration for the events of handlers"
+    },
     {"remove_callback",
      (PyCFunction)Playlist_remove_callback, METH_VARARGS,
      ""
     },
+    {"remove_all_callbacks",
+     (PyCFunction)Playlist_remove_all_callbacks,
+     METH_VARARGS | METH_KEYWORDS,
+     "Remove all the callbacks added to this playlist, or only the ones of "
+     "methods of owner, and return how many were removed"
+    },
     {"track_create_time",
      (PyCFunction)Playlist_track_create_time, METH_VARARGS,
      "Return when the given index was added to the playlist"
@@ -925,8 +1281,8 @@ PyTypeObject PlaylistType = {
     0,                                        /*tp_repr*/
     0,                                        /*tp_as_number*/
     &Playlist_as_sequence,                    /*tp_as_sequence*/
-    0,                                        /*tp_as_mapping*/
-    0,                                        /*tp_hash*/
+    &Playlist_as_mapping,                     /*tp_as_mapping*/
+    (hashfunc) Playlist_hash,                 /*tp_hash*/
     0,                                        /*tp_call*/
     Playlist_str,                             /*tp_str*/
     0,                                        /*tp_getattro*/
@@ -936,9 +1292,9 @@ PyTypeObject PlaylistType = {
     "Playlist objects",                       /* tp_doc */
     0,                                        /* tp_traverse */
     0,                                        /* tp_clear */
-    0,                                        /* tp_richcompare */
-    0,                                        /* tp_weaklistoffset */
-    0,                                        /* tp_iter */
+    Playlist_richcompare,                     /* tp_richcompare */
+    offsetof(Playlist, weakreflist),          /* tp_weaklistoffset */
+    Playlist_iter,                            /* tp_iter */
     0,                                        /* tp_iternext */
     Playlist_methods,                         /* tp_methods */
     Playlist_members,                         /* tp_members */
@@ -2,20 +2,17 @@
 #include <structmember.h>
 #include <libspotify/api.h>
 #include "pyspotify.h"
+#include "seqiter.h"
+#include "profile.h"
 #include "playlistcontainer.h"
+#include "cbtable.h"
 #include "playlist.h"
 #include "playlistfolder.h"
 
-/* This is the playlist container callbacks table.
- *
- * It is a linked list of entries keeping enough information into pyspotify
- * to be able to remove the callbacks after a while, especially when dealing
- * with a different python PlaylistContainer object than the one the callbacks
- * were added from. Each entry corresponds to a spotify playlist container on
- * which callbacks have been added. When all callbacks are removed from a
- * playlist container, the entry is free'd from memory.
- */
-static plc_cb_entry *playlistcontainer_callbacks_table = NULL;
+/* This is the playlist container callbacks table, see cbtable.h. Each entry
+ * holds a reference to its playlist container, released once all its
+ * callbacks are removed. */
+static cb_table playlistcontainer_callbacks_table = CB_TABLE_INIT;
 
 /* Mallocs and memsets a new sp_playlist_callbacks structure. */
 static sp_playlistcontainer_callbacks *
@@ -52,76 +49,123 @@ PlaylistContainer_dealloc(PyObject *self)
     self->ob_type->tp_free(self);
 }
 
-/* TODO: cleanup this code with respect to variables and formating */
-static void
-plc_callbacks_table_add(PlaylistContainer *plc,
-                        playlistcontainer_callback * cb)
-{
-    plc_cb_entry *curr, *entry = NULL;
-
-    /* Look for an existing entry for this playlist */
-    curr = playlistcontainer_callbacks_table;
-    while (curr) {
-        if (curr->playlistcontainer == plc->_playlistcontainer) {
-            entry = curr;
-            break;
-        }
-        curr = curr->next;
-    }
-    /* Update callbacks entry */
-    if (entry) {
-        cb->next = entry->callbacks;
-        entry->callbacks = cb;
-    }
-    else {
-        cb->next = NULL;
-        /* TODO: switch to PyMem_Malloc and audit for coresponding free */
-        entry = malloc(sizeof(plc_cb_entry));
-        sp_playlistcontainer_add_ref(plc->_playlistcontainer);
-        entry->playlistcontainer = plc->_playlistcontainer;
-        entry->callbacks = cb;
-        entry->next = playlistcontainer_callbacks_table;
-        playlistcontainer_callbacks_table = entry;
-    }
-}
-
 static PyObject *
 PlaylistContainer_add_callback(PyObject *self, PyObject *args,
                                sp_playlistcontainer_callbacks *container_callbacks)
 {
     PyObject *callback, *userdata = NULL;
     Callback *trampoline;
-    playlistcontainer_callback *to_add;
+    sp_playlistcontainer *container = PlaylistContainer_SP_PLAYLISTCONTAINER(self);
+    int created;
 
     if (!PyArg_ParseTuple(args, "O|O", &callback, &userdata))
-        return NULL;
+        goto error;
 
-    /* TODO: none of our other callback add functions check this... */
     if (!PyCallable_Check(callback)) {
         PyErr_SetString(PyExc_TypeError,
                         "callback argument must be of function or method type");
-        return NULL;
+        goto error;
     }
 
     trampoline = create_trampoline(callback, userdata);
+    if (trampoline == NULL)
+        goto error;
 
-    /* TODO: switch to PyMem_Malloc and audit for coresponding free */
-    /* TODO: extract to helper */
-    to_add = malloc(sizeof(playlistcontainer_callback));
-    to_add->callback = container_callbacks;
-    to_add->trampoline = trampoline;
-    plc_callbacks_table_add((PlaylistContainer *)self, to_add);
+    created = cb_table_add(&playlistcontainer_callbacks_table, container,
+                           container_callbacks, trampoline);
+    if (created < 0) {
+        delete_trampoline(trampoline);
+        goto error;
+    }
+    if (created)
+        sp_playlistcontainer_add_ref(container);
 
     debug_printf("adding callback (%p,%p) py(%p,%p)",
                  container_callbacks, trampoline, trampoline->callback,
                  trampoline->userdata);
 
-    sp_playlistcontainer_add_callbacks(
-            PlaylistContainer_SP_PLAYLISTCONTAINER(self), container_callbacks,
-            (void *)trampoline);
+    sp_playlistcontainer_add_callbacks(container, container_callbacks,
+                                       (void *)trampoline);
+    Py_RETURN_NONE;
+
+error:
+    free(container_callbacks);
+    return NULL;
+}
+
+/* Removes the registration from the playlist container and frees it */
+static void
+remove_registration(sp_playlistcontainer *container, cb_registration *reg)
+{
+    debug_printf("removing callback (%p,%p)", reg->callbacks,
+                 reg->trampoline);
+
+    sp_playlistcontainer_remove_callbacks(container, reg->callbacks,
+                                          reg->trampoline);
+
+    delete_trampoline(reg->trampoline);
+    free(reg->callbacks);
+    PyMem_Free(reg);
+}
+
+static PyObject *
+PlaylistContainer_remove_callback(PyObject *self, PyObject *args)
+{
+    PyObject *callback, *userdata = NULL;
+    sp_playlistcontainer *container = PlaylistContainer_SP_PLAYLISTCONTAINER(self);
+    cb_registration *reg;
+    int emptied;
+
+    if (!PyArg_ParseTuple(args, "O|O", &callback, &userdata))
+        return NULL;
+
+    if (userdata == NULL)
+        userdata = Py_None;
+
+    reg = cb_table_remove(&playlistcontainer_callbacks_table, container,
+                          callback, userdata, &emptied);
+
+    if (reg == NULL) {
+        PyErr_SetString(SpotifyError, "This callback was not added");
+        return NULL;
+    }
+
+    remove_registration(container, reg);
+    if (emptied)
+        sp_playlistcontainer_release(container);
+
     Py_RETURN_NONE;
 }
 
+static PyObject *
+PlaylistContainer_remove_all_callbacks(PyObject *self, PyObject *args,
+                                       PyObject *kwds)
+{
+    PyObject *owner = NULL;
+    sp_playlistcontainer *container = PlaylistContainer_SP_PLAYLISTCONTAINER(self);
+    cb_registration *reg, *next;
+    int emptied, count = 0;
+
+    static char *kwlist[] = {"owner", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &owner))
+        return NULL;
+    if (owner == Py_None)
+        owner = NULL;
+
+    reg = cb_table_remove_all(&playlistcontainer_callbacks_table, container,
+                              owner, &emptied);
+    for (; reg; reg = next) {
+        next = reg->next;
+        remove_registration(container, reg);
+        count++;
+    }
+    if (emptied)
+        sp_playlistcontainer_release(container);
+
+    return PyInt_FromLong(count);
+}
+
 void
 playlistcontainer_loaded_callback(sp_playlistcontainer *container, void *data)
 {
@@ -129,7 +173,9 @@ playlistcontainer_loaded_callback(sp_playlistcontainer *container, void *data)
     debug_printf("container loaded (%p, %p)", container, trampoline);
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlistcontainer_loaded");
 
     self = PlaylistContainer_FromSpotify(container);
     result = PyObject_CallFunction(trampoline->callback, "NO", self,
@@ -138,9 +184,9 @@ playlistcontainer_loaded_callback(sp_playlistcontainer *container, void *data)
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -160,7 +206,9 @@ playlistcontainer_playlist_added_callback(
         return;
 
     PyObject *py_playlist, *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlistcontainer_playlist_added");
 
     self = PlaylistContainer_FromSpotify(container);
     py_playlist = Playlist_FromSpotify(playlist);
@@ -172,9 +220,9 @@ playlistcontainer_playlist_added_callback(
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -195,7 +243,9 @@ playlistcontainer_playlist_moved_callback(
         return;
 
     PyObject *py_playlist, *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlistcontainer_playlist_moved");
 
     self = PlaylistContainer_FromSpotify(container);
     py_playlist = Playlist_FromSpotify(playlist);
@@ -207,9 +257,9 @@ playlistcontainer_playlist_moved_callback(
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -230,7 +280,9 @@ playlistcontainer_playlist_removed_callback(
         return;
 
     PyObject *py_playlist, *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "playlistcontainer_playlist_removed");
 
     self = PlaylistContainer_FromSpotify(container);
     py_playlist = Playlist_FromSpotify(playlist);
@@ -242,9 +294,9 @@ playlistcontainer_playlist_removed_callback(
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -262,6 +314,13 @@ PlaylistContainer_str(PyObject *self)
     return NULL;
 }
 
+static PyObject *
+PlaylistContainer_is_loaded(PyObject *self)
+{
+    return PyBool_FromLong(sp_playlistcontainer_is_loaded(
+        PlaylistContainer_SP_PLAYLISTCONTAINER(self)));
+}
+
 static PyObject *
 PlaylistContainer_remove_playlist(PyObject *self, PyObject *args)
 {
@@ -320,25 +379,56 @@ PlaylistContainer_sq_length(PyObject *self)
         PlaylistContainer_SP_PLAYLISTCONTAINER(self));
 }
 
-PyObject *
-PlaylistContainer_sq_item(PyObject *self, Py_ssize_t index)
+static PyObject *
+PlaylistContainer_item_at(PyObject *self, Py_ssize_t index)
 {
     sp_playlistcontainer *container = PlaylistContainer_SP_PLAYLISTCONTAINER(self);
     sp_playlist_type type;
+    sp_playlist *playlist;
 
-    if (index >= sp_playlistcontainer_num_playlists(container)) {
+    /* The container may have shrunk since index was checked, in which case
+     * this raises IndexError */
+    type = sp_playlistcontainer_playlist_type(container, (int)index);
+    if (type == SP_PLAYLIST_TYPE_PLAYLIST) {
+        playlist = sp_playlistcontainer_playlist(container, (int)index);
+        if (playlist == NULL) {
+            PyErr_SetNone(PyExc_IndexError);
+            return NULL;
+        }
+        return Playlist_FromSpotify(playlist);
+    }
+    else
+         return PlaylistFolder_FromSpotify(container, (int)index, type);
+}
+
+PyObject *
+PlaylistContainer_sq_item(PyObject *self, Py_ssize_t index)
+{
+    if (index >= PlaylistContainer_sq_length(self)) {
         PyErr_SetNone(PyExc_IndexError);
         return NULL;
     }
+    return PlaylistContainer_item_at(self, index);
+}
 
-    type = sp_playlistcontainer_playlist_type(container, (int)index);
-    if (type == SP_PLAYLIST_TYPE_PLAYLIST)
-        return Playlist_FromSpotify(
-            sp_playlistcontainer_playlist(container, (int)index));
-    else
-         return PlaylistFolder_FromSpotify(container, (int)index, type);
+static PyObject *
+PlaylistContainer_iter(PyObject *self)
+{
+    return seq_iter_new(self, PlaylistContainer_sq_length(self), PlaylistContainer_item_at);
 }
 
+static PyObject *
+PlaylistContainer_mp_subscript(PyObject *self, PyObject *key)
+{
+    return seq_subscript(self, key, PlaylistContainer_sq_length(self), PlaylistContainer_item_at);
+}
+
+static PyMappingMethods PlaylistContainer_as_mapping = {
+    (lenfunc) PlaylistContainer_sq_length,  /*mp_length*/
+    PlaylistContainer_mp_subscript,         /*mp_subscript*/
+    0,                          /*mp_ass_subscript*/
+};
+
 PyObject *
 PlaylistContainer_sq_ass_item(PyObject *self, Py_ssize_t index, Py_ssize_t meh)
 {
@@ -374,6 +464,20 @@ static PyMethodDef PlaylistContainer_methods[] = {
     {"add_playlist_removed_callback",
      (PyCFunction)PlaylistContainer_add_playlist_removed_callback, METH_VARARGS,
      ""},
+    {"remove_callback",
+     (PyCFunction)PlaylistContainer_remove_callback, METH_VARARGS,
+     ""
+    },
+    {"remove_all_callbacks",
+     (PyCFunction)PlaylistContainer_remove_all_callbacks,
+     METH_VARARGS | METH_KEYWORDS,
+     "Remove all the callbacks added to this playlist container, or only the "
+     "ones of methods of owner, and return how many were removed"
+    },
+    {"is_loaded",
+     (PyCFunction)PlaylistContainer_is_loaded, METH_NOARGS,
+     "True if this playlist container has been loaded by the client"
+    },
     {"remove_playlist",
      (PyCFunction)PlaylistContainer_remove_playlist, METH_VARARGS,
      "Remove a playlist from the playlistcontainer"
@@ -403,7 +507,7 @@ PyTypeObject PlaylistContainerType = {
     0,                                        /*tp_repr*/
     0,                                        /*tp_as_number*/
     &PlaylistContainer_as_sequence,           /*tp_as_sequence*/
-    0,                                        /*tp_as_mapping*/
+    &PlaylistContainer_as_mapping,            /*tp_as_mapping*/
     0,                                        /*tp_hash*/
     0,                                        /*tp_call*/
     PlaylistContainer_str,                    /*tp_str*/
@@ -416,7 +520,7 @@ PyTypeObject PlaylistContainerType = {
     0,                                        /* tp_clear */
     0,                                        /* tp_richcompare */
     0,                                        /* tp_weaklistoffset */
-    0,                                        /* tp_iter */
+    PlaylistContainer_iter,                   /* tp_iter */
     0,                                        /* tp_iternext */
     PlaylistContainer_methods,                /* tp_methods */
     PlaylistContainer_members,                /* tp_members */
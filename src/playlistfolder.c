@@ -23,7 +23,7 @@ PlaylistFolder_FromSpotify(sp_playlistcontainer *container, int index,
     sp_error error;
 
     if (index < 0 || index >= sp_playlistcontainer_num_playlists(container)) {
-        PyErr_SetString(SpotifyError, "playlist index does not exist");
+        PyErr_SetString(PyExc_IndexError, "playlist index does not exist");
         return NULL;
     }
 
@@ -0,0 +1,178 @@
+#include <Python.h>
+#include <time.h>
+#include <sys/time.h>
+#include "profile.h"
+
+#define PROFILE_MAX_ENTRIES 64
+
+typedef struct {
+    const char *name;
+    unsigned long calls;
+    double gil_wait;
+    double handler;
+    unsigned long unraisable;
+} profile_entry;
+
+/* Only touched with the GIL held, except g_profiling which is only read
+ * without it. */
+static volatile int g_profiling = 0;
+static profile_entry g_profile[PROFILE_MAX_ENTRIES];
+static int g_profile_len = 0;
+/* Entry of the callback currently holding the GIL, or -1 */
+static int g_profile_current = -1;
+
+static double
+profile_now(void)
+{
+#ifdef CLOCK_MONOTONIC
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+#else
+    struct timeval tv;
+    gettimeofday(&tv, NULL);
+    return tv.tv_sec + tv.tv_usec / 1e6;
+#endif
+}
+
+static int
+profile_lookup(const char *name)
+{
+    int i;
+
+    for (i = 0; i < g_profile_len; i++) {
+        if (g_profile[i].name == name || strcmp(g_profile[i].name, name) == 0)
+            return i;
+    }
+    if (g_profile_len == PROFILE_MAX_ENTRIES)
+        return -1;
+
+    g_profile[g_profile_len].name = name;
+    return g_profile_len++;
+}
+
+PyGILState_STATE
+profile_gil_ensure(profile_state *state, const char *name)
+{
+    PyGILState_STATE gstate;
+    double start;
+
+    if (!g_profiling) {
+        state->index = -1;
+        gstate = PyGILState_Ensure();
+        state->previous = g_profile_current;
+        g_profile_current = -1;
+        return gstate;
+    }
+
+    start = profile_now();
+    gstate = PyGILState_Ensure();
+    state->acquired = profile_now();
+    state->index = profile_lookup(name);
+    if (state->index >= 0) {
+        g_profile[state->index].calls++;
+        g_profile[state->index].gil_wait += state->acquired - start;
+    }
+    state->previous = g_profile_current;
+    g_profile_current = state->index;
+    return gstate;
+}
+
+void
+profile_gil_release(profile_state *state, PyGILState_STATE gstate)
+{
+    /* The entries may have been reset while the handler ran. */
+    if (state->index >= 0 && state->index < g_profile_len)
+        g_profile[state->index].handler += profile_now() - state->acquired;
+    g_profile_current = state->previous;
+    PyGILState_Release(gstate);
+}
+
+void
+write_unraisable(PyObject *obj)
+{
+    if (g_profile_current >= 0 && g_profile_current < g_profile_len)
+        g_profile[g_profile_current].unraisable++;
+    PyErr_WriteUnraisable(obj);
+}
+
+static PyObject *
+set_callback_profiling(PyObject *self, PyObject *args)
+{
+    PyObject *enabled;
+    int enabled_value;
+
+    if (!PyArg_ParseTuple(args, "O", &enabled))
+        return NULL;
+
+    enabled_value = PyObject_IsTrue(enabled);
+    if (enabled_value < 0)
+        return NULL;
+    g_profiling = enabled_value;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+callback_profile(PyObject *self)
+{
+    PyObject *result, *entry;
+    int i;
+
+    result = PyDict_New();
+    if (result == NULL)
+        return NULL;
+
+    for (i = 0; i < g_profile_len; i++) {
+        entry = Py_BuildValue("{s:k,s:d,s:d,s:k}",
+                              "calls", g_profile[i].calls,
+                              "gil_wait", g_profile[i].gil_wait,
+                              "handler", g_profile[i].handler,
+                              "unraisable", g_profile[i].unraisable);
+        if (entry == NULL ||
+                PyDict_SetItemString(result, g_profile[i].name, entry) < 0) {
+            Py_XDECREF(entry);
+            Py_DECREF(result);
+            return NULL;
+        }
+        Py_DECREF(entry);
+    }
+    return result;
+}
+
+static PyObject *
+reset_callback_profile(PyObject *self)
+{
+    memset(g_profile, 0, sizeof(g_profile));
+    g_profile_len = 0;
+    g_profile_current = -1;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef profile_methods[] = {
+    {"set_callback_profiling", (PyCFunction)set_callback_profiling,
+     METH_VARARGS,
+     "Enable or disable callback profiling"
+    },
+    {"callback_profile", (PyCFunction)callback_profile, METH_NOARGS,
+     "Return the callback profile as a dict keyed by callback name"
+    },
+    {"reset_callback_profile", (PyCFunction)reset_callback_profile,
+     METH_NOARGS,
+     "Clear the callback profile"
+    },
+    {NULL} /* Sentinel */
+};
+
+void
+profile_init(PyObject *module)
+{
+    PyMethodDef *def;
+    PyObject *function;
+
+    for (def = profile_methods; def->ml_name != NULL; def++) {
+        function = PyCFunction_New(def, NULL);
+        if (function == NULL)
+            return;
+        PyModule_AddObject(module, def->ml_name, function);
+    }
+}
@@ -0,0 +1,28 @@
+#include <Python.h>
+
+/* Opt-in profiling of the callback shims.
+ *
+ * Shims call profile_gil_ensure() and profile_gil_release() instead of
+ * PyGILState_Ensure() and PyGILState_Release(), and write_unraisable()
+ * instead of PyErr_WriteUnraisable(). When profiling is enabled, this
+ * records for each callback name the number of calls, the time spent
+ * waiting for the GIL, the time spent holding it and the number of
+ * unraisable exceptions. Names must be string literals.
+ */
+typedef struct {
+    int index;
+    int previous;
+    double acquired;
+} profile_state;
+
+PyGILState_STATE
+profile_gil_ensure(profile_state *state, const char *name);
+
+void
+profile_gil_release(profile_state *state, PyGILState_STATE gstate);
+
+void
+write_unraisable(PyObject *obj);
+
+extern void
+profile_init(PyObject *module);
@@ -2,13 +2,28 @@
 #include <libspotify/api.h>
 #include "pyspotify.h"
 
+/* Freed trampolines are kept on a small free list and reused, as browsers,
+ * images and playlist callbacks create and delete them all the time. The free
+ * list is protected by the GIL, which all callers must hold. */
+#define TRAMPOLINE_POOL_SIZE 64
+
+static Callback *g_trampoline_pool[TRAMPOLINE_POOL_SIZE];
+static int g_trampoline_pool_len = 0;
+
 Callback *
 create_trampoline(PyObject *callback, PyObject *userdata)
 {
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    Callback *trampoline;
+
+    if (g_trampoline_pool_len > 0)
+        trampoline = g_trampoline_pool[--g_trampoline_pool_len];
+    else
+        trampoline = PyMem_Malloc(sizeof(Callback));
 
-    /* TODO: switch to PyMem_Malloc and audit for coresponding free */
-    Callback *trampoline = malloc(sizeof(Callback));
+    if (trampoline == NULL) {
+        PyErr_NoMemory();
+        return NULL;
+    }
 
     if (userdata == NULL)
         userdata = Py_None;
@@ -18,19 +33,19 @@ create_trampoline(PyObject *callback, PyObject *userdata)
     trampoline->callback = callback;
     trampoline->userdata = userdata;
 
-    PyGILState_Release(gstate);
-
     return trampoline;
 }
 
 void
 delete_trampoline(Callback * trampoline)
 {
-    PyGILState_STATE gstate = PyGILState_Ensure();
     Py_DECREF(trampoline->userdata);
     Py_DECREF(trampoline->callback);
-    free(trampoline);
-    PyGILState_Release(gstate);
+
+    if (g_trampoline_pool_len < TRAMPOLINE_POOL_SIZE)
+        g_trampoline_pool[g_trampoline_pool_len++] = trampoline;
+    else
+        PyMem_Free(trampoline);
 }
 
 PyObject *
@@ -33,7 +33,7 @@ typedef struct {
     PyObject *userdata;
 } Callback;
 
-/* Trampolines for callback handling */
+/* Trampolines for callback handling, the caller must hold the GIL */
 Callback *create_trampoline(PyObject *callback, PyObject *userdata);
 void delete_trampoline(Callback *trampoline);
 
@@ -3,6 +3,7 @@
 #include "libspotify/api.h"
 #include "pyspotify.h"
 #include "search.h"
+#include "snapshot.h"
 #include "artist.h"
 #include "album.h"
 #include "track.h"
@@ -98,6 +99,39 @@ Results_tracks(PyObject *self)
     return list;
 }
 
+static PyObject *
+Results_playlists(PyObject *self)
+{
+    sp_search *search = Results_SP_SEARCH(self);
+    const char *image_uri;
+    PyObject *item;
+    int i;
+    int count = sp_search_num_playlists(search);
+    PyObject *list = PyList_New(count);
+
+    if (list == NULL)
+        return NULL;
+    for (i = 0; i < count; ++i) {
+        image_uri = sp_search_playlist_image_uri(search, i);
+        if (image_uri != NULL && *image_uri != '\0')
+            item = Py_BuildValue("(NNN)",
+                PyUnicode_FromString(sp_search_playlist_name(search, i)),
+                PyUnicode_FromString(sp_search_playlist_uri(search, i)),
+                PyUnicode_FromString(image_uri));
+        else
+            item = Py_BuildValue("(NNO)",
+                PyUnicode_FromString(sp_search_playlist_name(search, i)),
+                PyUnicode_FromString(sp_search_playlist_uri(search, i)),
+                Py_None);
+        if (item == NULL) {
+            Py_DECREF(list);
+            return NULL;
+        }
+        PyList_SET_ITEM(list, i, item);
+    }
+    return list;
+}
+
 static PyObject *
 Results_total_albums(PyObject *self)
 {
@@ -116,6 +150,13 @@ Results_total_tracks(PyObject *self)
     return Py_BuildValue("i", sp_search_total_tracks(Results_SP_SEARCH(self)));
 }
 
+static PyObject *
+Results_total_playlists(PyObject *self)
+{
+    return Py_BuildValue("i",
+                         sp_search_total_playlists(Results_SP_SEARCH(self)));
+}
+
 static PyObject *
 Results_query(PyObject *self)
 {
@@ -128,10 +169,35 @@ Results_str(PyObject * self)
     return Results_query(self);
 }
 
+static sp_track *
+Results_track_at(void *source, int index)
+{
+    return sp_search_track((sp_search *)source, index);
+}
+
+static PyObject *
+Results_snapshot(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fields = NULL;
+    sp_search *search = Results_SP_SEARCH(self);
+
+    static char *kwlist[] = {"fields", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &fields))
+        return NULL;
+
+    return track_snapshot(fields, sp_search_num_tracks(search),
+                          Results_track_at, search, NULL);
+}
+
 static PyMethodDef Results_methods[] = {
     {"is_loaded", (PyCFunction)Results_is_loaded, METH_NOARGS,
      "True if these results have been loaded"
     },
+    {"snapshot", (PyCFunction)Results_snapshot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Return metadata of the tracks found by the search as columns"
+    },
     {"did_you_mean", (PyCFunction)Results_did_you_mean, METH_NOARGS,
      "Return did you mean suggestion for the query"
     },
@@ -147,6 +213,10 @@ static PyMethodDef Results_methods[] = {
     {"tracks", (PyCFunction)Results_tracks, METH_NOARGS,
      "Return a list of all the tracks found by the search"
     },
+    {"playlists", (PyCFunction)Results_playlists, METH_NOARGS,
+     "Return the name, URI and image URI of all the playlists found by the " \
+     "search"
+    },
     {"total_albums", (PyCFunction)Results_total_albums, METH_NOARGS,
      "Return the total number of albums available from this search - if this " \
      "is more than the number in 'albums' then more are available that were " \
@@ -162,6 +232,11 @@ static PyMethodDef Results_methods[] = {
       "is more than the number in 'tracks' then more are available that were " \
       "not requested"
     },
+    {"total_playlists", (PyCFunction)Results_total_playlists, METH_NOARGS,
+     "Return the total number of playlists available from this search - if " \
+     "this is more than the number in 'playlists' then more are available " \
+     "that were not requested"
+    },
     {"query", (PyCFunction)Results_query, METH_NOARGS,
      "The query expression that generated these results"
     },
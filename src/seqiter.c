@@ -0,0 +1,143 @@
+#include <Python.h>
+#include "seqiter.h"
+
+PyObject *
+seq_iter_new(PyObject *owner, Py_ssize_t length, seq_item_func item)
+{
+    SeqIter *self;
+
+    if (length < 0)
+        length = 0;
+    self = PyObject_New(SeqIter, &SeqIterType);
+    if (self == NULL)
+        return NULL;
+    Py_INCREF(owner);
+    self->owner = owner;
+    self->item = item;
+    self->index = 0;
+    self->length = length;
+    return (PyObject *)self;
+}
+
+static void
+SeqIter_dealloc(PyObject *self)
+{
+    Py_XDECREF(((SeqIter *)self)->owner);
+    PyObject_Del(self);
+}
+
+static PyObject *
+SeqIter_next(PyObject *self)
+{
+    SeqIter *it = (SeqIter *)self;
+    PyObject *item;
+
+    if (it->index >= it->length)
+        return NULL;
+    item = it->item(it->owner, it->index++);
+    if (item == NULL && PyErr_ExceptionMatches(PyExc_IndexError)) {
+        /* The owner shrank while it was iterated */
+        PyErr_Clear();
+        it->index = it->length;
+    }
+    return item;
+}
+
+static PyObject *
+SeqIter_length_hint(PyObject *self)
+{
+    SeqIter *it = (SeqIter *)self;
+
+    return PyInt_FromSsize_t(it->length - it->index);
+}
+
+PyObject *
+seq_subscript(PyObject *owner, PyObject *key, Py_ssize_t length,
+              seq_item_func item)
+{
+    Py_ssize_t index, start, stop, step, count, i;
+    PyObject *list, *value;
+
+    if (length < 0)
+        length = 0;
+
+    if (PyIndex_Check(key)) {
+        index = PyNumber_AsSsize_t(key, PyExc_IndexError);
+        if (index == -1 && PyErr_Occurred())
+            return NULL;
+        if (index < 0)
+            index += length;
+        if (index < 0 || index >= length) {
+            PyErr_SetNone(PyExc_IndexError);
+            return NULL;
+        }
+        return item(owner, index);
+    }
+
+    if (PySlice_Check(key)) {
+        if (PySlice_GetIndicesEx((PySliceObject *)key, length, &start, &stop,
+                                 &step, &count) < 0)
+            return NULL;
+        list = PyList_New(count);
+        if (list == NULL)
+            return NULL;
+        for (i = 0, index = start; i < count; i++, index += step) {
+            value = item(owner, index);
+            if (value == NULL) {
+                Py_DECREF(list);
+                return NULL;
+            }
+            PyList_SET_ITEM(list, i, value);
+        }
+        return list;
+    }
+
+    PyErr_Format(PyExc_TypeError, "indices must be integers or slices, not %s",
+                 key->ob_type->tp_name);
+    return NULL;
+}
+
+static PyMethodDef SeqIter_methods[] = {
+    {"__length_hint__", (PyCFunction)SeqIter_length_hint, METH_NOARGS,
+     "Return the number of items left"
+    },
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject SeqIterType = {
+    PyObject_HEAD_INIT(NULL)
+    0,                                        /*ob_size*/
+    "spotify.SequenceIterator",               /*tp_name*/
+    sizeof(SeqIter),                          /*tp_basicsize*/
+    0,                                        /*tp_itemsize*/
+    (destructor) SeqIter_dealloc,             /*tp_dealloc*/
+    0,                                        /*tp_print*/
+    0,                                        /*tp_getattr*/
+    0,                                        /*tp_setattr*/
+    0,                                        /*tp_compare*/
+    0,                                        /*tp_repr*/
+    0,                                        /*tp_as_number*/
+    0,                                        /*tp_as_sequence*/
+    0,                                        /*tp_as_mapping*/
+    0,                                        /*tp_hash*/
+    0,                                        /*tp_call*/
+    0,                                        /*tp_str*/
+    0,                                        /*tp_getattro*/
+    0,                                        /*tp_setattro*/
+    0,                                        /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,                       /*tp_flags*/
+    "Iterator over the items of a sequence wrapper", /* tp_doc */
+    0,                                        /* tp_traverse */
+    0,                                        /* tp_clear */
+    0,                                        /* tp_richcompare */
+    0,                                        /* tp_weaklistoffset */
+    PyObject_SelfIter,                        /* tp_iter */
+    SeqIter_next,                             /* tp_iternext */
+    SeqIter_methods,                          /* tp_methods */
+};
+
+void
+seqiter_init(PyObject *module)
+{
+    PyType_Ready(&SeqIterType);
+}
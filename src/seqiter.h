@@ -0,0 +1,35 @@
+#include <Python.h>
+
+/* Iteration and subscripting shared by the sequence wrappers.
+ *
+ * Each wrapper provides an item function returning the item at an index,
+ * which has already been checked against the length. Iterators read the
+ * length once, when they are created. Playlists and containers can shrink
+ * while they are iterated, for instance when the loop processes events, so
+ * their item functions raise IndexError for items that no longer exist,
+ * which ends the iteration.
+ */
+typedef PyObject *(*seq_item_func)(PyObject *owner, Py_ssize_t index);
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *owner;
+    seq_item_func item;
+    Py_ssize_t index;
+    Py_ssize_t length;
+} SeqIter;
+
+extern PyTypeObject SeqIterType;
+
+/* Returns an iterator over the length first items of owner */
+PyObject *
+seq_iter_new(PyObject *owner, Py_ssize_t length, seq_item_func item);
+
+/* Implements owner[key] for integers, including negative ones, and slices,
+ * which are returned as lists */
+PyObject *
+seq_subscript(PyObject *owner, PyObject *key, Py_ssize_t length,
+              seq_item_func item);
+
+extern void
+seqiter_init(PyObject *module);
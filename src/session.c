@@ -2,9 +2,13 @@
 #include <structmember.h>
 #include <libgen.h>
 #include <unistd.h>
+#include <sched.h>
 #include <stdint.h>
+#include <errno.h>
+#include <fcntl.h>
 #include "libspotify/api.h"
 #include "pyspotify.h"
+#include "profile.h"
 #include "album.h"
 #include "albumbrowser.h"
 #include "artist.h"
@@ -16,6 +20,8 @@
 #include "search.h"
 #include "image.h"
 #include "user.h"
+#include "audioring.h"
+#include "loadbarrier.h"
 
 /* TODO: is this safe as just an int, or should it be a condition variable? */
 static int session_constructed = 0;
@@ -24,11 +30,64 @@ static int session_constructed = 0;
 /* TODO: more or less all use of Session_SP_SESSION(self) could just be g_session... */
 sp_session *g_session;
 
+/* When an AudioRing is installed, music_delivery copies frames into it from
+ * the libspotify thread without ever taking the GIL. g_audio_ring_writers
+ * counts deliveries in flight so the ring is not freed under their feet. */
+static audio_ring *volatile g_audio_ring = NULL;
+static volatile int g_audio_ring_writers = 0;
+static PyObject *g_py_audio_ring = NULL;
+
+/* When notify_fd() has been called, notify_main_thread writes a byte to
+ * this self-pipe from the libspotify thread, without taking the GIL, instead
+ * of calling the Python callback. process_events() drains it. */
+static int g_notify_read_fd = -1;
+static volatile int g_notify_write_fd = -1;
+static volatile int g_notify_writers = 0;
+
 static sp_session *
 create_session(PyObject *client, PyObject *settings);
 
+/* Session callbacks are looked up on the client once, when the session is
+ * created or rebind_callbacks() is called, instead of on every event. The
+ * dispatch table is indexed by the values below and all callbacks receive the
+ * same long-lived Python Session object. */
+enum {
+    CB_LOGGED_IN,
+    CB_LOGGED_OUT,
+    CB_METADATA_UPDATED,
+    CB_CONNECTION_ERROR,
+    CB_MESSAGE_TO_USER,
+    CB_NOTIFY_MAIN_THREAD,
+    CB_MUSIC_DELIVERY,
+    CB_PLAY_TOKEN_LOST,
+    CB_LOG_MESSAGE,
+    CB_END_OF_TRACK,
+    CB_CREDENTIALS_BLOB_UPDATED,
+    CB_COUNT
+};
+
+static const char *g_callback_names[CB_COUNT] = {
+    "logged_in",
+    "_manager_logged_out",
+    "metadata_updated",
+    "connection_error",
+    "message_to_user",
+    "notify_main_thread",
+    "music_delivery",
+    "play_token_lost",
+    "log_message",
+    "end_of_track",
+    "credentials_blob_updated",
+};
+
+static PyObject *g_callback_table[CB_COUNT];
+static PyObject *g_py_session = NULL;
+
+static void
+bind_callbacks(PyObject *client);
+
 static void
-session_callback(sp_session *session, const char *attr, PyObject *extra);
+session_callback(sp_session *session, int id, PyObject *extra);
 
 static PyObject *
 Session_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
@@ -54,10 +113,25 @@ Session_create(PyTypeObject *type, PyObject *args)
         return NULL;
 
     PyEval_InitThreads();
+    Py_CLEAR(g_py_session);
     sp_session *session = create_session(client, settings);
     if (session == NULL)
         return NULL;
-    return Session_FromSpotify(session);
+
+    g_py_session = Session_FromSpotify(session);
+    if (g_py_session == NULL)
+        return NULL;
+
+    Py_INCREF(g_py_session);
+    return g_py_session;
+}
+
+static PyObject *
+Session_rebind_callbacks(PyObject *self)
+{
+    PyObject *client = (PyObject *)sp_session_userdata(Session_SP_SESSION(self));
+    bind_callbacks(client);
+    Py_RETURN_NONE;
 }
 
 static PyObject *
@@ -175,43 +249,251 @@ Session_process_events(PyObject *self)
 {
     int timeout;
 
+    char buffer[64];
+
     Py_BEGIN_ALLOW_THREADS;
+    /* Drain first, so that notifications arriving while we process events
+     * leave the pipe readable. */
+    if (g_notify_read_fd >= 0) {
+        while (read(g_notify_read_fd, buffer, sizeof(buffer)) > 0)
+            ;
+    }
     sp_session_process_events(Session_SP_SESSION(self), &timeout);
     Py_END_ALLOW_THREADS;
 
     return Py_BuildValue("i", timeout);
 }
 
+/* Searches in flight. Identical searches made while one is outstanding are
+ * attached to its entry as extra waiters instead of creating another
+ * sp_search, and the completion is fanned out to all of them. Entries own the
+ * creation reference of their search. Only touched with the GIL held. */
+#define SEARCH_PARAMS 8
+
+typedef struct search_waiter {
+    Callback *trampoline;
+    struct search_waiter *next;
+} search_waiter;
+
+typedef struct pending_search {
+    char *query;
+    int params[SEARCH_PARAMS];
+    sp_search_type type;
+    /* NULL while sp_search_create() has not returned yet */
+    sp_search *search;
+    /* Set if the search completed from within sp_search_create() */
+    int completed;
+    search_waiter *waiters;
+    search_waiter **last_waiter;
+    struct pending_search *next;
+} pending_search;
+
+static pending_search *g_pending_searches = NULL;
+
+static pending_search *
+find_pending_search(const char *query, const int *params,
+                    sp_search_type type)
+{
+    pending_search *entry;
+
+    for (entry = g_pending_searches; entry != NULL; entry = entry->next) {
+        if (entry->search != NULL && entry->type == type &&
+                memcmp(entry->params, params, sizeof(entry->params)) == 0 &&
+                strcmp(entry->query, query) == 0)
+            return entry;
+    }
+    return NULL;
+}
+
+static int
+add_search_waiter(pending_search *entry, PyObject *callback,
+                  PyObject *userdata)
+{
+    search_waiter *waiter = PyMem_Malloc(sizeof(search_waiter));
+    if (waiter == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    waiter->trampoline = create_trampoline(callback, userdata);
+    if (waiter->trampoline == NULL) {
+        PyMem_Free(waiter);
+        return -1;
+    }
+    waiter->next = NULL;
+    *entry->last_waiter = waiter;
+    entry->last_waiter = &waiter->next;
+    return 0;
+}
+
+static pending_search *
+new_pending_search(const char *query, const int *params, sp_search_type type)
+{
+    pending_search *entry = PyMem_Malloc(sizeof(pending_search));
+    if (entry == NULL) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    entry->query = PyMem_Malloc(strlen(query) + 1);
+    if (entry->query == NULL) {
+        PyMem_Free(entry);
+        PyErr_NoMemory();
+        return NULL;
+    }
+    strcpy(entry->query, query);
+    memcpy(entry->params, params, sizeof(entry->params));
+    entry->type = type;
+    entry->search = NULL;
+    entry->completed = 0;
+    entry->waiters = NULL;
+    entry->last_waiter = &entry->waiters;
+    entry->next = g_pending_searches;
+    g_pending_searches = entry;
+    return entry;
+}
+
+static void
+unlink_pending_search(pending_search *entry)
+{
+    pending_search **link;
+
+    for (link = &g_pending_searches; *link != NULL; link = &(*link)->next) {
+        if (*link == entry) {
+            *link = entry->next;
+            return;
+        }
+    }
+}
+
+static void
+free_pending_search(pending_search *entry)
+{
+    search_waiter *waiter, *next;
+
+    for (waiter = entry->waiters; waiter != NULL; waiter = next) {
+        next = waiter->next;
+        delete_trampoline(waiter->trampoline);
+        PyMem_Free(waiter);
+    }
+    PyMem_Free(entry->query);
+    PyMem_Free(entry);
+}
+
 void
 Session_search_complete(sp_search *search, void *data)
 {
-    Callback *trampoline = (Callback *)data;
-    debug_printf(">> search complete (%p, %p)", search, trampoline);
+    pending_search *entry = (pending_search *)data;
+    debug_printf(">> search complete (%p, %p)", search, entry);
 
-    if (trampoline == NULL)
+    if (entry == NULL)
         return;
 
     PyObject *result, *search_results;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    search_waiter *waiter, *waiters;
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "search_complete");
+
+    /* Unlink first, so that callbacks searching for the same thing again
+     * get a new search. */
+    unlink_pending_search(entry);
+    waiters = entry->waiters;
+    entry->waiters = NULL;
+    entry->last_waiter = &entry->waiters;
+
+    for (waiter = waiters; waiter != NULL; waiter = waiter->next) {
+        search_results = Results_FromSpotify(search);
+        result = PyObject_CallFunction(waiter->trampoline->callback, "NO",
+                                       search_results,
+                                       waiter->trampoline->userdata);
+
+        if (result != NULL)
+            Py_DECREF(result);
+        else
+            write_unraisable(waiter->trampoline->callback);
+    }
+    entry->waiters = waiters;
 
-    search_results = Results_FromSpotify(search);
-    result = PyObject_CallFunction(trampoline->callback, "NO", search_results,
-                                   trampoline->userdata);
+    if (entry->search == NULL) {
+        /* Completed from within sp_search_create(), Session_search cleans
+         * up once it returns. */
+        entry->completed = 1;
+    }
+    else {
+        sp_search_release(search);
+        free_pending_search(entry);
+    }
+    profile_gil_release(&profile, gstate);
+}
 
-    if (result != NULL)
-        Py_DECREF(result);
+/* Result types of a search, in the order of their offset and count in the
+ * parameters of sp_search_create() */
+static const char *search_result_types[] = {
+    "tracks", "albums", "artists", "playlists", NULL };
+
+/* Zero the count of each type of result not named in types, a string or an
+ * iterable of strings. */
+static int
+project_search(PyObject *types, int *params)
+{
+    PyObject *iter, *item, *name;
+    int wanted[SEARCH_PARAMS / 2] = { 0 };
+    int i;
+
+    if (PyString_Check(types) || PyUnicode_Check(types)) {
+        types = PyTuple_Pack(1, types);
+        if (types == NULL)
+            return -1;
+        iter = PyObject_GetIter(types);
+        Py_DECREF(types);
+    }
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        iter = PyObject_GetIter(types);
+    if (iter == NULL)
+        return -1;
 
-    delete_trampoline(trampoline);
-    PyGILState_Release(gstate);
+    while ((item = PyIter_Next(iter)) != NULL) {
+        if (PyUnicode_Check(item))
+            name = PyUnicode_AsASCIIString(item);
+        else if (PyString_Check(item)) {
+            name = item;
+            Py_INCREF(name);
+        }
+        else {
+            PyErr_SetString(PyExc_TypeError,
+                            "search result types must be strings");
+            name = NULL;
+        }
+        Py_DECREF(item);
+        if (name == NULL)
+            break;
+        for (i = 0; search_result_types[i] != NULL; i++) {
+            if (strcmp(PyString_AS_STRING(name), search_result_types[i]) == 0)
+                break;
+        }
+        if (search_result_types[i] == NULL)
+            PyErr_Format(PyExc_ValueError, "Unknown search result type: %s",
+                         PyString_AS_STRING(name));
+        else
+            wanted[i] = 1;
+        Py_DECREF(name);
+        if (PyErr_Occurred())
+            break;
+    }
+    Py_DECREF(iter);
+    if (PyErr_Occurred())
+        return -1;
+
+    for (i = 0; i < SEARCH_PARAMS / 2; i++) {
+        if (!wanted[i])
+            params[2 * i + 1] = 0;
+    }
+    return 0;
 }
 
 static PyObject *
 Session_search(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    PyObject *callback, *userdata = NULL;
-    Callback *trampoline;
+    PyObject *callback, *userdata = NULL, *types = NULL, *results;
+    pending_search *entry;
 
     char *query, *tmp = NULL;
     sp_search *search;
@@ -224,16 +506,15 @@ Session_search(PyObject *self, PyObject *args, PyObject *kwds)
     static char *kwlist[] = {
         "query", "callback", "track_offset", "track_count", "album_offset",
         "album_count", "artist_offset", "artist_count", "playlist_offset",
-        "playlist_count", "search_type", "userdata", NULL };
+        "playlist_count", "search_type", "userdata", "types", NULL };
 
-    /* TODO: free query memory? */
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "esO|iiiiiiiisO", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "esO|iiiiiiiisOO", kwlist,
                                      ENCODING, &query, &callback,
                                      &track_offset, &track_count,
                                      &album_offset, &album_count,
                                      &artist_offset, &artist_count,
                                      &playlist_offset, &playlist_count,
-                                     &tmp, &userdata))
+                                     &tmp, &userdata, &types))
         return NULL;
 
     /* TODO: create type string constants. */
@@ -246,23 +527,63 @@ Session_search(PyObject *self, PyObject *args, PyObject *kwds)
         }
         else {
             PyErr_Format(SpotifyError, "Unknown search type: %s", tmp);
+            PyMem_Free(query);
             return NULL;
         }
     }
 
-    trampoline = create_trampoline(callback, userdata);
+    int params[SEARCH_PARAMS] = {
+        track_offset, track_count, album_offset, album_count,
+        artist_offset, artist_count, playlist_offset, playlist_count };
+
+    if (types != NULL && types != Py_None &&
+            project_search(types, params) < 0) {
+        PyMem_Free(query);
+        return NULL;
+    }
+
+    entry = find_pending_search(query, params, search_type);
+    if (entry != NULL) {
+        PyMem_Free(query);
+        if (add_search_waiter(entry, callback, userdata) < 0)
+            return NULL;
+        return Results_FromSpotify(entry->search);
+    }
+
+    entry = new_pending_search(query, params, search_type);
+    if (entry == NULL || add_search_waiter(entry, callback, userdata) < 0) {
+        if (entry != NULL) {
+            unlink_pending_search(entry);
+            free_pending_search(entry);
+        }
+        PyMem_Free(query);
+        return NULL;
+    }
 
     Py_BEGIN_ALLOW_THREADS;
-    /* TODO: audit that we cleanup with _release */
-    search = sp_search_create(Session_SP_SESSION(self), query, track_offset,
-                              track_count, album_offset, album_count,
-                              artist_offset, artist_count, playlist_offset,
-                              playlist_count, search_type,
-                              Session_search_complete, (void *)trampoline);
+    search = sp_search_create(Session_SP_SESSION(self), query, params[0],
+                              params[1], params[2], params[3], params[4],
+                              params[5], params[6], params[7], search_type,
+                              Session_search_complete, (void *)entry);
     Py_END_ALLOW_THREADS;
+    PyMem_Free(query);
 
-    /* TODO: this leaks a ref */
-    return Results_FromSpotify(search);
+    if (search == NULL) {
+        unlink_pending_search(entry);
+        free_pending_search(entry);
+        PyErr_SetString(SpotifyError, "failed to create search");
+        return NULL;
+    }
+
+    results = Results_FromSpotify(search);
+    if (entry->completed) {
+        sp_search_release(search);
+        free_pending_search(entry);
+    }
+    else {
+        entry->search = search;
+    }
+    return results;
 }
 
 static PyObject *
@@ -311,6 +632,104 @@ Session_set_preferred_bitrate(PyObject *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+static PyObject *
+Session_set_audio_ring(PyObject *self, PyObject *args)
+{
+    PyObject *ring, *old;
+
+    if (!PyArg_ParseTuple(args, "O", &ring))
+        return NULL;
+
+    if (ring != Py_None && !PyObject_TypeCheck(ring, &AudioRingType)) {
+        PyErr_SetString(PyExc_TypeError, "expected an AudioRing or None");
+        return NULL;
+    }
+
+    old = g_py_audio_ring;
+    if (ring == Py_None) {
+        g_py_audio_ring = NULL;
+        g_audio_ring = NULL;
+    }
+    else {
+        Py_INCREF(ring);
+        g_py_audio_ring = ring;
+        g_audio_ring = AudioRing_RING(ring);
+    }
+    __sync_synchronize();
+
+    /* Wait for any delivery still writing to the previous ring. */
+    Py_BEGIN_ALLOW_THREADS;
+    while (g_audio_ring_writers > 0)
+        sched_yield();
+    Py_END_ALLOW_THREADS;
+
+    Py_XDECREF(old);
+    Py_RETURN_NONE;
+}
+
+static int
+set_nonblocking_cloexec(int fd)
+{
+    int flags = fcntl(fd, F_GETFL);
+    if (flags < 0 || fcntl(fd, F_SETFL, flags | O_NONBLOCK) < 0)
+        return -1;
+    flags = fcntl(fd, F_GETFD);
+    if (flags < 0 || fcntl(fd, F_SETFD, flags | FD_CLOEXEC) < 0)
+        return -1;
+    return 0;
+}
+
+static PyObject *
+Session_notify_fd(PyObject *self)
+{
+    int fds[2];
+
+    if (g_notify_read_fd >= 0)
+        return Py_BuildValue("i", g_notify_read_fd);
+
+    if (pipe(fds) < 0)
+        return PyErr_SetFromErrno(PyExc_OSError);
+
+    if (set_nonblocking_cloexec(fds[0]) < 0 ||
+            set_nonblocking_cloexec(fds[1]) < 0) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        close(fds[0]);
+        close(fds[1]);
+        return NULL;
+    }
+
+    g_notify_read_fd = fds[0];
+    g_notify_write_fd = fds[1];
+    __sync_synchronize();
+    /* Events may have been pending before the pipe existed. */
+    if (write(fds[1], "", 1) < 0)
+        debug_printf("initial notify write failed");
+    return Py_BuildValue("i", g_notify_read_fd);
+}
+
+static PyObject *
+Session_close_notify_fd(PyObject *self)
+{
+    int read_fd = g_notify_read_fd, write_fd = g_notify_write_fd;
+
+    if (read_fd < 0)
+        Py_RETURN_NONE;
+
+    g_notify_write_fd = -1;
+    __sync_synchronize();
+
+    /* Wait for any notification still writing to the pipe. */
+    Py_BEGIN_ALLOW_THREADS;
+    while (g_notify_writers > 0)
+        sched_yield();
+    Py_END_ALLOW_THREADS;
+
+    g_notify_read_fd = -1;
+    close(read_fd);
+    close(write_fd);
+    Py_RETURN_NONE;
+}
+
 static PyObject *
 Session_starred(PyObject *self)
 {
@@ -381,6 +800,9 @@ static PyMethodDef Session_methods[] = {
     {"create",   (PyCFunction)Session_create, METH_VARARGS | METH_CLASS,
      "Returns a Session object embedding a newly created Spotify session"
     },
+    {"rebind_callbacks", (PyCFunction)Session_rebind_callbacks, METH_NOARGS,
+     "Look up the session callbacks on the client again"
+    },
     {"username", (PyCFunction)Session_username, METH_NOARGS,
      "Return the canonical username for the logged in user"
     },
@@ -426,6 +848,18 @@ static PyMethodDef Session_methods[] = {
     {"set_preferred_bitrate", (PyCFunction)Session_set_preferred_bitrate, METH_VARARGS,
      "Set the preferred bitrate of the audio stream. 0 = 160k, 1 = 320k"
     },
+    {"set_audio_ring", (PyCFunction)Session_set_audio_ring, METH_VARARGS,
+     "Deliver audio into the given AudioRing instead of calling " \
+     "music_delivery, or restore the callback if None"
+    },
+    {"notify_fd", (PyCFunction)Session_notify_fd, METH_NOARGS,
+     "Return a file descriptor which becomes readable when events need " \
+     "processing, instead of calling notify_main_thread"
+    },
+    {"close_notify_fd", (PyCFunction)Session_close_notify_fd, METH_NOARGS,
+     "Close the file descriptor returned by notify_fd and go back to " \
+     "calling notify_main_thread"
+    },
     {"starred", (PyCFunction)Session_starred, METH_NOARGS,
      "Get the starred playlist for the logged in user"
     },
@@ -491,39 +925,83 @@ PyTypeObject SessionType = {
 /*           CALLBACK SHIMS          */
 /*************************************/
 
-/* TODO: convert to Py_VaBuildValue based solution so we can support
- *   music_delivery?
- * TODO: could we avoid having to pass session into the python callbacks, or
- *   could we at least store a g_py_session to save us reconstructing it all
- *   the time? Or would that break in unexpected ways if the session gets
- *   modified? Measuring the affect of changing say music_delivery to not
- *   waste time contructing the session would be a good place to start.
- * TODO: could we avoid having to lookup the attr for the callback on every
- *   single callback? Would that break cases where people change the config
- *   later, does that matter?
- */
+/* Resolves every session callback on client into the dispatch table. Missing
+ * callbacks are left out of the table and silently skipped. For backwards
+ * compatibility clients without _manager_logged_out get logged_out. */
 static void
-session_callback(sp_session * session, const char *attr, PyObject *extra)
+bind_callbacks(PyObject *client)
 {
-    PyObject *callback, *client, *py_session, *result;
-    py_session = Session_FromSpotify(session);
-    if (py_session != NULL) {
+    int i;
+    PyObject *callback, *old;
+
+    for (i = 0; i < CB_COUNT; i++) {
+        callback = PyObject_GetAttrString(client, g_callback_names[i]);
+        if (callback == NULL && i == CB_LOGGED_OUT) {
+            PyErr_Clear();
+            callback = PyObject_GetAttrString(client, "logged_out");
+        }
+        if (callback == NULL)
+            PyErr_Clear();
 
-        client = (PyObject *)sp_session_userdata(session);
-        callback = PyObject_GetAttrString(client, attr);
+        old = g_callback_table[i];
+        g_callback_table[i] = callback;
+        Py_XDECREF(old);
+    }
+}
 
-        if (callback != NULL) {
-            result = PyObject_CallFunctionObjArgs(callback, py_session, extra, NULL);
+/* Returns a new reference to the callback for id, or NULL if there is none.
+ * Events for a session other than g_session (e.g. while it is still being
+ * created) fall back to looking the callback up on the session userdata. */
+static PyObject *
+get_callback(sp_session *session, int id)
+{
+    PyObject *callback, *client;
 
-            if (result == NULL)
-                PyErr_WriteUnraisable(callback);
-            else
-                Py_DECREF(result);
+    if (session == g_session && g_py_session != NULL) {
+        callback = g_callback_table[id];
+        Py_XINCREF(callback);
+        return callback;
+    }
+
+    client = (PyObject *)sp_session_userdata(session);
+    callback = PyObject_GetAttrString(client, g_callback_names[id]);
+    if (callback == NULL)
+        PyErr_Clear();
+    return callback;
+}
+
+/* Returns a new reference to the Python object for session. */
+static PyObject *
+get_py_session(sp_session *session)
+{
+    if (session == g_session && g_py_session != NULL) {
+        Py_INCREF(g_py_session);
+        return g_py_session;
+    }
+    return Session_FromSpotify(session);
+}
+
+static void
+session_callback(sp_session * session, int id, PyObject *extra)
+{
+    PyObject *callback, *py_session, *result;
+
+    callback = get_callback(session, id);
+    if (callback == NULL)
+        return;
+
+    py_session = get_py_session(session);
+    if (py_session != NULL) {
+        result = PyObject_CallFunctionObjArgs(callback, py_session, extra, NULL);
+
+        if (result == NULL)
+            write_unraisable(callback);
+        else
+            Py_DECREF(result);
 
-            Py_DECREF(callback);
-        }
         Py_DECREF(py_session);
     }
+    Py_DECREF(callback);
 }
 
 static void
@@ -531,13 +1009,14 @@ logged_in(sp_session * session, sp_error error)
 {
     debug_printf(">> logged_in called: %s", sp_error_message(error));
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "logged_in");
     PyObject *py_error = error_message(error);
     if (py_error != NULL) {
-        session_callback(session, "logged_in", py_error);
+        session_callback(session, CB_LOGGED_IN, py_error);
         Py_DECREF(py_error);
     }
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -545,10 +1024,10 @@ logged_out(sp_session * session)
 {
     debug_printf(">> logged_out called");
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-    /* TODO: should this fallback to logged_out like old code did? */
-    session_callback(session, "_manager_logged_out", NULL);
-    PyGILState_Release(gstate);
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "logged_out");
+    session_callback(session, CB_LOGGED_OUT, NULL);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -556,9 +1035,11 @@ metadata_updated(sp_session * session)
 {
     debug_printf(">> metadata_updated called");
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-    session_callback(session, "metadata_updated", NULL);
-    PyGILState_Release(gstate);
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "metadata_updated");
+    load_barrier_rescan_all();
+    session_callback(session, CB_METADATA_UPDATED, NULL);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -566,13 +1047,14 @@ connection_error(sp_session * session, sp_error error)
 {
     debug_printf(">> connection_error called: %s", sp_error_message(error));
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "connection_error");
     PyObject *py_error = error_message(error);
     if (py_error != NULL) {
-        session_callback(session, "connection_error", py_error);
+        session_callback(session, CB_CONNECTION_ERROR, py_error);
         Py_DECREF(py_error);
     }
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -580,13 +1062,14 @@ message_to_user(sp_session * session, const char *data)
 {
     debug_printf(">> message_to_user called: %s", data);
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "message_to_user");
     PyObject *message = PyUnicode_FromString(data);
     if (message != NULL) {
-        session_callback(session, "message_to_user", message);
+        session_callback(session, CB_MESSAGE_TO_USER, message);
         Py_DECREF(message);
     }
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -597,9 +1080,23 @@ notify_main_thread(sp_session * session)
     if (!session_constructed)
         return;
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-    session_callback(session, "notify_main_thread", NULL);
-    PyGILState_Release(gstate);
+    int fd;
+    __sync_fetch_and_add(&g_notify_writers, 1);
+    fd = g_notify_write_fd;
+    if (fd >= 0) {
+        /* A full pipe is readable already, so EAGAIN is fine. */
+        if (write(fd, "", 1) < 0 && errno != EAGAIN)
+            debug_printf("notify write failed: %d", errno);
+        __sync_fetch_and_sub(&g_notify_writers, 1);
+        return;
+    }
+    __sync_fetch_and_sub(&g_notify_writers, 1);
+
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "notify_main_thread");
+    session_callback(session, CB_NOTIFY_MAIN_THREAD, NULL);
+    profile_gil_release(&profile, gstate);
 }
 
 static int
@@ -628,24 +1125,37 @@ music_delivery(sp_session * session, const sp_audioformat * format,
 
     int consumed = num_frames;  // assume all consumed
     int size = frame_size(format);
+    audio_ring *ring;
+
+    __sync_fetch_and_add(&g_audio_ring_writers, 1);
+    ring = g_audio_ring;
+    if (ring != NULL) {
+        consumed = audio_ring_write(ring, format, size, frames, num_frames);
+        __sync_fetch_and_sub(&g_audio_ring_writers, 1);
+        return consumed;
+    }
+    __sync_fetch_and_sub(&g_audio_ring_writers, 1);
 
-    PyObject *callback, *client, *py_frames, *py_session, *result;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    PyObject *callback, *py_frames, *py_session, *result;
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "music_delivery");
+
+    callback = get_callback(session, CB_MUSIC_DELIVERY);
+    if (callback == NULL) {
+        profile_gil_release(&profile, gstate);
+        return consumed;
+    }
 
     /* TODO: check if session creations succeeds. */
     py_frames = PyBuffer_FromMemory((void *)frames, num_frames * size);
-    py_session = Session_FromSpotify(session);
-
-    /* TODO: check if callback get succeeds. */
-    client = (PyObject *)sp_session_userdata(session);
-    callback = PyObject_GetAttrString(client, "music_delivery");
+    py_session = get_py_session(session);
 
     result = PyObject_CallFunction(callback, "NNiiiii", py_session, py_frames,
                                    size, num_frames, format->sample_type,
                                    format->sample_rate, format->channels);
 
     if (result == NULL)
-        PyErr_WriteUnraisable(callback);
+        write_unraisable(callback);
     else {
         if (PyInt_Check(result))
             consumed = (int)PyInt_AsLong(result);
@@ -654,12 +1164,12 @@ music_delivery(sp_session * session, const sp_audioformat * format,
         else {
             PyErr_SetString(PyExc_TypeError,
                             "music_delivery must return an integer");
-            PyErr_WriteUnraisable(callback);
+            write_unraisable(callback);
         }
         Py_DECREF(result);
     }
     Py_XDECREF(callback);
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
     return consumed;
 }
 
@@ -668,9 +1178,10 @@ play_token_lost(sp_session * session)
 {
     debug_printf(">> play_token_lost called");
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-    session_callback(session, "play_token_lost", NULL);
-    PyGILState_Release(gstate);
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "play_token_lost");
+    session_callback(session, CB_PLAY_TOKEN_LOST, NULL);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -678,13 +1189,14 @@ log_message(sp_session * session, const char *data)
 {
     debug_printf(">> log_message called: %s", data);
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "log_message");
     PyObject *message = PyUnicode_FromString(data);
     if (message != NULL) {
-        session_callback(session, "log_message", message);
+        session_callback(session, CB_LOG_MESSAGE, message);
         Py_DECREF(message);
     }
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -692,9 +1204,10 @@ end_of_track(sp_session * session)
 {
     debug_printf(">> end_of_track called");
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-    session_callback(session, "end_of_track", NULL);
-    PyGILState_Release(gstate);
+    profile_state profile;
+    PyGILState_STATE gstate = profile_gil_ensure(&profile, "end_of_track");
+    session_callback(session, CB_END_OF_TRACK, NULL);
+    profile_gil_release(&profile, gstate);
 }
 
 static void
@@ -702,13 +1215,15 @@ credentials_blob_updated(sp_session *session, const char *data)
 {
     debug_printf(">> credentials_blob_updated called");
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "credentials_blob_updated");
     PyObject *blob = PyBytes_FromString(data);
     if (blob != NULL) {
-        session_callback(session, "credentials_blob_updated", blob);
+        session_callback(session, CB_CREDENTIALS_BLOB_UPDATED, blob);
         Py_DECREF(blob);
     }
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 void
@@ -819,6 +1334,8 @@ create_session(PyObject *client, PyObject *settings)
         return NULL;
     }
 
+    bind_callbacks(client);
+
     debug_printf("creating session...");
     /* TODO: audit that we cleanup with _release */
     error = sp_session_create(&config, &session);
@@ -0,0 +1,352 @@
+#include <Python.h>
+#include <string.h>
+#include "libspotify/api.h"
+#include "pyspotify.h"
+#include "snapshot.h"
+#include "session.h"
+#include "link.h"
+
+typedef struct {
+    sp_track *track;
+    sp_playlist *playlist;
+    int index;
+} snapshot_row;
+
+typedef struct {
+    const char *name;
+    /* array.array typecode of numeric fields, '\0' for list fields */
+    char typecode;
+    int playlist_only;
+    int needs_session;
+    long (*number)(snapshot_row *row);
+    PyObject *(*object)(snapshot_row *row);
+} snapshot_field;
+
+static PyObject *
+link_uri(sp_link *link)
+{
+    char uri[LINK_MAX_URI_LENGTH];
+    int len;
+
+    if (link == NULL)
+        Py_RETURN_NONE;
+    len = sp_link_as_string(link, uri, sizeof(uri));
+    sp_link_release(link);
+    if (len < 0)
+        Py_RETURN_NONE;
+    return PyString_FromStringAndSize(uri, len);
+}
+
+static PyObject *
+field_name(snapshot_row *row)
+{
+    return PyUnicode_FromString(sp_track_name(row->track));
+}
+
+static PyObject *
+field_uri(snapshot_row *row)
+{
+    return link_uri(sp_link_create_from_track(row->track, 0));
+}
+
+static PyObject *
+field_artists(snapshot_row *row)
+{
+    PyObject *names, *name;
+    int i, count = sp_track_num_artists(row->track);
+
+    names = PyTuple_New(count);
+    if (names == NULL)
+        return NULL;
+    for (i = 0; i < count; i++) {
+        name = PyUnicode_FromString(
+            sp_artist_name(sp_track_artist(row->track, i)));
+        if (name == NULL) {
+            Py_DECREF(names);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(names, i, name);
+    }
+    return names;
+}
+
+static PyObject *
+field_album(snapshot_row *row)
+{
+    sp_album *album = sp_track_album(row->track);
+
+    if (album == NULL)
+        Py_RETURN_NONE;
+    return PyUnicode_FromString(sp_album_name(album));
+}
+
+static PyObject *
+field_album_uri(snapshot_row *row)
+{
+    sp_album *album = sp_track_album(row->track);
+
+    if (album == NULL)
+        Py_RETURN_NONE;
+    return link_uri(sp_link_create_from_album(album));
+}
+
+static long
+field_duration(snapshot_row *row)
+{
+    return sp_track_duration(row->track);
+}
+
+static long
+field_popularity(snapshot_row *row)
+{
+    return sp_track_popularity(row->track);
+}
+
+static long
+field_disc(snapshot_row *row)
+{
+    return sp_track_disc(row->track);
+}
+
+static long
+field_index(snapshot_row *row)
+{
+    return sp_track_index(row->track);
+}
+
+static long
+field_is_loaded(snapshot_row *row)
+{
+    return sp_track_is_loaded(row->track);
+}
+
+static long
+field_availability(snapshot_row *row)
+{
+    return sp_track_get_availability(g_session, row->track);
+}
+
+static long
+field_create_time(snapshot_row *row)
+{
+    return sp_playlist_track_create_time(row->playlist, row->index);
+}
+
+static long
+field_seen(snapshot_row *row)
+{
+    return sp_playlist_track_seen(row->playlist, row->index);
+}
+
+static PyObject *
+field_creator(snapshot_row *row)
+{
+    sp_user *user = sp_playlist_track_creator(row->playlist, row->index);
+
+    if (user == NULL)
+        Py_RETURN_NONE;
+    return PyUnicode_FromString(sp_user_canonical_name(user));
+}
+
+static PyObject *
+field_message(snapshot_row *row)
+{
+    const char *message = sp_playlist_track_message(row->playlist, row->index);
+
+    if (message == NULL)
+        Py_RETURN_NONE;
+    return PyUnicode_FromString(message);
+}
+
+static snapshot_field g_fields[] = {
+    {"name", '\0', 0, 0, NULL, field_name},
+    {"uri", '\0', 0, 0, NULL, field_uri},
+    {"artists", '\0', 0, 0, NULL, field_artists},
+    {"album", '\0', 0, 0, NULL, field_album},
+    {"album_uri", '\0', 0, 0, NULL, field_album_uri},
+    {"duration", 'i', 0, 0, field_duration, NULL},
+    {"popularity", 'i', 0, 0, field_popularity, NULL},
+    {"disc", 'i', 0, 0, field_disc, NULL},
+    {"index", 'i', 0, 0, field_index, NULL},
+    {"is_loaded", 'b', 0, 0, field_is_loaded, NULL},
+    {"availability", 'i', 0, 1, field_availability, NULL},
+    {"create_time", 'i', 1, 0, field_create_time, NULL},
+    {"creator", '\0', 1, 0, NULL, field_creator},
+    {"seen", 'b', 1, 0, field_seen, NULL},
+    {"message", '\0', 1, 0, NULL, field_message},
+    {NULL}
+};
+
+#define NUM_FIELDS (sizeof(g_fields) / sizeof(g_fields[0]) - 1)
+
+static PyObject *g_array_type = NULL;
+
+/* Wraps the count values of buffer into an array.array */
+static PyObject *
+make_array(char typecode, const char *buffer, size_t size)
+{
+    PyObject *module, *data, *array;
+
+    if (g_array_type == NULL) {
+        module = PyImport_ImportModule("array");
+        if (module == NULL)
+            return NULL;
+        g_array_type = PyObject_GetAttrString(module, "array");
+        Py_DECREF(module);
+        if (g_array_type == NULL)
+            return NULL;
+    }
+    data = PyString_FromStringAndSize(buffer, size);
+    if (data == NULL)
+        return NULL;
+    array = PyObject_CallFunction(g_array_type, "cO", typecode, data);
+    Py_DECREF(data);
+    return array;
+}
+
+/* Fills selected with the indices in g_fields of the requested fields, and
+ * returns how many there are, or -1 with an exception set. */
+static int
+select_fields(PyObject *fields, int *selected, int with_playlist)
+{
+    PyObject *seq, *item;
+    const char *name;
+    int i, j, count = 0;
+
+    if (fields == NULL || fields == Py_None) {
+        for (i = 0; g_fields[i].name != NULL; i++) {
+            if ((with_playlist || !g_fields[i].playlist_only) &&
+                    (g_session || !g_fields[i].needs_session))
+                selected[count++] = i;
+        }
+        return count;
+    }
+
+    seq = PySequence_Fast(fields, "fields must be a sequence of names");
+    if (seq == NULL)
+        return -1;
+    for (j = 0; j < PySequence_Fast_GET_SIZE(seq); j++) {
+        item = PySequence_Fast_GET_ITEM(seq, j);
+        if (PyUnicode_Check(item))
+            /* Raises UnicodeEncodeError, a ValueError, for unknown names */
+            item = PyUnicode_AsASCIIString(item);
+        else if (PyString_Check(item))
+            Py_INCREF(item);
+        else {
+            PyErr_SetString(PyExc_TypeError, "field names must be strings");
+            item = NULL;
+        }
+        if (item == NULL) {
+            Py_DECREF(seq);
+            return -1;
+        }
+        name = PyString_AS_STRING(item);
+        for (i = 0; g_fields[i].name != NULL; i++) {
+            if (strcmp(name, g_fields[i].name) == 0)
+                break;
+        }
+        if (g_fields[i].name == NULL ||
+                (g_fields[i].playlist_only && !with_playlist)) {
+            PyErr_Format(PyExc_ValueError, "Unknown snapshot field: %s",
+                         name);
+            Py_DECREF(item);
+            Py_DECREF(seq);
+            return -1;
+        }
+        Py_DECREF(item);
+        if (count < (int)NUM_FIELDS)
+            selected[count++] = i;
+    }
+    Py_DECREF(seq);
+    return count;
+}
+
+PyObject *
+track_snapshot(PyObject *fields, int count, snapshot_track_getter get,
+               void *source, sp_playlist *playlist)
+{
+    int selected[NUM_FIELDS];
+    PyObject *columns[NUM_FIELDS];
+    char *buffers[NUM_FIELDS];
+    snapshot_field *field;
+    snapshot_row row;
+    PyObject *result = NULL, *value;
+    int num_selected, i, j;
+    long number;
+
+    num_selected = select_fields(fields, selected, playlist != NULL);
+    if (num_selected < 0)
+        return NULL;
+    for (j = 0; j < num_selected; j++) {
+        if (g_fields[selected[j]].needs_session && !g_session) {
+            PyErr_SetString(SpotifyError, "Not logged in");
+            return NULL;
+        }
+    }
+
+    memset(columns, 0, sizeof(columns));
+    memset(buffers, 0, sizeof(buffers));
+    for (j = 0; j < num_selected; j++) {
+        field = &g_fields[selected[j]];
+        if (field->typecode == 'i')
+            buffers[j] = PyMem_Malloc(count * sizeof(int) + 1);
+        else if (field->typecode == 'b')
+            buffers[j] = PyMem_Malloc(count + 1);
+        else
+            columns[j] = PyList_New(count);
+        if (buffers[j] == NULL && columns[j] == NULL) {
+            PyErr_NoMemory();
+            goto cleanup;
+        }
+    }
+
+    row.playlist = playlist;
+    for (i = 0; i < count; i++) {
+        row.track = get(source, i);
+        row.index = i;
+        for (j = 0; j < num_selected; j++) {
+            field = &g_fields[selected[j]];
+            if (field->typecode == '\0') {
+                value = field->object(&row);
+                if (value == NULL)
+                    goto cleanup;
+                PyList_SET_ITEM(columns[j], i, value);
+                continue;
+            }
+            number = field->number(&row);
+            if (field->typecode == 'i')
+                ((int *)buffers[j])[i] = (int)number;
+            else
+                ((signed char *)buffers[j])[i] = (signed char)number;
+        }
+    }
+
+    result = PyDict_New();
+    if (result == NULL)
+        goto cleanup;
+    for (j = 0; j < num_selected; j++) {
+        field = &g_fields[selected[j]];
+        if (field->typecode == 'i')
+            value = make_array('i', buffers[j], count * sizeof(int));
+        else if (field->typecode == 'b')
+            value = make_array('b', buffers[j], count);
+        else {
+            value = columns[j];
+            Py_INCREF(value);
+        }
+        if (value == NULL || PyDict_SetItemString(result, field->name,
+                                                  value) < 0) {
+            Py_XDECREF(value);
+            Py_CLEAR(result);
+            goto cleanup;
+        }
+        Py_DECREF(value);
+    }
+
+cleanup:
+    for (j = 0; j < num_selected; j++) {
+        PyMem_Free(buffers[j]);
+        Py_XDECREF(columns[j]);
+    }
+    return result;
+}
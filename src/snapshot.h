@@ -0,0 +1,17 @@
+#include <Python.h>
+#include "pyspotify.h"
+
+/* Columnar snapshots of the tracks of a playlist, a browser or a search.
+ *
+ * The tracks are walked once, and each requested field is returned as one
+ * column in a dict: an array.array for numeric fields and a list for
+ * strings. */
+
+typedef sp_track *(*snapshot_track_getter)(void *source, int index);
+
+/* Returns the snapshot of count tracks, get(source, index) returning each of
+ * them. fields is a sequence of field names, or NULL or None for all of
+ * them. Playlist fields are only available if playlist is not NULL. */
+PyObject *
+track_snapshot(PyObject *fields, int count, snapshot_track_getter get,
+               void *source, sp_playlist *playlist);
@@ -3,8 +3,11 @@
 #include <libspotify/api.h>
 #include <string.h>
 #include "pyspotify.h"
+#include "seqiter.h"
+#include "profile.h"
 #include "session.h"
 #include "toplistbrowser.h"
+#include "snapshot.h"
 #include "user.h"
 #include "album.h"
 #include "artist.h"
@@ -20,7 +23,9 @@ ToplistBrowser_browse_complete(sp_toplistbrowse *browser, void *data)
         return;
 
     PyObject *result, *self;
-    PyGILState_STATE gstate = PyGILState_Ensure();
+    profile_state profile;
+    PyGILState_STATE gstate =
+        profile_gil_ensure(&profile, "toplistbrowse_complete");
 
     self = ToplistBrowser_FromSpotify(browser);
     result = PyObject_CallFunction(trampoline->callback, "NO", self,
@@ -29,10 +34,10 @@ ToplistBrowser_browse_complete(sp_toplistbrowse *browser, void *data)
     if (result != NULL)
         Py_DECREF(result);
     else
-        PyErr_WriteUnraisable(trampoline->callback);
+        write_unraisable(trampoline->callback);
 
     delete_trampoline(trampoline);
-    PyGILState_Release(gstate);
+    profile_gil_release(&profile, gstate);
 }
 
 static PyObject *
@@ -98,8 +103,11 @@ ToplistBrowser_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
     }
     Py_DECREF(region);
 
-    if (callback)
+    if (callback) {
         trampoline = create_trampoline(callback, userdata);
+        if (trampoline == NULL)
+            return NULL;
+    }
 
     Py_BEGIN_ALLOW_THREADS
     /* TODO: audit that we cleanup with _release */
@@ -162,6 +170,21 @@ ToplistBrowser_sq_length(PyObject* self)
         return sp_toplistbrowse_num_tracks(browser);
 }
 
+static PyObject *
+ToplistBrowser_item_at(PyObject *self, Py_ssize_t index)
+{
+    int i = (int)index;
+    sp_toplistbrowse *browser = ToplistBrowser_SP_TOPLISTBROWSE(self);
+
+    /* Same type detection as ToplistBrowser_sq_length() */
+    if (sp_toplistbrowse_num_albums(browser))
+        return Album_FromSpotify(sp_toplistbrowse_album(browser, i));
+    else if (sp_toplistbrowse_num_artists(browser))
+        return Artist_FromSpotify(sp_toplistbrowse_artist(browser, i));
+    else
+        return Track_FromSpotify(sp_toplistbrowse_track(browser, i));
+}
+
 PyObject *
 ToplistBrowser_sq_item(PyObject *self, Py_ssize_t index)
 {
@@ -180,6 +203,24 @@ ToplistBrowser_sq_item(PyObject *self, Py_ssize_t index)
     return NULL;
 }
 
+static PyObject *
+ToplistBrowser_iter(PyObject *self)
+{
+    return seq_iter_new(self, ToplistBrowser_sq_length(self), ToplistBrowser_item_at);
+}
+
+static PyObject *
+ToplistBrowser_mp_subscript(PyObject *self, PyObject *key)
+{
+    return seq_subscript(self, key, ToplistBrowser_sq_length(self), ToplistBrowser_item_at);
+}
+
+static PyMappingMethods ToplistBrowser_as_mapping = {
+    (lenfunc) ToplistBrowser_sq_length,  /*mp_length*/
+    ToplistBrowser_mp_subscript,         /*mp_subscript*/
+    0,                          /*mp_ass_subscript*/
+};
+
 PySequenceMethods ToplistBrowser_as_sequence = {
     (lenfunc) ToplistBrowser_sq_length,    /*sq_length*/
     0,                                     /*sq_concat*/
@@ -191,10 +232,35 @@ PySequenceMethods ToplistBrowser_as_sequence = {
     0,                                     /*sq_inplace_repeat*/
 };
 
+static sp_track *
+ToplistBrowser_track_at(void *source, int index)
+{
+    return sp_toplistbrowse_track((sp_toplistbrowse *)source, index);
+}
+
+static PyObject *
+ToplistBrowser_snapshot(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fields = NULL;
+    sp_toplistbrowse *toplistbrowse = ToplistBrowser_SP_TOPLISTBROWSE(self);
+
+    static char *kwlist[] = {"fields", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &fields))
+        return NULL;
+
+    return track_snapshot(fields, sp_toplistbrowse_num_tracks(toplistbrowse),
+                          ToplistBrowser_track_at, toplistbrowse, NULL);
+}
+
 static PyMethodDef ToplistBrowser_methods[] = {
     {"is_loaded", (PyCFunction) ToplistBrowser_is_loaded, METH_NOARGS,
      "True if this toplist browser has been loaded by the client"
     },
+    {"snapshot", (PyCFunction)ToplistBrowser_snapshot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Return metadata of the tracks of this toplist as columns"
+    },
     {"error", (PyCFunction) ToplistBrowser_error, METH_NOARGS,
      ""
     },
@@ -219,7 +285,7 @@ PyTypeObject ToplistBrowserType = {
     0,                                        /*tp_repr*/
     0,                                        /*tp_as_number*/
     &ToplistBrowser_as_sequence,              /*tp_as_sequence*/
-    0,                                        /*tp_as_mapping*/
+    &ToplistBrowser_as_mapping,               /*tp_as_mapping*/
     0,                                        /*tp_hash*/
     0,                                        /*tp_call*/
     0,                                        /*tp_str*/
@@ -232,7 +298,7 @@ PyTypeObject ToplistBrowserType = {
     0,                                        /* tp_clear */
     0,                                        /* tp_richcompare */
     0,                                        /* tp_weaklistoffset */
-    0,                                        /* tp_iter */
+    ToplistBrowser_iter,                      /* tp_iter */
     0,                                        /* tp_iternext */
     ToplistBrowser_methods,                   /* tp_methods */
     ToplistBrowser_members,                   /* tp_members */
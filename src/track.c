@@ -3,10 +3,14 @@
 #include "libspotify/api.h"
 #include "pyspotify.h"
 #include "track.h"
+#include "intern.h"
 #include "artist.h"
 #include "album.h"
 #include "session.h"
 
+/* The live track wrappers, by sp_track pointer, see intern.h */
+static intern_table track_wrappers = INTERN_TABLE_INIT;
+
 static PyObject *
 Track_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -18,20 +22,44 @@ Track_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 PyObject *
 Track_FromSpotify(sp_track *track)
 {
-    PyObject *self = TrackType.tp_alloc(&TrackType, 0);
+    PyObject *self = intern_lookup(&track_wrappers, track);
+
+    if (self != NULL)
+        return self;
+    self = TrackType.tp_alloc(&TrackType, 0);
     Track_SP_TRACK(self) = track;
     sp_track_add_ref(track);
+    intern_add(&track_wrappers, track, self);
     return self;
 }
 
 static void
 Track_dealloc(PyObject *self)
 {
+    intern_remove(&track_wrappers, Track_SP_TRACK(self), self);
+    if (((Track *)self)->weakreflist != NULL)
+        PyObject_ClearWeakRefs(self);
     if (Track_SP_TRACK(self) != NULL)
         sp_track_release(Track_SP_TRACK(self));
     self->ob_type->tp_free(self);
 }
 
+static long
+Track_hash(PyObject *self)
+{
+    return sp_hash(Track_SP_TRACK(self));
+}
+
+static PyObject *
+Track_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyObject_TypeCheck(other, &TrackType)) {
+        Py_INCREF(Py_NotImplemented);
+        return Py_NotImplemented;
+    }
+    return sp_richcompare(Track_SP_TRACK(self), Track_SP_TRACK(other), op);
+}
+
 static PyObject *
 Track_is_loaded(PyObject *self)
 {
@@ -223,7 +251,7 @@ PyTypeObject TrackType = {
     0,                                        /*tp_as_number*/
     0,                                        /*tp_as_sequence*/
     0,                                        /*tp_as_mapping*/
-    0,                                        /*tp_hash*/
+    (hashfunc) Track_hash,                    /*tp_hash*/
     0,                                        /*tp_call*/
     Track_str,                                /*tp_str*/
     0,                                        /*tp_getattro*/
@@ -233,8 +261,8 @@ PyTypeObject TrackType = {
     "Track objects",                          /* tp_doc */
     0,                                        /* tp_traverse */
     0,                                        /* tp_clear */
-    0,                                        /* tp_richcompare */
-    0,                                        /* tp_weaklistoffset */
+    Track_richcompare,                        /* tp_richcompare */
+    offsetof(Track, weakreflist),             /* tp_weaklistoffset */
     0,                                        /* tp_iter */
     0,                                        /* tp_iternext */
     Track_methods,                            /* tp_methods */
@@ -1,6 +1,7 @@
 typedef struct {
     PyObject_HEAD
     sp_track *_track;
+    PyObject *weakreflist;
 } Track;
 
 #define Track_SP_TRACK(o) ((Track *)o)->_track
@@ -4,6 +4,10 @@
 #include "pyspotify.h"
 #include "session.h"
 #include "user.h"
+#include "intern.h"
+
+/* The live user wrappers, by sp_user pointer, see intern.h */
+static intern_table user_wrappers = INTERN_TABLE_INIT;
 
 static PyObject *
 User_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
@@ -16,20 +20,44 @@ User_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 PyObject *
 User_FromSpotify(sp_user *user)
 {
-    PyObject *self = UserType.tp_alloc(&UserType, 0);
+    PyObject *self = intern_lookup(&user_wrappers, user);
+
+    if (self != NULL)
+        return self;
+    self = UserType.tp_alloc(&UserType, 0);
     User_SP_USER(self) = user;
     sp_user_add_ref(user);
+    intern_add(&user_wrappers, user, self);
     return self;
 }
 
 static void
 User_dealloc(PyObject *self)
 {
+    intern_remove(&user_wrappers, User_SP_USER(self), self);
+    if (((User *)self)->weakreflist != NULL)
+        PyObject_ClearWeakRefs(self);
     if (User_SP_USER(self) != NULL)
         sp_user_release(User_SP_USER(self));
     self->ob_type->tp_free(self);
 }
 
+static long
+User_hash(PyObject *self)
+{
+    return sp_hash(User_SP_USER(self));
+}
+
+static PyObject *
+User_richcompare(PyObject *self, PyObject *other, int op)
+{
+    if (!PyObject_TypeCheck(other, &UserType)) {
+        Py_INCREF(Py_NotImplemented);
+        return Py_NotImplemented;
+    }
+    return sp_richcompare(User_SP_USER(self), User_SP_USER(other), op);
+}
+
 static PyObject *
 User_is_loaded(PyObject *self)
 {
@@ -88,7 +116,7 @@ PyTypeObject UserType = {
     0,                                        /*tp_as_number*/
     0,                                        /*tp_as_sequence*/
     0,                                        /*tp_as_mapping*/
-    0,                                        /*tp_hash*/
+    (hashfunc) User_hash,                     /*tp_hash*/
     0,                                        /*tp_call*/
     User_str,                                 /*tp_str*/
     0,                                        /*tp_getattro*/
@@ -98,8 +126,8 @@ PyTypeObject UserType = {
     "User objects",                           /* tp_doc */
     0,                                        /* tp_traverse */
     0,                                        /* tp_clear */
-    0,                                        /* tp_richcompare */
-    0,                                        /* tp_weaklistoffset */
+    User_richcompare,                         /* tp_richcompare */
+    offsetof(User, weakreflist),              /* tp_weaklistoffset */
     0,                                        /* tp_iter */
     0,                                        /* tp_iternext */
     User_methods,                             /* tp_methods */
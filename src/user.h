@@ -1,6 +1,7 @@
 typedef struct {
     PyObject_HEAD
     sp_user *_user;
+    PyObject *weakreflist;
 } User;
 
 #define User_SP_USER(o) ((User *)o)->_user
@@ -40,6 +40,23 @@ class TestAlbumbrowser(unittest.TestCase):
         assert self.browser[1].name() == 'baz2'
         assert self.browser[2].name() == 'baz3'
 
+    def test_iter(self):
+        assert [t.name() for t in self.browser] == ['baz1', 'baz2', 'baz3']
+
+    def test_negative_index(self):
+        assert self.browser[-1].name() == 'baz3'
+        self.assertRaises(IndexError, lambda: self.browser[-4])
+
+    def test_slice(self):
+        assert [t.name() for t in self.browser[1:]] == ['baz2', 'baz3']
+        assert [t.name() for t in self.browser[::-2]] == ['baz3', 'baz1']
+
+    def test_snapshot(self):
+        snapshot = self.browser.snapshot(['name', 'album'])
+        assert snapshot['name'] == ['baz1', 'baz2', 'baz3']
+        assert snapshot['album'] == ['bar'] * 3
+        self.assertRaises(ValueError, self.browser.snapshot, ['create_time'])
+
     def test_browser(self):
         browser = AlbumBrowser(self.album)
 
@@ -0,0 +1,97 @@
+import unittest
+
+from spotify import _mockspotify
+from spotify._mockspotify import mock_album, mock_albumbrowse, mock_artist
+from spotify._mockspotify import mock_search, mock_track
+from spotify._mockspotify import registry_add, registry_clean
+import spotify.manager.session
+import spotify.manager.asyncsession
+# monkeypatch for testing
+spotify.manager.session.spotify = _mockspotify
+spotify.manager.asyncsession.spotify = _mockspotify
+
+from spotify.manager.asyncsession import asyncio, AsyncSpotifySessionManager
+
+
+class BaseMockClient(AsyncSpotifySessionManager):
+
+    cache_location = "/foo"
+    settings_location = "/foo"
+    application_key = "appkey_good"
+    user_agent = "user_agent_foo"
+
+    def __init__(self, event_loop):
+        AsyncSpotifySessionManager.__init__(self, "username_good",
+            "password_good", event_loop=event_loop)
+
+
+@unittest.skipUnless(asyncio, 'requires asyncio or trollius')
+class TestAsyncSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.event_loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.event_loop.close()
+
+    def test_connect_returns_when_logged_out(self):
+        class MockClient(BaseMockClient):
+            def logged_in(self, session, error):
+                self.found_username = session.username()
+                self.disconnect()
+
+        c = MockClient(self.event_loop)
+        self.event_loop.run_until_complete(c.connect())
+        self.assertEqual(c.username, c.found_username)
+
+    def test_loop_is_not_used(self):
+        c = BaseMockClient(self.event_loop)
+        self.assertRaises(RuntimeError, c.loop, c.session)
+
+    def test_notify_fd_reader(self):
+        class MockClient(BaseMockClient):
+            def logged_in(self, session, error):
+                self.fd = session.notify_fd()
+                # The event loop watches the notification pipe while connected
+                self.watched = self.event_loop.remove_reader(self.fd)
+                self.event_loop.add_reader(self.fd, self._process_events)
+                self.disconnect()
+
+        c = MockClient(self.event_loop)
+        self.event_loop.run_until_complete(c.connect())
+        self.assertTrue(c.watched)
+        self.assertFalse(self.event_loop.remove_reader(c.fd))
+
+
+@unittest.skipUnless(asyncio, 'requires asyncio or trollius')
+class TestAsyncFutures(unittest.TestCase):
+
+    artist = mock_artist('artist')
+    album = mock_album('album', artist)
+    track = mock_track('track', [artist], album)
+    search = mock_search('query', [track], [album], [artist])
+    browser = mock_albumbrowse(album, [track], artist=artist, error=0)
+
+    def setUp(self):
+        registry_add('spotify:search:query', self.search)
+        registry_add('spotify:album:1234', self.album)
+        registry_add('spotify:albumbrowse:1234', self.browser)
+        self.event_loop = asyncio.new_event_loop()
+        self.client = BaseMockClient(self.event_loop)
+
+    def tearDown(self):
+        self.event_loop.close()
+        registry_clean()
+
+    def test_search(self):
+        future = self.client.search('query', track_count=1)
+        results = self.event_loop.run_until_complete(future)
+        self.assertEqual([t.name() for t in results.tracks()], ['track'])
+        self.assertEqual(self.client._pending, set())
+
+    def test_browse_album(self):
+        future = self.client.browse_album(self.album)
+        browser = self.event_loop.run_until_complete(future)
+        self.assertTrue(browser.is_loaded())
+        self.assertEqual([t.name() for t in browser], ['track'])
+
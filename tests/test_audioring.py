@@ -0,0 +1,73 @@
+import unittest
+from spotify._mockspotify import AudioRing, mock_audio_ring_write
+
+class TestAudioRing(unittest.TestCase):
+
+    def test_empty(self):
+        ring = AudioRing(4096)
+        self.assertEqual(ring.capacity(), 4096)
+        self.assertEqual(ring.available(), 0)
+        self.assertEqual(ring.format(), None)
+        self.assertEqual(ring.read(), '')
+        self.assertEqual(ring.short_writes(), 0)
+
+    def test_read_into_empty(self):
+        ring = AudioRing(4096)
+        buf = bytearray(16)
+        self.assertEqual(ring.read_into(buf), 0)
+
+    def test_chunks_empty(self):
+        ring = AudioRing(4096)
+        self.assertEqual(list(ring.chunks(1024)), [])
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, AudioRing, 0)
+
+    def test_invalid_chunk_size(self):
+        ring = AudioRing(4096)
+        self.assertRaises(ValueError, ring.chunks, 0)
+
+
+class TestAudioRingDelivery(unittest.TestCase):
+
+    # Stereo 16 bit frames are 4 bytes long
+
+    def test_write_and_read(self):
+        ring = AudioRing(16)
+        self.assertEqual(mock_audio_ring_write(ring, 'abcdefghijkl'), 3)
+        self.assertEqual(ring.available(), 12)
+        self.assertEqual(ring.format(), (4, 0, 44100, 2))
+        self.assertEqual(ring.read(6), 'abcd')
+        buf = bytearray(6)
+        self.assertEqual(ring.read_into(buf), 4)
+        self.assertEqual(buf[:4], 'efgh')
+        self.assertEqual(ring.read(), 'ijkl')
+
+    def test_partial_frame_delivery(self):
+        ring = AudioRing(16)
+        self.assertEqual(mock_audio_ring_write(ring, 'abcdefg'), 1)
+        self.assertEqual(ring.read(), 'abcd')
+
+    def test_wraparound(self):
+        ring = AudioRing(16)
+        mock_audio_ring_write(ring, 'abcdefghijkl')
+        self.assertEqual(ring.read(8), 'abcdefgh')
+        self.assertEqual(mock_audio_ring_write(ring, 'mnopqrstuvwx'), 3)
+        self.assertEqual(ring.available(), 16)
+        self.assertEqual(ring.read(), 'ijklmnopqrstuvwx')
+
+    def test_short_write(self):
+        ring = AudioRing(8)
+        self.assertEqual(mock_audio_ring_write(ring, 'abcdefghijkl'), 2)
+        self.assertEqual(ring.short_writes(), 1)
+        self.assertEqual(ring.read(), 'abcdefgh')
+
+    def test_chunks_are_whole_frames(self):
+        ring = AudioRing(16)
+        mock_audio_ring_write(ring, 'abcdefghijkl')
+        self.assertEqual(list(ring.chunks(6)), ['abcd', 'efgh', 'ijkl'])
+
+    def test_chunk_smaller_than_frame(self):
+        ring = AudioRing(16)
+        mock_audio_ring_write(ring, 'abcd')
+        self.assertRaises(ValueError, list, ring.chunks(3))
@@ -92,3 +92,11 @@ class TestPlaylistManager(unittest.TestCase):
         self.assertEqual(type(args[2]), spotify._mockspotify.Playlist)
         self.assertEqual(args[2].name(), 'P')
         self.assertEqual(type(args[3]), int)
+
+    def test_unwatch(self):
+        self.manager.watch(self.container)
+        self.manager.watch(self.container, 'foo')
+        self.manager.unwatch(self.container)
+        self.assertRaises(spotify.SpotifyError, self.container.remove_callback,
+                          self.manager.container_loaded)
+        self.assertEqual(self.manager.unwatch_all(self.container), 4)
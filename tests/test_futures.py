@@ -0,0 +1,188 @@
+import threading
+import unittest
+
+from spotify import _mockspotify
+import spotify.futures
+# monkeypatch for testing
+spotify.futures.spotify = _mockspotify
+
+from spotify.futures import Future, CancelledError, TimeoutError
+from spotify.futures import wait_all, as_completed, browse_album
+from spotify.futures import search_pages, loaded, loaded_each
+from spotify._mockspotify import mock_albumbrowse, mock_album, mock_artist
+from spotify._mockspotify import registry_add, registry_clean
+from spotify._mockspotify import mock_set_loaded
+
+
+class TestFuture(unittest.TestCase):
+
+    def test_result(self):
+        future = Future()
+        future.set_result(42)
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 42)
+
+    def test_result_from_other_thread(self):
+        future = Future()
+        threading.Timer(0.01, future.set_result, [42]).start()
+        self.assertEqual(future.result(timeout=5), 42)
+
+    def test_result_timeout(self):
+        future = Future()
+        self.assertRaises(TimeoutError, future.result, 0.01)
+
+    def test_exception(self):
+        future = Future()
+        error = ValueError('foo')
+        future.set_exception(error)
+        self.assertEqual(future.exception(), error)
+        self.assertRaises(ValueError, future.result)
+
+    def test_cancel(self):
+        future = Future()
+        self.assertTrue(future.cancel())
+        self.assertTrue(future.cancelled())
+        self.assertRaises(CancelledError, future.result)
+        future.set_result(42)
+        self.assertTrue(future.cancelled())
+
+    def test_cancel_done_future(self):
+        future = Future()
+        future.set_result(42)
+        self.assertFalse(future.cancel())
+        self.assertEqual(future.result(), 42)
+
+    def test_add_done_callback(self):
+        done = []
+        future = Future()
+        future.add_done_callback(done.append)
+        self.assertEqual(done, [])
+        future.set_result(42)
+        self.assertEqual(done, [future])
+        future.add_done_callback(done.append)
+        self.assertEqual(done, [future, future])
+
+    def test_wait_all(self):
+        futures = [Future() for i in range(3)]
+        for i, future in enumerate(futures):
+            future.set_result(i)
+        self.assertEqual(wait_all(futures), [0, 1, 2])
+
+    def test_wait_all_timeout(self):
+        futures = [Future(), Future()]
+        futures[0].set_result(0)
+        self.assertRaises(TimeoutError, wait_all, futures, 0.01)
+
+    def test_as_completed(self):
+        futures = [Future() for i in range(3)]
+        futures[2].set_result(2)
+        futures[0].set_result(0)
+        threading.Timer(0.01, futures[1].set_result, [1]).start()
+        results = [f.result() for f in as_completed(futures, timeout=5)]
+        self.assertEqual(sorted(results[:2]), [0, 2])
+        self.assertEqual(results[2], 1)
+
+
+class FakeResults(object):
+
+    def __init__(self, tracks, total):
+        self._tracks = tracks
+        self._total = total
+
+    def error(self):
+        return 0
+
+    def tracks(self):
+        return self._tracks
+
+    def total_tracks(self):
+        return self._total
+
+
+class FakeSession(object):
+    """
+    Searches a list of numbers, completing each search when it is told to.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.searches = []
+
+    def search(self, query, callback, **kwargs):
+        self.searches.append(kwargs)
+        offset, count = kwargs['track_offset'], kwargs['track_count']
+        results = FakeResults(
+            self.items[offset:offset + count], len(self.items))
+        callback(results, kwargs['userdata'])
+        return results
+
+
+class TestSearchPages(unittest.TestCase):
+
+    def test_pages(self):
+        session = FakeSession(range(7))
+        pages = list(search_pages(session, 'foo', page_size=3))
+        self.assertEqual(pages, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(len(session.searches), 3)
+        for kwargs in session.searches:
+            self.assertEqual(kwargs['types'], ('tracks',))
+
+    def test_prefetch(self):
+        session = FakeSession(range(10))
+        pages = search_pages(session, 'foo', page_size=2, prefetch=2)
+        self.assertEqual(pages.next(), [0, 1])
+        self.assertEqual(
+            [kwargs['track_offset'] for kwargs in session.searches],
+            [0, 2, 4])
+
+    def test_no_prefetch(self):
+        session = FakeSession(range(5))
+        pages = search_pages(session, 'foo', page_size=2, prefetch=0)
+        self.assertEqual(pages.next(), [0, 1])
+        self.assertEqual(len(session.searches), 1)
+        self.assertEqual(list(pages), [[2, 3], [4]])
+        self.assertEqual(len(session.searches), 3)
+
+    def test_no_results(self):
+        session = FakeSession([])
+        self.assertEqual(list(search_pages(session, 'foo')), [])
+        self.assertEqual(len(session.searches), 1)
+
+
+class TestBrowseFutures(unittest.TestCase):
+
+    artist = mock_artist("foo")
+    album = mock_album("bar", artist)
+    browser = mock_albumbrowse(album, [], artist=artist, error=0)
+
+    def setUp(self):
+        registry_add('spotify:album:1234', self.album)
+        registry_add('spotify:albumbrowse:1234', self.browser)
+
+    def tearDown(self):
+        registry_clean()
+
+    def test_browse_album(self):
+        future = browse_album(self.album)
+        self.assertTrue(future.done())
+        self.assertTrue(future.result().is_loaded())
+
+    def test_loaded(self):
+        future = loaded([self.album, self.artist])
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), [self.album, self.artist])
+
+    def test_cancel_loaded(self):
+        pending = mock_artist('pending', is_loaded=0)
+        future = loaded([self.album, pending])
+        barrier = future._source
+        self.assertTrue(future.cancel())
+        mock_set_loaded(pending, True)
+        barrier.rescan()
+        # Cancelled, so no longer scanned
+        self.assertEqual(barrier.pending(), [pending])
+
+    def test_loaded_each(self):
+        futures = loaded_each([self.album, self.artist])
+        self.assertEqual([f.result() for f in futures],
+                         [self.album, self.artist])
@@ -0,0 +1,54 @@
+import unittest
+import weakref
+from spotify._mockspotify import mock_album, mock_artist, mock_track
+from spotify._mockspotify import mock_playlist, mock_user
+from spotify._mockspotify import set_interning
+
+
+class TestIdentity(unittest.TestCase):
+
+    artist = mock_artist('artist')
+    album = mock_album('album', artist)
+    owner = mock_user('owner')
+    tracks = [mock_track('track1', [artist], album),
+              mock_track('track2', [artist], album)]
+    playlist = mock_playlist('playlist', [(t, owner, 0) for t in tracks],
+                             owner)
+
+    def tearDown(self):
+        set_interning(False)
+
+    def test_equal_and_hash(self):
+        first, second = self.playlist[0], self.playlist[0]
+        self.assertFalse(first is second)
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, self.playlist[1])
+        self.assertEqual(len(set(self.playlist) | set(self.playlist)), 2)
+        self.assertEqual(self.tracks[0].album(), self.tracks[1].album())
+        self.assertEqual(self.album.artist(), self.artist)
+        self.assertEqual(self.playlist.owner(), self.owner)
+        self.assertNotEqual(self.album, self.artist)
+
+    def test_weakref(self):
+        track = self.playlist[0]
+        ref = weakref.ref(track)
+        self.assertTrue(ref() is track)
+        del track
+        self.assertTrue(ref() is None)
+
+    def test_interning(self):
+        set_interning(True)
+        first = self.playlist[0]
+        self.assertTrue(self.playlist[0] is first)
+        self.assertTrue(self.tracks[0].album() is self.tracks[1].album())
+        set_interning(False)
+        self.assertFalse(self.playlist[0] is first)
+
+    def test_set_interning_error(self):
+        class Broken(object):
+            def __nonzero__(self):
+                raise ZeroDivisionError
+
+        self.assertRaises(ZeroDivisionError, set_interning, Broken())
+        self.assertFalse(self.playlist[0] is self.playlist[0])
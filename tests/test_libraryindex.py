@@ -0,0 +1,71 @@
+import unittest
+from spotify._mockspotify import mock_album, mock_artist, mock_track
+from spotify._mockspotify import mock_playlist, mock_playlistcontainer
+from spotify._mockspotify import mock_user, registry_add, registry_clean
+from spotify.manager import LibraryIndex
+
+
+class TestLibraryIndex(unittest.TestCase):
+
+    user = mock_user('user')
+    artist = mock_artist('artist')
+    album = mock_album('album', artist)
+    track1 = mock_track('track1', [artist], album)
+    track2 = mock_track('track2', [artist], album)
+    p1 = mock_playlist('foo', [(track1, user), (track2, user), (track1, user)],
+                       user)
+    p2 = mock_playlist('bar', [(track2, user)], user)
+
+    def setUp(self):
+        registry_add('spotify:playlist:foo', self.p1)
+        registry_add('spotify:playlist:bar', self.p2)
+        registry_add('spotify:track:track1', self.track1)
+        registry_add('spotify:track:track2', self.track2)
+        self.container = mock_playlistcontainer(self.user, [self.p1, self.p2])
+        self.index = LibraryIndex()
+        self.index.attach(self.container)
+        self.index.container_manager.container_loaded(self.container, None)
+
+    def tearDown(self):
+        self.index.detach()
+        registry_clean()
+
+    def test_lookup(self):
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.playlist('spotify:playlist:foo').name(),
+                         'foo')
+        self.assertEqual([p.name() for p in self.index.playlists_named('bar')],
+                         ['bar'])
+        self.assertEqual(self.index.track_count('spotify:playlist:foo'), 3)
+        self.assertEqual(self.index.track_count(self.p2), 1)
+
+    def test_playlists_containing(self):
+        found = self.index.playlists_containing('spotify:track:track1')
+        self.assertEqual([(p.name(), positions) for p, positions in found],
+                         [('foo', [0, 2])])
+        self.assertEqual(len(self.index.playlists_containing(self.track2)), 2)
+
+    def test_track_changes(self):
+        manager = self.index.playlist_manager
+        manager.tracks_added(self.p2, [self.track1], 1, None)
+        manager.tracks_removed(self.p1, [0, 2], None)
+        manager.tracks_moved(self.p2, [1], 0, None)
+
+        found = self.index.playlists_containing(self.track1)
+        self.assertEqual([(p.name(), positions) for p, positions in found],
+                         [('bar', [0])])
+        self.assertEqual(self.index.track_count(self.p1), 1)
+
+    def test_playlist_removed(self):
+        self.index.container_manager.playlist_removed(
+            self.container, self.p1, 0, None)
+        self.assertFalse('spotify:playlist:foo' in self.index)
+        self.assertEqual(self.index.playlists_containing(self.track1), [])
+
+    def test_playlist_removed_once_of_twice(self):
+        manager = self.index.container_manager
+        manager.playlist_added(self.container, self.p1, 2, None)
+        manager.playlist_removed(self.container, self.p1, 0, None)
+        self.assertTrue('spotify:playlist:foo' in self.index)
+        manager.playlist_removed(self.container, self.p1, 1, None)
+        self.assertFalse('spotify:playlist:foo' in self.index)
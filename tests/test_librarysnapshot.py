@@ -0,0 +1,105 @@
+import unittest
+from spotify._mockspotify import mock_playlist, mock_playlistcontainer
+from spotify._mockspotify import mock_user, registry_add, registry_clean
+from spotify.manager import LibraryIndex, LibrarySnapshot
+
+
+class TestLibrarySnapshot(unittest.TestCase):
+
+    items = [
+        ('folder_start', None, u'dir', 7),
+        ('playlist', 'spotify:playlist:foo', u'foo', None),
+        ('folder_end', None, u'', 7),
+        ('folder_start', None, u'big', 2 ** 64 - 1),
+        ('folder_end', None, u'', 2 ** 64 - 1),
+        ('playlist', 'spotify:playlist:bar', u'bar', None),
+    ]
+
+    def setUp(self):
+        self.snapshot = LibrarySnapshot(':memory:')
+        self.snapshot.save_container(self.items)
+        self.snapshot.save_playlists({
+            'spotify:playlist:foo': (u'foo', ['spotify:track:a',
+                                              'spotify:track:b']),
+            'spotify:playlist:bar': (u'bar', ['spotify:track:b']),
+        })
+
+    def tearDown(self):
+        self.snapshot.close()
+
+    def test_load(self):
+        items, playlists = self.snapshot.load()
+        self.assertEqual(items, self.items)
+        self.assertEqual(playlists['spotify:playlist:foo'],
+                         (u'foo', ['spotify:track:a', 'spotify:track:b']))
+
+    def test_save_playlists_replaces_and_removes(self):
+        self.snapshot.save_playlists({
+            'spotify:playlist:foo': (u'baz', ['spotify:track:c']),
+            'spotify:playlist:bar': None,
+        })
+        _, playlists = self.snapshot.load()
+        self.assertEqual(playlists,
+                         {'spotify:playlist:foo': (u'baz', ['spotify:track:c'])})
+
+    def test_warm_index(self):
+        index = LibraryIndex(self.snapshot)
+        self.assertEqual(len(index), 2)
+        self.assertTrue('spotify:playlist:bar' in index)
+        self.assertEqual(index.track_uris('spotify:playlist:foo'),
+                         ['spotify:track:a', 'spotify:track:b'])
+        self.assertEqual(index.track_count('spotify:playlist:bar'), 1)
+        self.assertEqual(index.container_items(), self.items)
+
+
+class TestLibraryIndexSnapshot(unittest.TestCase):
+
+    user = mock_user('user')
+    playlist = mock_playlist('foo', [], user)
+
+    def setUp(self):
+        registry_add('spotify:playlist:foo', self.playlist)
+        self.snapshot = LibrarySnapshot(':memory:')
+        self.snapshot.save_playlists({
+            'spotify:playlist:old': (u'old', ['spotify:track:a']),
+        })
+        self.now = 0
+        self.index = LibraryIndex(self.snapshot, save_interval=10,
+                                  clock=lambda: self.now)
+        self.container = mock_playlistcontainer(
+            self.user, [self.playlist, self.playlist])
+        self.index.attach(self.container)
+        self.index.container_manager.container_loaded(self.container, None)
+
+    def tearDown(self):
+        self.index.detach()
+        self.snapshot.close()
+        registry_clean()
+
+    def test_reconcile_playlist_listed_twice(self):
+        self.assertEqual(len(self.index), 1)
+        self.assertFalse('spotify:playlist:old' in self.index)
+        _, playlists = self.snapshot.load()
+        self.assertEqual(sorted(playlists), ['spotify:playlist:foo'])
+
+    def test_rename_is_saved(self):
+        _, playlists = self.snapshot.load()
+        name = playlists['spotify:playlist:foo'][0]
+        self.playlist.rename(u'bar')
+        self.index.playlist_manager.playlist_renamed(self.playlist, None)
+        # Saved at most every 10 seconds
+        _, playlists = self.snapshot.load()
+        self.assertEqual(playlists['spotify:playlist:foo'][0], name)
+        self.now = 10
+        self.index.save_if_due()
+        _, playlists = self.snapshot.load()
+        self.assertEqual(playlists['spotify:playlist:foo'][0], u'bar')
+
+    def test_detach_saves(self):
+        self.playlist.rename(u'baz')
+        self.index.playlist_manager.playlist_renamed(self.playlist, None)
+        self.index.detach()
+        items, playlists = self.snapshot.load()
+        self.assertEqual(playlists['spotify:playlist:foo'][0], u'baz')
+        self.assertEqual([uri for _, uri, _, _ in items],
+                         ['spotify:playlist:foo', 'spotify:playlist:foo'])
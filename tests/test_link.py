@@ -69,6 +69,23 @@ class TestLink(unittest.TestCase):
         a = l.as_artist()
         self.assertEqual(str(a), "artist")
 
+    def test_resolve_many(self):
+        resolved = Link.resolve_many([
+            'spotify:track:test_track', u'spotify:album:test_album',
+            'spotify:artist:test_artist', 'BADLINK'])
+        self.assertEqual([str(o) for o in resolved[:3]],
+                         ['track', 'album', 'artist'])
+        self.assertTrue(isinstance(resolved[3], SpotifyError))
+
+    def test_resolve_many_rejects_non_strings(self):
+        self.assertRaises(TypeError, Link.resolve_many, [42])
+
+    def test_classify_many(self):
+        self.assertEqual(
+            Link.classify_many(['spotify:track:test_track',
+                                'spotify:artist:test_artist', 'BADLINK']),
+            [Link.LINK_TRACK, Link.LINK_ARTIST, Link.LINK_INVALID])
+
     def test_as_string(self):
         s = "spotify:track:str_test"
         l = Link.from_string(s)
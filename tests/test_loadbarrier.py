@@ -0,0 +1,112 @@
+import unittest
+from spotify import Settings
+from spotify._mockspotify import LoadBarrier, mock_artist, mock_album
+from spotify._mockspotify import mock_track, mock_playlist, mock_session
+from spotify._mockspotify import mock_event_trigger, mock_image_loaded
+from spotify._mockspotify import mock_metadata_updated, mock_set_loaded
+from spotify._mockspotify import mock_user, registry_clean, Session
+
+
+class TestLoadBarrier(unittest.TestCase):
+
+    artist = mock_artist('artist')
+    album = mock_album('album', artist)
+    track = mock_track('track', [artist], album)
+    pending_artist = mock_artist('pending', is_loaded=0)
+
+    def test_loaded_objects(self):
+        done = []
+        items = []
+        barrier = LoadBarrier([self.track, self.album], callback=
+            lambda b, u: done.append((b, u)), userdata='foo',
+            item_callback=lambda o, u: items.append(o))
+        self.assertTrue(barrier.is_done())
+        self.assertEqual(done, [(barrier, 'foo')])
+        self.assertEqual(items, [self.track, self.album])
+        self.assertEqual(barrier.objects(), (self.track, self.album))
+        self.assertEqual(barrier.pending(), [])
+
+    def test_no_objects(self):
+        done = []
+        barrier = LoadBarrier([], lambda b, u: done.append(b))
+        self.assertTrue(barrier.is_done())
+        self.assertEqual(done, [barrier])
+
+    def test_pending_objects(self):
+        done = []
+        items = []
+        barrier = LoadBarrier([self.artist, self.pending_artist],
+            lambda b, u: done.append(b),
+            item_callback=lambda o, u: items.append(o))
+        self.assertFalse(barrier.is_done())
+        self.assertEqual(done, [])
+        self.assertEqual(items, [self.artist])
+        self.assertEqual(barrier.pending(), [self.pending_artist])
+        barrier.rescan()
+        self.assertEqual(barrier.pending(), [self.pending_artist])
+        barrier.cancel()
+        self.assertFalse(barrier.is_done())
+
+    def test_unsupported_objects(self):
+        self.assertRaises(TypeError, LoadBarrier, [self.artist, 'foo'])
+
+
+class MockClient(object):
+
+    proxy = None
+    proxy_username = None
+    proxy_password = None
+
+    def __init__(self):
+        self.metadata_updates = 0
+
+    def metadata_updated(self, session):
+        self.metadata_updates += 1
+
+
+class TestLoadBarrierEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.done = []
+
+    def tearDown(self):
+        registry_clean()
+
+    def callback(self, barrier, userdata):
+        self.done.append(barrier)
+
+    def test_metadata_updated(self):
+        client = MockClient()
+        settings = Settings()
+        settings.application_key = 'appkey_good'
+        Session.create(client, settings)
+        artist = mock_artist('artist', is_loaded=0)
+        barrier = LoadBarrier([artist], self.callback)
+        mock_metadata_updated()
+        self.assertEqual(self.done, [])
+        mock_set_loaded(artist, True)
+        mock_metadata_updated()
+        self.assertEqual(self.done, [barrier])
+        self.assertEqual(client.metadata_updates, 2)
+
+    def test_playlist_state_changed(self):
+        playlist = mock_playlist('playlist', [], mock_user('user'),
+                                 is_loaded=0)
+        barrier = LoadBarrier([playlist], self.callback)
+        mock_set_loaded(playlist, True)
+        self.assertEqual(self.done, [])
+        mock_event_trigger(24, playlist)
+        self.assertEqual(self.done, [barrier])
+        self.assertTrue(barrier.is_done())
+
+    def test_image_loaded(self):
+        session = mock_session()
+        image = session.image_create('01234567890123456789')
+        mock_set_loaded(image, False)
+        items = []
+        barrier = LoadBarrier([image], self.callback,
+            item_callback=lambda o, u: items.append(o))
+        self.assertEqual(self.done, [])
+        mock_image_loaded(image)
+        self.assertEqual(items, [image])
+        self.assertEqual(self.done, [barrier])
@@ -25,6 +25,11 @@ class TestPlaylistContainer(unittest.TestCase):
         self.assertEqual(pc[0].name(), "foo")
         self.assertEqual(pc[1].name(), "bar")
 
+    def test_iter_and_slice(self):
+        pc = mock_playlistcontainer(self.owner, [self.p1, self.p2])
+        self.assertEqual([p.name() for p in pc], ["foo", "bar"])
+        self.assertEqual([p.name() for p in pc[-1:]], ["bar"])
+
     def test_sq_item_exception(self):
         pc = mock_playlistcontainer(self.owner, [self.p1, self.p2])
 
@@ -54,6 +59,14 @@ class TestPlaylistContainer(unittest.TestCase):
         pc.remove_playlist(1)
         self.assertEqual(len(pc), 1)
 
+    def test_remove_playlist_while_iterating(self):
+        pc = mock_playlistcontainer(self.owner, [self.p1, self.p2])
+        names = []
+        for playlist in pc:
+            names.append(playlist.name())
+            pc.remove_playlist(len(pc) - 1)
+        self.assertEqual(names, ["foo"])
+
     def test_remove_playlist_out_of_range(self):
         pc = mock_playlistcontainer(self.owner, [])
         self.assertRaises(IndexError, pc.remove_playlist, 0)
@@ -82,6 +95,25 @@ class TestPlaylist(unittest.TestCase):
         playlist = mock_playlist('playlist', [], self.owner)
         self.assertEqual(playlist.name(), 'playlist')
 
+    def test_snapshot(self):
+        playlist = mock_playlist('playlist', self.tracks, self.owner)
+        snapshot = playlist.snapshot(['name', 'artists', 'create_time'])
+        self.assertEqual(sorted(snapshot), ['artists', 'create_time', 'name'])
+        self.assertEqual(snapshot['name'], ['track1', 'track2', 'track3'])
+        self.assertEqual(snapshot['artists'], [('artist',)] * 3)
+        self.assertEqual(snapshot['create_time'].typecode, 'i')
+        self.assertEqual(list(snapshot['create_time']), [1320961109] * 3)
+
+    def test_snapshot_unicode_fields(self):
+        playlist = mock_playlist('playlist', self.tracks, self.owner)
+        snapshot = playlist.snapshot([u'name'])
+        self.assertEqual(snapshot['name'], ['track1', 'track2', 'track3'])
+        self.assertRaises(ValueError, playlist.snapshot, [u'n\xe5me'])
+
+    def test_snapshot_unknown_field(self):
+        playlist = mock_playlist('playlist', self.tracks, self.owner)
+        self.assertRaises(ValueError, playlist.snapshot, ['foo'])
+
     def test_name_unicode(self):
         playlist = mock_playlist(u'plåylïst', [], self.owner)
         self.assertEqual(playlist.name(), u'plåylïst')
@@ -111,6 +143,26 @@ class TestPlaylist(unittest.TestCase):
         self.assertEqual(playlist[1].name(), 'track2')
         self.assertEqual(playlist[2].name(), 'track3')
 
+    def test_iter(self):
+        playlist = mock_playlist(u'foo', self.tracks, self.owner)
+        self.assertEqual([t.name() for t in playlist],
+                         ['track1', 'track2', 'track3'])
+
+    def test_negative_index_and_slice(self):
+        playlist = mock_playlist(u'foo', self.tracks, self.owner)
+        self.assertEqual(playlist[-1].name(), 'track3')
+        self.assertEqual([t.name() for t in playlist[:2]],
+                         ['track1', 'track2'])
+        self.assertRaises(TypeError, lambda: playlist['foo'])
+
+    def test_remove_tracks_while_iterating(self):
+        playlist = mock_playlist(u'foo', self.tracks, self.owner)
+        names = []
+        for track in playlist:
+            names.append(track.name())
+            playlist.remove_tracks([len(playlist) - 1])
+        self.assertEqual(names, ['track1', 'track2'])
+
     def test_num_subscribers(self):
         playlist = mock_playlist('foo', [], self.owner, num_subscribers=42)
         self.assertEqual(playlist.num_subscribers(), 42)
@@ -124,6 +176,15 @@ class TestPlaylist(unittest.TestCase):
         playlist = mock_playlist(u'foo', [], self.owner)
         playlist.add_tracks(0, self.pure_tracks)
 
+    def test_add_tracks_from_generator_in_chunks(self):
+        playlist = mock_playlist(u'foo', [], self.owner)
+        progress = []
+        playlist.add_tracks(0, (t for t in self.pure_tracks), chunk_size=2,
+                            progress=progress.append)
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual([t.name() for t in playlist],
+                         ['track1', 'track2', 'track3'])
+
     @raises(IndexError)
     def test_add_tracks_wrong_position(self):
         playlist = mock_playlist('foo', [], self.owner)
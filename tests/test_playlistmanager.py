@@ -1,8 +1,9 @@
 import unittest
 from spotify._mockspotify import mock_playlist, mock_event_trigger
 from spotify._mockspotify import mock_album, mock_artist, mock_user, mock_track
-from spotify.manager import SpotifyPlaylistManager
+from spotify.manager import SpotifyPlaylistManager, PlaylistDelta
 from spotify._mockspotify import User, Playlist
+from spotify import SpotifyError
 
 callback_called = None
 
@@ -294,3 +295,111 @@ class TestPlaylistManager(unittest.TestCase):
         self.assertEqual(args[1].name(), self.playlist.name())
         self.assertEqual(type(args[2]), bytes)
         self.assertEqual(args[2], '01234567890123456789')
+
+    def test_unwatch_all(self):
+        playlist = mock_playlist('bar', [], self.owner)
+        other = MyPlaylistManager()
+        self.manager.watch(playlist, 'foo')
+        self.manager.watch(playlist, 'bar')
+        other.watch(playlist)
+
+        self.assertEqual(self.manager.unwatch_all(playlist), 2)
+        self.assertRaises(SpotifyError, playlist.remove_callback,
+                          self.manager, 'foo')
+        other.unwatch(playlist)
+        self.assertEqual(playlist.remove_all_callbacks(), 0)
+
+    def test_watch_events(self):
+        global callback_called
+        playlist = mock_playlist('baz', [], self.owner, self.subscribers,
+                                 self.num_subscribers, self.description,
+                                 self.image)
+        self.manager.watch(playlist, events=['subscribers_changed'])
+
+        mock_event_trigger(30, playlist)
+        self.assertEqual(callback_called, None)
+        mock_event_trigger(31, playlist)
+        name, args = callback_called
+        self.assertEqual(name, 'subscribers_changed')
+        self.assertEqual(args[0], self.manager)
+        self.assertEqual(args[1].name(), 'baz')
+        self.manager.unwatch(playlist)
+
+    def test_unicode_events(self):
+        global callback_called
+        playlist = mock_playlist('qux', [], self.owner)
+        self.manager.watch(playlist, events=[u'playlist_renamed'])
+
+        mock_event_trigger(23, playlist)
+        name, args = callback_called
+        self.assertEqual(name, 'playlist_renamed')
+        self.manager.unwatch(playlist)
+        self.assertRaises(ValueError, playlist.add_callbacks, self.manager,
+                          {u'playlist_r\xe9named': None})
+
+    def test_overridden_events(self):
+        class RenameManager(SpotifyPlaylistManager):
+            def playlist_renamed(self, playlist, userdata):
+                pass
+
+        self.assertEqual(RenameManager().overridden_events(),
+                         ['playlist_renamed'])
+        self.assertEqual(len(self.manager.overridden_events()), 13)
+
+
+class FakePlaylist(object):
+
+    def add_callbacks(self, owner, handlers, userdata=None):
+        self.handlers = handlers
+
+
+class BatchingPlaylistManager(SpotifyPlaylistManager):
+
+    batch_updates = True
+
+    def __init__(self):
+        self.events = []
+
+    def tracks_added(self, playlist, tracks, position, userdata):
+        self.events.append(('tracks_added', tracks, position))
+
+    def tracks_changed(self, playlist, delta, userdata):
+        self.events.append(('tracks_changed', delta.changes))
+
+
+class TestPlaylistDelta(unittest.TestCase):
+
+    def test_adjacent_additions_are_merged(self):
+        delta = PlaylistDelta()
+        delta.add(2, ['a', 'b'])
+        delta.add(4, ['c'])
+        delta.add(3, ['d'])
+        self.assertEqual(delta.changes, [('added', 2, ['a', 'd', 'b', 'c'])])
+
+    def test_removals_are_relative_to_first(self):
+        delta = PlaylistDelta()
+        delta.remove([1])
+        delta.remove([0, 2])
+        delta.move([0], 3)
+        self.assertEqual(delta.changes,
+                         [('removed', [0, 1, 3]), ('moved', [0], 3)])
+
+    def test_batch_updates(self):
+        manager = BatchingPlaylistManager()
+        playlist = FakePlaylist()
+        manager.watch(playlist, 'foo')
+        handlers = playlist.handlers
+
+        handlers['tracks_added'](playlist, ['a'], 0, 'foo')
+        handlers['playlist_update_in_progress'](playlist, False, 'foo')
+        handlers['tracks_added'](playlist, ['b'], 1, 'foo')
+        handlers['tracks_added'](playlist, ['c'], 2, 'foo')
+        handlers['tracks_removed'](playlist, [0], 'foo')
+        self.assertEqual(len(manager.events), 1)
+        handlers['playlist_update_in_progress'](playlist, True, 'foo')
+
+        self.assertEqual(manager.events, [
+            ('tracks_added', ['a'], 0),
+            ('tracks_changed', [('added', 1, ['b', 'c']),
+                                ('removed', [0])]),
+        ])
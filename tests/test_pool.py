@@ -0,0 +1,44 @@
+import unittest
+
+from spotify import _mockspotify
+import spotify.manager.session
+# monkeypatch for testing
+spotify.manager.session.spotify = _mockspotify
+
+from spotify.manager import SpotifySessionManager
+from spotify.manager.pool import SessionPool
+
+
+class MockClient(SpotifySessionManager):
+
+    cache_location = "/foo"
+    settings_location = "/foo"
+    application_key = "appkey_good"
+    user_agent = "user_agent_foo"
+
+
+def username(manager):
+    return manager.session.username()
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SessionPool([("username_good", "password_good")],
+                                manager_class=MockClient)
+
+    def tearDown(self):
+        self.pool.close(timeout=5)
+
+    def test_call(self):
+        future = self.pool.call(username)
+        self.assertEqual(future.result(timeout=5), "username_good")
+
+    def test_call_worker_by_username(self):
+        future = self.pool.call(username, worker="username_good")
+        self.assertEqual(future.result(timeout=5), "username_good")
+        self.assertEqual(self.pool.loads(), [0])
+
+    def test_unknown_worker(self):
+        self.assertRaises(ValueError, self.pool.call, username,
+                          worker="nobody")
@@ -0,0 +1,58 @@
+import unittest
+from spotify._mockspotify import mock_albumbrowse, mock_album, mock_artist
+from spotify._mockspotify import AlbumBrowser
+from spotify._mockspotify import registry_add, registry_clean
+from spotify._mockspotify import set_callback_profiling, callback_profile, \
+                                 reset_callback_profile
+
+class TestCallbackProfile(unittest.TestCase):
+
+    artist = mock_artist("foo")
+    album = mock_album("bar", artist)
+    browser = mock_albumbrowse(album, [], artist=artist, error=0)
+
+    def setUp(self):
+        registry_add('spotify:album:1234', self.album)
+        registry_add('spotify:albumbrowse:1234', self.browser)
+        reset_callback_profile()
+
+    def tearDown(self):
+        set_callback_profiling(False)
+        reset_callback_profile()
+        registry_clean()
+
+    def test_disabled_by_default(self):
+        AlbumBrowser(self.album, lambda browser, userdata: None)
+        self.assertEqual(callback_profile(), {})
+
+    def test_profile(self):
+        set_callback_profiling(True)
+        AlbumBrowser(self.album, lambda browser, userdata: None)
+        profile = callback_profile()['albumbrowse_complete']
+        self.assertEqual(profile['calls'], 1)
+        self.assertEqual(profile['unraisable'], 0)
+        self.assertTrue(profile['gil_wait'] >= 0)
+        self.assertTrue(profile['handler'] >= 0)
+
+    def test_unraisable(self):
+        def callback(browser, userdata):
+            raise ValueError()
+        set_callback_profiling(True)
+        AlbumBrowser(self.album, callback)
+        profile = callback_profile()['albumbrowse_complete']
+        self.assertEqual(profile['unraisable'], 1)
+
+    def test_set_callback_profiling_error(self):
+        class Broken(object):
+            def __nonzero__(self):
+                raise ZeroDivisionError
+
+        self.assertRaises(ZeroDivisionError, set_callback_profiling, Broken())
+        AlbumBrowser(self.album, lambda browser, userdata: None)
+        self.assertEqual(callback_profile(), {})
+
+    def test_reset(self):
+        set_callback_profiling(True)
+        AlbumBrowser(self.album, lambda browser, userdata: None)
+        reset_callback_profile()
+        self.assertEqual(callback_profile(), {})
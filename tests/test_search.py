@@ -1,5 +1,9 @@
 import unittest
 from spotify._mockspotify import mock_artist, mock_album, mock_search, mock_track
+from spotify._mockspotify import mock_session, registry_add, registry_clean
+from spotify._mockspotify import mock_hold_search_completions
+from spotify._mockspotify import mock_release_search_completions
+from spotify._mockspotify import mock_last_search_params
 
 class TestSearch(unittest.TestCase):
 
@@ -38,6 +42,10 @@ class TestSearch(unittest.TestCase):
                         ['track11', 'track12', 'track13',
                          'track21', 'track22', 'track23'])
 
+    def test_playlists(self):
+        self.assertEqual(self.search.playlists(), [])
+        self.assertEqual(self.search.total_playlists(), 0)
+
     def test_query(self):
         self.assertEqual(self.search.query(), "query")
 
@@ -52,3 +60,98 @@ class TestSearch(unittest.TestCase):
         self.assertEqual(self.search.total_artists(), 2)
         self.assertEqual(self.search.total_tracks(), 6)
 
+
+
+class TestSessionSearch(unittest.TestCase):
+
+    artist = mock_artist('artist')
+    album = mock_album('album', artist)
+    track = mock_track('track', [artist], album)
+    search = mock_search('query', [track], [album], [artist])
+    session = mock_session()
+
+    def setUp(self):
+        registry_add('spotify:search:query', self.search)
+        self.found = []
+
+    def tearDown(self):
+        mock_hold_search_completions(False)
+        mock_release_search_completions()
+        registry_clean()
+
+    def callback(self, results, userdata):
+        self.found.append(([t.name() for t in results.tracks()], userdata))
+
+    def test_completed_during_search(self):
+        results = self.session.search('query', self.callback, userdata=1)
+        self.assertEqual(results.query(), 'query')
+        self.assertEqual(self.found, [(['track'], 1)])
+
+    def test_identical_searches_are_shared(self):
+        mock_hold_search_completions(True)
+        self.session.search('query', self.callback, userdata=1)
+        self.session.search('query', self.callback, userdata=2)
+        self.assertEqual(self.found, [])
+        self.assertEqual(mock_release_search_completions(), 1)
+        self.assertEqual(self.found, [(['track'], 1), (['track'], 2)])
+
+    def test_different_offsets_are_not_shared(self):
+        mock_hold_search_completions(True)
+        self.session.search('query', self.callback, userdata=1)
+        self.session.search('query', self.callback, track_offset=1,
+                            userdata=2)
+        self.assertEqual(mock_release_search_completions(), 2)
+        self.assertEqual(sorted(userdata for _, userdata in self.found),
+                         [1, 2])
+
+    def test_hold_error(self):
+        class Broken(object):
+            def __nonzero__(self):
+                raise ZeroDivisionError
+
+        self.assertRaises(ZeroDivisionError, mock_hold_search_completions,
+                          Broken())
+        self.session.search('query', self.callback, userdata=1)
+        self.assertEqual(self.found, [(['track'], 1)])
+
+    def test_types(self):
+        self.session.search('query', self.callback, types=('tracks',),
+                            album_offset=5)
+        params = mock_last_search_params()
+        self.assertEqual(params['track_count'], 32)
+        self.assertEqual(params['album_count'], 0)
+        self.assertEqual(params['album_offset'], 5)
+        self.assertEqual(params['artist_count'], 0)
+        self.assertEqual(params['playlist_count'], 0)
+
+    def test_single_type(self):
+        self.session.search('query', self.callback, types=u'artists',
+                            artist_count=10)
+        params = mock_last_search_params()
+        self.assertEqual(params['track_count'], 0)
+        self.assertEqual(params['album_count'], 0)
+        self.assertEqual(params['artist_count'], 10)
+        self.assertEqual(params['playlist_count'], 0)
+
+    def test_all_types(self):
+        self.session.search('query', self.callback, types=None)
+        params = mock_last_search_params()
+        self.assertEqual(params['track_count'], 32)
+        self.assertEqual(params['playlist_count'], 32)
+
+    def test_unknown_type(self):
+        self.assertRaises(ValueError, self.session.search, 'query',
+                          self.callback, types=('tracks', 'songs'))
+        self.assertRaises(TypeError, self.session.search, 'query',
+                          self.callback, types=(1,))
+        self.assertEqual(self.found, [])
+
+    def test_search_again_from_callback(self):
+        def callback(results, userdata):
+            self.found.append(userdata)
+            if userdata == 1:
+                self.session.search('query', callback, userdata=2)
+        mock_hold_search_completions(True)
+        self.session.search('query', callback, userdata=1)
+        self.assertEqual(mock_release_search_completions(), 2)
+        self.assertEqual(self.found, [1, 2])
@@ -0,0 +1,57 @@
+import unittest
+
+from spotify.manager.searchcache import SearchCache
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SearchCache(size=2, ttl=10, clock=self.clock)
+
+    def test_key_is_normalised(self):
+        self.assertEqual(SearchCache.key('Foo  Bar '), SearchCache.key('foo bar'))
+        self.assertEqual(SearchCache.key('foo'),
+                         SearchCache.key(u'foo', track_offset=0))
+        self.assertNotEqual(SearchCache.key('foo'),
+                            SearchCache.key('foo', track_offset=32))
+        self.assertNotEqual(SearchCache.key('foo'),
+                            SearchCache.key('foo', search_type='suggest'))
+
+    def test_key_with_types(self):
+        self.assertEqual(SearchCache.key('foo', types=('tracks',)),
+                         SearchCache.key('foo', album_count=0, artist_count=0,
+                                         playlist_count=0))
+        self.assertEqual(SearchCache.key('foo', types='albums'),
+                         SearchCache.key('foo', types=['albums']))
+
+    def test_get_and_put(self):
+        key = SearchCache.key('foo')
+        self.assertEqual(self.cache.get(key), None)
+        self.cache.put(key, 'results')
+        self.assertEqual(self.cache.get(key), 'results')
+
+    def test_ttl(self):
+        key = SearchCache.key('foo')
+        self.cache.put(key, 'results')
+        self.clock.now += 10
+        self.assertEqual(self.cache.get(key), None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertEqual(self.cache.get('b'), None)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
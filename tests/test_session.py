@@ -1,6 +1,7 @@
 # encoding: utf-8
 
 import unittest
+import select
 import threading
 
 from spotify import _mockspotify
@@ -10,7 +11,11 @@ spotify.manager.session.spotify = spotify._mockspotify
 
 from spotify import Settings
 from spotify.manager import SpotifySessionManager
+from spotify.manager.session import _DeliverySlot
+from spotify.manager.stats import SessionManagerStats
 from spotify._mockspotify import mock_track, mock_album, Session
+from spotify._mockspotify import mock_artist, mock_search
+from spotify._mockspotify import registry_add, registry_clean
 
 
 class BaseMockClient(SpotifySessionManager):
@@ -41,6 +46,23 @@ class TestSession(unittest.TestCase):
         s.application_key = "appkey_good"
         session = Session.create(c, s)
 
+    def test_rebind_callbacks(self):
+        class MockClient(BaseMockClient):
+            def logged_in(self, session, error):
+                self.disconnect()
+
+        def logged_in(session, error):
+            c.found_username = session.username()
+            c.disconnect()
+
+        c = MockClient()
+        c.found_username = None
+        # Not called until the callbacks are bound again
+        c.logged_in = logged_in
+        self.assertEqual(c.session.rebind_callbacks(), None)
+        c.connect()
+        self.assertEqual(c.username, c.found_username)
+
     def test_initialisation(self):
         class MockClient(BaseMockClient):
             def logged_in(self, session, error):
@@ -52,6 +74,56 @@ class TestSession(unittest.TestCase):
         c.connect()
         self.assertEqual(c.username, c.found_username)
 
+    def test_run_in_loop_error(self):
+        class MockClient(BaseMockClient):
+            def logged_in(self, session, error):
+                self.run_in_loop(lambda: 1 / 0)
+                self.run_in_loop(self.disconnect)
+
+        c = MockClient()
+        # Returns once logged out, the error does not end the loop
+        c.connect()
+
+    def test_search_cache(self):
+        artist = mock_artist('artist')
+        album = mock_album('album', artist)
+        track = mock_track('track', [artist], album)
+        registry_add('spotify:search:query',
+                     mock_search('query', [track], [album], [artist]))
+        now = [0]
+        found = []
+
+        def callback(results, userdata):
+            found.append((userdata, results))
+
+        def failing_callback(results, userdata):
+            raise ValueError(userdata)
+
+        class MockClient(BaseMockClient):
+            search_cache_size = 2
+            search_cache_ttl = 10
+
+            def logged_in(self, session, error):
+                self.search_cache._clock = lambda: now[0]
+                self.search('query', callback, 'miss')
+                self.hit = self.search('Query ', callback, 'hit')
+                self.search('query', failing_callback, 'failing hit')
+                now[0] = 10
+                self.search('query', callback, 'expired')
+                self.run_in_loop(self.disconnect)
+
+        c = MockClient()
+        try:
+            c.connect()
+        finally:
+            registry_clean()
+        # Misses call back from the search, hits later from the loop
+        self.assertEqual([userdata for userdata, _ in found],
+                         ['miss', 'expired', 'hit'])
+        self.assertTrue(found[2][1] is found[0][1])
+        self.assertTrue(c.hit is found[0][1])
+        self.assertFalse(found[1][1] is found[0][1])
+
     def test_unicode(self):
         class MockClient(BaseMockUnicodeClient):
             def logged_in(self, session, error):
@@ -77,3 +149,88 @@ class TestSession(unittest.TestCase):
 
         c = MockClient()
         c.connect()
+
+
+class TestDeliverySlot(unittest.TestCase):
+
+    def test_offer_is_withdrawn_after_timeout(self):
+        slot = _DeliverySlot()
+        self.assertEqual(slot.offer(('frames',), 0.01, lambda: None), 0)
+        self.assertEqual(slot.state, _DeliverySlot.IDLE)
+        self.assertEqual(slot.take(), None)
+
+    def test_offer_returns_consumed_frames(self):
+        slot = _DeliverySlot()
+
+        def serve():
+            args = slot.take()
+            slot.reply(len(args))
+
+        def wake():
+            threading.Thread(target=serve).start()
+
+        self.assertEqual(slot.offer(('a', 'b'), 5, wake), 2)
+        self.assertEqual(slot.state, _DeliverySlot.IDLE)
+
+
+class TestSessionManagerStats(unittest.TestCase):
+
+    def test_latency_histogram(self):
+        stats = SessionManagerStats()
+        stats.add_latency('process_events', 0.0005)
+        stats.add_latency('process_events', 0.002)
+        stats.add_latency('process_events', 10)
+        histogram = dict(
+            stats.snapshot()['commands']['process_events']['latency_histogram'])
+        self.assertEqual(histogram[0.001], 1)
+        self.assertEqual(histogram[0.005], 1)
+        self.assertEqual(histogram[None], 1)
+
+    def test_partial_music_deliveries(self):
+        stats = SessionManagerStats()
+        stats.add_music_delivery(100, 100)
+        stats.add_music_delivery(100, 40)
+        stats.add_music_delivery(100, 0)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['music_deliveries'], 3)
+        self.assertEqual(snapshot['partial_music_deliveries'], 2)
+        self.assertEqual(snapshot['music_delivery_frames'], 140)
+
+    def test_music_delivery_fps_decays(self):
+        now = [0.0]
+        stats = SessionManagerStats(clock=lambda: now[0])
+        now[0] = 1.0
+        stats.add_music_delivery(44100, 44100)
+        now[0] = 1.5
+        self.assertEqual(stats.snapshot()['music_delivery_fps'], 44100)
+        now[0] = 3.0
+        stats.add_music_delivery(22050, 22050)
+        self.assertEqual(stats.snapshot()['music_delivery_fps'], 11025)
+        # No frames for longer than the window
+        now[0] = 10.0
+        self.assertEqual(stats.snapshot()['music_delivery_fps'], 0)
+
+    def test_timed_callback(self):
+        stats = SessionManagerStats()
+        callback = stats.timed('logged_in', lambda session, error: 42)
+        self.assertEqual(callback(None, None), 42)
+        self.assertEqual(stats.snapshot()['callbacks']['logged_in']['calls'], 1)
+
+    def test_manager_stats(self):
+        c = BaseMockClient()
+        stats = c.stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['process_events_calls'], 0)
+
+
+class TestNotifyFd(unittest.TestCase):
+
+    def test_notify_fd(self):
+        c = BaseMockClient()
+        fd = c.session.notify_fd()
+        try:
+            self.assertEqual(c.session.notify_fd(), fd)
+            # Readable, as events may have been pending before
+            self.assertEqual(select.select([fd], [], [], 0)[0], [fd])
+        finally:
+            c.session.close_notify_fd()